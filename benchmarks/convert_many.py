@@ -0,0 +1,67 @@
+"""Compare per-record cost of convert_many against calling the converter once per record."""
+
+import argparse
+import random
+import time
+
+from uwotm8 import Converter, convert_american_to_british_spelling, convert_many
+
+CLEAN_WORDS = [
+    "the",
+    "quick",
+    "brown",
+    "fox",
+    "report",
+    "analysis",
+    "summary",
+    "quarterly",
+    "results",
+    "market",
+    "update",
+    "policy",
+    "review",
+]
+AMERICAN_WORDS = ["color", "center", "organize", "behavior", "analyze"]
+
+
+def make_records(count: int, hit_rate: float, seed: int = 0) -> list[str]:
+    """Build short records, roughly hit_rate of which contain an American spelling."""
+    rng = random.Random(seed)
+    records = []
+    for _ in range(count):
+        words = [rng.choice(CLEAN_WORDS) for _ in range(rng.randint(3, 12))]
+        if rng.random() < hit_rate:
+            words[rng.randrange(len(words))] = rng.choice(AMERICAN_WORDS)
+        records.append(" ".join(words).capitalize())
+    return records
+
+
+def per_record_us(func, records: list[str], repeat: int) -> float:
+    """Return the best per-record time in microseconds over several runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(records)
+        best = min(best, time.perf_counter() - start)
+    return best / len(records) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--hit-rates", type=float, nargs="+", default=[0.0, 0.1, 1.0])
+    args = parser.parse_args()
+
+    converter = Converter()
+    print(f"{'hit rate':>8}  {'per call':>10}  {'Converter.convert':>17}  {'convert_many':>12}")
+    for hit_rate in args.hit_rates:
+        records = make_records(args.records, hit_rate)
+        per_call = per_record_us(lambda rs: [convert_american_to_british_spelling(r) for r in rs], records, args.repeat)
+        reused = per_record_us(lambda rs: [converter.convert(r) for r in rs], records, args.repeat)
+        batched = per_record_us(convert_many, records, args.repeat)
+        print(f"{hit_rate:>8.0%}  {per_call:>8.2f}us  {reused:>15.2f}us  {batched:>10.2f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""
+Throughput benchmarks for uwotm8 over representative synthetic corpora.
+
+Run all benchmarks and save the results:
+
+    python benchmarks/run.py --output results.json
+
+Compare against saved results, failing if any benchmark is more than 10% slower:
+
+    python benchmarks/run.py --compare results.json --threshold 0.1
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from breame.data.spelling_constants import AMERICAN_ENGLISH_SPELLINGS
+
+import uwotm8
+from uwotm8.convert import (
+    Converter,
+    convert_american_to_british_spelling,
+    convert_markdown_file,
+    convert_python_comments_only,
+    process_paths,
+)
+
+FORMAT_VERSION = 1
+
+# Common words with no American spelling, to dilute the corpora to a realistic hit rate
+_CLEAN_TEXT = """
+the of and to in a is that for it as was with be by on not he this are or his from at which but have an they you
+were her she there been one all we their has would when if so no will more can out other into some could report
+analysis summary quarterly results market update policy review government department service public
+"""
+CLEAN_WORDS = _CLEAN_TEXT.split()
+AMERICAN_WORDS = sorted(AMERICAN_ENGLISH_SPELLINGS)
+
+# A benchmark takes a scale factor and a scratch directory, and returns the function to time, the amount of
+# work it does per call and the unit of that amount
+Workload = tuple[Callable[[], Any], float, str]
+Benchmark = Callable[[float, Path], Workload]
+BENCHMARKS: dict[str, Benchmark] = {}
+
+
+def benchmark(name: str) -> Callable[[Benchmark], Benchmark]:
+    """Register a benchmark under a name."""
+
+    def register(func: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = func
+        return func
+
+    return register
+
+
+def make_words(rng: random.Random, count: int, hit_rate: float = 0.02) -> list[str]:
+    """Return mostly British-neutral words with roughly hit_rate of them American spellings."""
+    return [rng.choice(AMERICAN_WORDS) if rng.random() < hit_rate else rng.choice(CLEAN_WORDS) for _ in range(count)]
+
+
+def make_prose(rng: random.Random, size: int, line_length: int = 12, hit_rate: float = 0.02) -> str:
+    """Return lines of prose totalling roughly size characters."""
+    lines = []
+    total = 0
+    while total < size:
+        line = " ".join(make_words(rng, line_length, hit_rate)).capitalize() + "."
+        lines.append(line)
+        total += len(line) + 1
+    return "\n".join(lines) + "\n"
+
+
+def make_markdown(rng: random.Random, size: int) -> str:
+    """Return markdown with headings, links, bare URLs and inline code totalling roughly size characters."""
+    parts = []
+    total = 0
+    while total < size:
+        words = make_words(rng, 10)
+        kind = rng.randrange(4)
+        if kind == 0:
+            part = f"## {' '.join(words[:4]).title()}"
+        elif kind == 1:
+            part = f"See [{' '.join(words[:3])}](https://example.com/{words[3]}/{words[4]}) for {' '.join(words[5:])}."
+        elif kind == 2:
+            part = f"Visit www.{words[0]}.org or `{words[1]}_{words[2]}` to {' '.join(words[3:])}."
+        else:
+            part = " ".join(words).capitalize() + "."
+        parts.append(part)
+        total += len(part) + 1
+    return "\n".join(parts) + "\n"
+
+
+def make_code_markdown(rng: random.Random, size: int) -> str:
+    """Return markdown documentation that is mostly fenced code, totalling roughly size characters."""
+    parts = []
+    total = 0
+    while total < size:
+        prose = make_words(rng, 24)
+        part = f"{' '.join(prose[:12]).capitalize()} `{prose[12]}()` and {' '.join(prose[13:])}.\n\n"
+        part += "```python\n" + make_module(rng, rng.randint(300, 1_500)) + "```\n\n"
+        parts.append(part)
+        total += len(part)
+    return "".join(parts)
+
+
+def make_module(rng: random.Random, size: int) -> str:
+    """Return a Python module with comments, docstrings and code totalling roughly size characters."""
+    parts = []
+    total = 0
+    index = 0
+    while total < size:
+        words = make_words(rng, 12)
+        part = (
+            f"def {words[0]}_{index}({words[1]}_value, {words[2]}_count=0):\n"
+            f'    """{" ".join(words[3:9]).capitalize()}."""\n'
+            f"    # {' '.join(words[3:]).capitalize()}\n"
+            f'    label = "{" ".join(words[6:10])}"\n'
+            f"    return {words[1]}_value + {words[2]}_count  # {words[11]}\n\n\n"
+        )
+        parts.append(part)
+        total += len(part)
+        index += 1
+    return "".join(parts)
+
+
+@benchmark("short_strings")
+def bench_short_strings(scale: float, tmp_dir: Path) -> Workload:
+    rng = random.Random(0)
+    texts = [
+        " ".join(make_words(rng, rng.randint(3, 12), hit_rate=0.05)).capitalize() for _ in range(int(50_000 * scale))
+    ]
+    return (lambda: [convert_american_to_british_spelling(text) for text in texts]), len(texts), "strings/s"
+
+
+@benchmark("long_prose")
+def bench_long_prose(scale: float, tmp_dir: Path) -> Workload:
+    text = make_prose(random.Random(1), int(2_000_000 * scale))
+    return (lambda: convert_american_to_british_spelling(text)), len(text) / 1e6, "MB/s"
+
+
+@benchmark("clean_prose")
+def bench_clean_prose(scale: float, tmp_dir: Path) -> Workload:
+    text = make_prose(random.Random(6), int(2_000_000 * scale), hit_rate=0)
+    return (lambda: convert_american_to_british_spelling(text)), len(text) / 1e6, "MB/s"
+
+
+@benchmark("single_line")
+def bench_single_line(scale: float, tmp_dir: Path) -> Workload:
+    text = make_prose(random.Random(2), int(1_000_000 * scale)).replace("\n", " ")
+    return (lambda: convert_american_to_british_spelling(text)), len(text) / 1e6, "MB/s"
+
+
+@benchmark("single_line_chunks")
+def bench_single_line_chunks(scale: float, tmp_dir: Path) -> Workload:
+    # Pieces the size streamed files and standard input are read in
+    text = make_prose(random.Random(9), int(16_000_000 * scale)).replace("\n", " ")
+    chunks = [text[i : i + 1024 * 1024] for i in range(0, len(text), 1024 * 1024)]
+    converter = Converter()
+    return (lambda: "".join(converter.convert_chunks(chunks))), len(text) / 1e6, "MB/s"
+
+
+@benchmark("url_markdown")
+def bench_url_markdown(scale: float, tmp_dir: Path) -> Workload:
+    text = make_markdown(random.Random(3), int(2_000_000 * scale))
+    return (lambda: convert_american_to_british_spelling(text)), len(text) / 1e6, "MB/s"
+
+
+@benchmark("code_markdown")
+def bench_code_markdown(scale: float, tmp_dir: Path) -> Workload:
+    text = make_code_markdown(random.Random(8), int(2_000_000 * scale))
+    path = tmp_dir / "guide.md"
+    path.write_text(text, encoding="utf-8")
+    return (lambda: convert_markdown_file(path, tmp_dir / "guide.out.md")), len(text) / 1e6, "MB/s"
+
+
+@benchmark("comments_only")
+def bench_comments_only(scale: float, tmp_dir: Path) -> Workload:
+    module = make_module(random.Random(4), int(1_000_000 * scale))
+    path = tmp_dir / "module.py"
+    path.write_text(module, encoding="utf-8")
+    return (lambda: convert_python_comments_only(path, check=True)), len(module) / 1e6, "MB/s"
+
+
+@benchmark("process_paths")
+def bench_process_paths(scale: float, tmp_dir: Path) -> Workload:
+    rng = random.Random(5)
+    root = tmp_dir / "tree"
+    count = max(1, int(2_000 * scale))
+    for i in range(count):
+        directory = root / f"package_{i % 20}" / f"module_{i % 7}"
+        directory.mkdir(parents=True, exist_ok=True)
+        if i % 3 == 0:
+            (directory / f"file_{i}.md").write_text(make_markdown(rng, 2_000), encoding="utf-8")
+        else:
+            (directory / f"file_{i}.py").write_text(make_module(rng, 2_000), encoding="utf-8")
+    return (lambda: process_paths([root], check=True)), count, "files/s"
+
+
+@benchmark("stdin_pipe")
+def bench_stdin_pipe(scale: float, tmp_dir: Path) -> Workload:
+    path = tmp_dir / "corpus.txt"
+    path.write_text(make_prose(random.Random(7), int(10_000_000 * scale)), encoding="utf-8")
+    command = [sys.executable, "-c", "import sys; from uwotm8.convert import main; sys.exit(main())"]
+
+    def pipe() -> None:
+        with open(path, "rb") as stdin:
+            subprocess.run(command, stdin=stdin, stdout=subprocess.DEVNULL, check=True)  # noqa: S603
+
+    return pipe, path.stat().st_size / 1e6, "MB/s"
+
+
+@benchmark("startup")
+def bench_startup(scale: float, tmp_dir: Path) -> Workload:
+    return _startup_workload(scale, tmp_dir, "A short note with no American spellings.\n", 0)
+
+
+@benchmark("startup_dirty")
+def bench_startup_dirty(scale: float, tmp_dir: Path) -> Workload:
+    # A file that needs changes, as in a pre-commit hook that fails, has its words found and not just detected
+    return _startup_workload(scale, tmp_dir, "A short note about my favorite color.\n", 1)
+
+
+def _startup_workload(scale: float, tmp_dir: Path, text: str, returncode: int) -> Workload:
+    """Time `uwotm8 --check` on a short file in a new process, which is expected to exit with returncode."""
+    path = tmp_dir / "notes.md"
+    path.write_text(text, encoding="utf-8")
+    command = [sys.executable, "-m", "uwotm8", "--check", "--no-cache", "--no-daemon", str(path)]
+    # A private cache directory, although with --no-cache neither files nor spelling tables are saved in it
+    env = {**os.environ, "XDG_CACHE_HOME": str(tmp_dir / "cache")}
+    runs = max(1, int(20 * scale))
+
+    def check() -> None:
+        result = subprocess.run(command, env=env, stdout=subprocess.DEVNULL, check=False)  # noqa: S603
+        if result.returncode != returncode:
+            raise subprocess.CalledProcessError(result.returncode, command)
+
+    check()
+
+    def start() -> None:
+        for _ in range(runs):
+            check()
+
+    return start, runs, "runs/s"
+
+
+def run_benchmark(name: str, scale: float, repeat: int) -> dict[str, Any]:
+    """Run a benchmark several times and return its best throughput."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        func, amount, unit = BENCHMARKS[name](scale, Path(tmp_dir))
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+    return {"throughput": amount / best, "unit": unit, "seconds": best}
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], threshold: float) -> list[str]:
+    """
+    Compare results against a baseline.
+
+    Returns:
+        A description of each benchmark whose throughput fell by more than threshold, as a fraction of the baseline.
+    """
+    regressions = []
+    for name, result in results["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        change = result["throughput"] / previous["throughput"] - 1
+        if change < -threshold:
+            regressions.append(
+                f"{name}: {result['throughput']:.2f} {result['unit']} vs {previous['throughput']:.2f} ({change:+.1%})"
+            )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run uwotm8 throughput benchmarks.")
+    parser.add_argument("names", nargs="*", help=f"Benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply the size of every corpus by this factor")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark; the fastest is reported")
+    parser.add_argument("--output", type=Path, help="Write results as JSON to this file")
+    parser.add_argument("--compare", type=Path, metavar="BASELINE", help="Compare against results saved with --output")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="Fail --compare if throughput falls by more than this fraction"
+    )
+    args = parser.parse_args()
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    results: dict[str, Any] = {
+        "format": FORMAT_VERSION,
+        "uwotm8": uwotm8.__version__,
+        "python": platform.python_version(),
+        "scale": args.scale,
+        "results": {},
+    }
+    for name in args.names or BENCHMARKS:
+        result = run_benchmark(name, args.scale, args.repeat)
+        results["results"][name] = result
+        print(f"{name:<16} {result['throughput']:>14.2f} {result['unit']:<10} ({result['seconds']:.3f}s)")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        if baseline.get("scale") != args.scale:
+            print(f"Warning: baseline was run with --scale {baseline.get('scale')}", file=sys.stderr)
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
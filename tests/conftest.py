@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """Keep the cache, spelling tables and daemon socket of each test out of the user's own directories."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    # The daemon socket is otherwise found in XDG_RUNTIME_DIR, where a real daemon may be listening
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
@@ -0,0 +1,103 @@
+import asyncio
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import uwotm8.aio
+from uwotm8 import Converter, aconvert_file, aconvert_text, aprocess_paths
+
+
+class TestAsyncApi:
+    def test_aconvert_text(self):
+        """Test converting text from an event loop, with and without a semaphore."""
+
+        async def convert() -> list[str]:
+            semaphore = asyncio.Semaphore(2)
+            return await asyncio.gather(
+                aconvert_text("The color"),
+                aconvert_text("The color", converter=Converter().with_ignore(["color"])),
+                *(aconvert_text(f"Flavor {i}", semaphore=semaphore) for i in range(5)),
+            )
+
+        assert asyncio.run(convert()) == ["The colour", "The color", *(f"Flavour {i}" for i in range(5))]
+
+    def test_aconvert_file(self, tmp_path):
+        """Test converting and checking files from an event loop."""
+        src = tmp_path / "doc.txt"
+        src.write_text("The color")
+        dst = tmp_path / "out" / "doc.txt"
+
+        assert asyncio.run(aconvert_file(src, check=True)) is True
+        assert asyncio.run(aconvert_file(src, dst)) is True
+        assert src.read_text() == "The color"
+        assert dst.read_text() == "The colour"
+        assert asyncio.run(aconvert_file(dst)) is False
+
+        with pytest.raises(FileNotFoundError):
+            asyncio.run(aconvert_file(tmp_path / "missing.txt"))
+
+    def test_aconvert_file_comments_only(self, tmp_path):
+        """Test that comments-only conversion leaves code unchanged and skips invalid Python."""
+        src = tmp_path / "module.py"
+        src.write_text('color = "color"  # The color\n')
+        assert asyncio.run(aconvert_file(src, check=True, comments_only=True)) is True
+        assert asyncio.run(aconvert_file(src, comments_only=True)) is True
+        assert src.read_text() == 'color = "color"  # The colour\n'
+
+        src.write_text('# A color\nx = """unterminated color\n')
+        assert asyncio.run(aconvert_file(src, comments_only=True)) is False
+
+    def test_aprocess_paths_in_process_pool(self, tmp_path):
+        """Test processing a tree with conversion offloaded to worker processes."""
+        for i in range(6):
+            (tmp_path / f"file{i}.txt").write_text("This text has color." if i % 2 else "This text has colour.")
+        (tmp_path / "module.py").write_text('x = "color"  # color\n')
+
+        async def process(**kwargs) -> tuple[int, int]:
+            with ProcessPoolExecutor(max_workers=2) as executor:
+                return await aprocess_paths([tmp_path], executor=executor, semaphore=asyncio.Semaphore(3), **kwargs)
+
+        assert asyncio.run(process(check=True, comments_only=True)) == (7, 4)
+        assert asyncio.run(process(comments_only=True)) == (7, 4)
+        assert (tmp_path / "module.py").read_text() == 'x = "color"  # colour\n'
+        assert asyncio.run(process(check=True)) == (7, 1)
+
+    def test_aprocess_paths_sniffs_within_semaphore(self, tmp_path, monkeypatch):
+        """Test that files are only opened to be sniffed while the semaphore is held."""
+        for i in range(4):
+            (tmp_path / f"file{i}.txt").write_text("This text has color.")
+        sniff = uwotm8.aio._sniff_file
+        held = []
+
+        async def process() -> tuple[int, int]:
+            semaphore = asyncio.Semaphore(1)
+
+            def sniff_file(path, max_file_size):
+                held.append(semaphore.locked())
+                return sniff(path, max_file_size)
+
+            monkeypatch.setattr(uwotm8.aio, "_sniff_file", sniff_file)
+            return await aprocess_paths([tmp_path], check=True, semaphore=semaphore)
+
+        assert asyncio.run(process()) == (4, 4)
+        assert held == [True] * 4
+
+    def test_aprocess_paths_skips_invalid_utf8_after_sniff(self, tmp_path):
+        """Test that a file that stops being UTF-8 after its sniffed start is skipped."""
+        (tmp_path / "text.txt").write_text("This text has color.")
+        (tmp_path / "late.txt").write_bytes(b"The color\n" * 1000 + b"The colo\xe9r\n")
+        skipped = []
+
+        result = asyncio.run(
+            aprocess_paths([tmp_path], on_skip=lambda path, reason: skipped.append((path.name, reason)))
+        )
+        assert result == (1, 1)
+        assert skipped == [("late.txt", "not UTF-8")]
+
+    def test_converter_pickles_by_ignore_list(self):
+        """Test that a converter is rebuilt from its ignore list when unpickled, e.g. in a worker process."""
+        converter = Converter().with_ignore(["color"])
+        copy = pickle.loads(pickle.dumps(converter))  # noqa: S301
+        assert copy.ignore == converter.ignore
+        assert copy.convert("color and flavor") == "color and flavour"
@@ -0,0 +1,43 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+RUNNER = Path(__file__).parent.parent / "benchmarks" / "run.py"
+
+
+def run_benchmarks(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(  # noqa: S603
+        [sys.executable, str(RUNNER), "--scale", "0.01", "--repeat", "1", *args],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+
+def test_output_and_compare(tmp_path):
+    """Test that results are written as JSON and that a comparison fails on a regression."""
+    output = tmp_path / "results.json"
+    result = run_benchmarks("short_strings", "long_prose", "--output", str(output))
+    assert result.returncode == 0, result.stderr
+
+    results = json.loads(output.read_text())
+    assert set(results["results"]) == {"short_strings", "long_prose"}
+    assert results["results"]["long_prose"]["unit"] == "MB/s"
+    assert results["results"]["long_prose"]["throughput"] > 0
+
+    result = run_benchmarks("long_prose", "--compare", str(output), "--threshold", "100")
+    assert result.returncode == 0, result.stderr
+
+    results["results"]["long_prose"]["throughput"] *= 1000
+    output.write_text(json.dumps(results))
+    result = run_benchmarks("long_prose", "--compare", str(output))
+    assert result.returncode == 1
+    assert "Regression: long_prose" in result.stderr
+
+
+def test_unknown_benchmark():
+    """Test that unknown benchmark names are rejected."""
+    result = run_benchmarks("nonexistent")
+    assert result.returncode == 2
+    assert "unknown benchmarks: nonexistent" in result.stderr
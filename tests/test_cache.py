@@ -0,0 +1,115 @@
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+from uwotm8 import cache as cache_module
+from uwotm8.cache import ConversionCache
+from uwotm8.convert import Converter, convert_file, main, process_paths
+
+SETTINGS = {"ignore": ["program"]}
+
+
+def _age(path: str) -> None:
+    """Move a file's modification time out of the racy window."""
+    os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+
+
+class TestConversionCache:
+    def test_clean_file_is_skipped_without_reading(self):
+        """Test that a file recorded as clean is not read again while its stat is unchanged."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            src_path = os.path.join(temp_dir, "clean.txt")
+            with open(src_path, "w") as f:
+                f.write("This text has colour.")
+            _age(src_path)
+
+            cache = ConversionCache(temp_dir, SETTINGS)
+            assert convert_file(src_path, check=True, cache=cache) is False
+            cache.save()
+
+            cache = ConversionCache(temp_dir, SETTINGS)
+            with patch("builtins.open", side_effect=AssertionError("file should not be read")):
+                assert convert_file(src_path, check=True, cache=cache) is False
+
+    def test_changed_file_is_rechecked(self):
+        """Test that a file changed since it was cached is converted again."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            src_path = os.path.join(temp_dir, "file.txt")
+            with open(src_path, "w") as f:
+                f.write("This text has colour.")
+            _age(src_path)
+
+            cache = ConversionCache(temp_dir, SETTINGS)
+            assert convert_file(src_path, check=True, cache=cache) is False
+
+            with open(src_path, "w") as f:
+                f.write("This text has color.")
+            assert convert_file(src_path, check=True, cache=cache) is True
+
+    def test_touched_file_is_matched_by_content(self):
+        """Test that a file whose mtime changed but content did not is skipped by digest."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            src_path = os.path.join(temp_dir, "file.txt")
+            with open(src_path, "w") as f:
+                f.write("This text has colour.")
+
+            cache = ConversionCache(temp_dir, SETTINGS)
+            assert convert_file(src_path, check=True, cache=cache) is False
+            os.utime(src_path, ns=(2_000_000_000, 2_000_000_000))
+
+            answers = []
+            is_clean_content = cache.is_clean_content
+
+            def record_answer(path, content):
+                answers.append(is_clean_content(path, content))
+                return answers[-1]
+
+            with (
+                patch.object(cache, "is_clean_content", side_effect=record_answer),
+                patch.object(Converter, "needs_conversion") as needs_conversion,
+            ):
+                assert convert_file(src_path, check=True, cache=cache) is False
+            # The stat no longer matches, so the digest of the content is what found the file clean
+            assert answers == [True]
+            needs_conversion.assert_not_called()
+
+    def test_settings_change_invalidates_cache(self):
+        """Test that different settings use a separate cache file."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            assert ConversionCache(temp_dir, SETTINGS).path != ConversionCache(temp_dir, {"ignore": []}).path
+
+    def test_process_paths_with_cache(self):
+        """Test that process_paths records clean files and still reports dirty ones."""
+        with tempfile.TemporaryDirectory() as temp_dir, tempfile.TemporaryDirectory() as cache_dir:
+            clean_path = os.path.join(temp_dir, "clean.txt")
+            dirty_path = os.path.join(temp_dir, "dirty.txt")
+            with open(clean_path, "w") as f:
+                f.write("This text has colour.")
+            with open(dirty_path, "w") as f:
+                f.write("This text has color.")
+
+            for jobs in (1, 2, 1):
+                assert process_paths([temp_dir], check=True, jobs=jobs, cache_dir=cache_dir) == (2, 1)
+
+            (cache_file,) = os.listdir(cache_dir)
+            with open(os.path.join(cache_dir, cache_file)) as f:
+                entries = json.load(f)
+            assert os.path.abspath(clean_path) in entries
+            assert os.path.abspath(dirty_path) not in entries
+
+    def test_unwritable_cache_dir_is_reported_once(self, tmp_path, monkeypatch, capsys):
+        """Test that a cache that cannot be saved gives a warning rather than an error, and keeps the exit code."""
+        monkeypatch.setattr(cache_module, "_save_failure_reported", False)
+        cache_home = tmp_path / "not-a-directory"
+        cache_home.write_text("")
+        monkeypatch.setenv("XDG_CACHE_HOME", str(cache_home))
+        tree = tmp_path / "tree"
+        tree.mkdir()
+        (tree / "clean.txt").write_text("This text has colour.")
+        (tree / "dirty.txt").write_text("This text has color.")
+
+        assert main(["--check", "--no-daemon", str(tree)]) == 1
+        assert main(["--check", "--no-daemon", str(tree)]) == 1
+        assert capsys.readouterr().err.count("Warning: could not save the cache") == 1
+        assert cache_home.read_text() == ""
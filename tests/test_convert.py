@@ -1,18 +1,31 @@
+import json
 import os
+import shutil
+import subprocess
 import sys
 import tempfile
-from io import StringIO
+import tokenize
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, StringIO, TextIOWrapper
+from pathlib import Path
 from unittest.mock import patch
 from urllib.parse import urlparse
 
 import pytest
 
+from uwotm8 import stats
 from uwotm8.convert import (
     CONVERSION_IGNORE_LIST,
+    Converter,
+    GitError,
+    Hit,
     convert_american_to_british_spelling,
     convert_file,
+    convert_many,
     convert_python_comments_only,
     convert_stream,
+    diff_file,
+    find_file_hits,
     main,
     process_paths,
 )
@@ -91,6 +104,16 @@ class TestConvertAmericanToBritishSpelling:
         assert convert_american_to_british_spelling(text1) == "The colour is blue."
         assert "www.color.com" in convert_american_to_british_spelling(text2)
 
+    def test_url_context_is_line_scoped(self):
+        """Test that a URL only protects words on its own line."""
+        text = "The color is blue.\nSee https://example.com/color for color.\nThe flavor is sweet."
+        expected = "The colour is blue.\nSee https://example.com/color for color.\nThe flavour is sweet."
+        assert convert_american_to_british_spelling(text) == expected
+
+        # Many URL lines in a long document are indexed once rather than rescanned per word
+        text = "color www.example.com\n" * 1000 + "The color"
+        assert convert_american_to_british_spelling(text) == "color www.example.com\n" * 1000 + "The colour"
+
     def test_strict_mode(self):
         """Test strict mode behavior with mocked American spelling existence."""
         # This is a simplified test that doesn't actually test the strict mode behavior
@@ -133,6 +156,142 @@ Line 2 with flavour.
 Line 3 with behaviour."""
         assert convert_american_to_british_spelling(text) == expected
 
+    def test_word_boundaries(self):
+        """Test that only whole ASCII-letter words are matched."""
+        assert convert_american_to_british_spelling("3color and color2") == "3colour and colour2"
+        assert convert_american_to_british_spelling("colorful colors") == "colourful colours"
+        assert convert_american_to_british_spelling("discolor_color") == "discolour_colour"
+        assert convert_american_to_british_spelling("CoLoR") == "colour"
+
+    def test_ignore_list_changes_are_respected(self):
+        """Test that words added to the ignore list are skipped on subsequent calls."""
+        assert convert_american_to_british_spelling("color") == "colour"
+        CONVERSION_IGNORE_LIST["color"] = "color"
+        try:
+            assert convert_american_to_british_spelling("color") == "color"
+        finally:
+            del CONVERSION_IGNORE_LIST["color"]
+
+
+class TestConverter:
+    def test_default_ignore_list(self):
+        """Test that a converter ignores the default ignore list."""
+        converter = Converter()
+        assert converter.convert("The program has color.") == "The program has colour."
+
+    def test_custom_ignore_list(self):
+        """Test that a converter only ignores the words it was built with."""
+        converter = Converter(["Color"])
+        assert converter.convert("The program has color and flavor.") == "The programme has color and flavour."
+
+    def test_pattern_compiled_only_for_enough_text(self):
+        """Test that short texts are searched word by word, with the same result as the compiled pattern."""
+        text = "The Color of the center, COLOR-blind and colored, a color's x-color\nwww.color.com color\nmy favorite color"
+        converter = Converter()
+        converted = converter.convert(text)
+        assert converted.startswith("The Colour of the centre, COLOUR-blind and coloured")
+        assert "pattern" not in converter._engine.__dict__
+
+        with patch("uwotm8.convert._COMPILE_AFTER", 0):
+            compiled = Converter()
+            assert compiled.convert(text) == converted
+        assert "pattern" in compiled._engine.__dict__
+
+    def test_with_ignore_returns_new_converter(self):
+        """Test that with_ignore leaves the original converter unchanged."""
+        converter = Converter()
+        extended = converter.with_ignore(["color"])
+        assert extended.convert("color") == "color"
+        assert converter.convert("color") == "colour"
+        assert "color" not in CONVERSION_IGNORE_LIST
+
+    def test_per_call_ignore(self):
+        """Test that extra ignored words only apply to a single call."""
+        converter = Converter()
+        assert converter.convert("color and flavor", ignore={"color"}) == "color and flavour"
+        assert converter.convert("color and flavor") == "colour and flavour"
+
+    def test_convert_chunks(self):
+        """Test that converting text in arbitrary pieces matches converting it whole."""
+        converter = Converter()
+        text = "color www.example.com\n\n123\ncolor and flavor\nx-color `color` color"
+        for size in (1, 2, 5, 13, len(text)):
+            chunks = [text[i : i + size] for i in range(0, len(text), size)]
+            assert "".join(converter.convert_chunks(chunks)) == converter.convert(text)
+
+    def test_convert_chunks_of_one_long_line(self):
+        """Test that a line spanning many pieces converts as it would whole, however it ends."""
+        converter = Converter()
+        line = "x-color `color` www.example.com color and flavor " * 50
+        for text in (line, line + "\n" + line, "\n" + line + "\n"):
+            chunks = [text[i : i + 7] for i in range(0, len(text), 7)]
+            assert "".join(converter.convert_chunks(chunks)) == converter.convert(text)
+
+    def test_clean_text_returned_unchanged(self):
+        """Test that text with no candidate words is returned as the same object."""
+        converter = Converter()
+        text = "The colour of the centre is grey.\n" * 100
+        assert converter.convert(text) is text
+        assert converter.convert("colors") == "colours"
+
+    def test_non_ascii_word_boundaries(self):
+        """Test that non-ASCII characters separate words, as they are not ASCII letters."""
+        converter = Converter()
+        assert converter.convert("naïve color") == "naïve colour"
+        assert converter.convert("coloré") == "colouré"
+        assert converter.convert("\u212acolor") == "\u212acolour"
+
+    def test_needs_conversion(self):
+        """Test that checking for changes agrees with converting."""
+        converter = Converter()
+        texts = ["", "A summary", "The color", "www.example.com/color", "x-color", "`color`", "Color\nat the center"]
+        for text in texts:
+            assert converter.needs_conversion(text) == (converter.convert(text) != text)
+        assert not converter.needs_conversion("The color", ignore={"color"})
+        assert converter.chunks_need_conversion(["The co", "lor\n", "www.x"])
+        assert not converter.chunks_need_conversion(["The color www.", "x.com\n"])
+
+    def test_find_hits(self):
+        """Test that hits give the position and spellings of each word that would change."""
+        converter = Converter()
+        hits = converter.find_hits("The Color\nat the center\nwww.x color\nsee  the flavor and x-color")
+        assert hits == [Hit(1, 5, "Color", "Colour"), Hit(2, 8, "center", "centre"), Hit(4, 10, "flavor", "flavour")]
+        assert converter.find_hits("A summary") == []
+        assert converter.find_hits("The color", ignore={"color"}) == []
+
+    def test_convert_many(self):
+        """Test that converting many texts matches converting each one separately."""
+        converter = Converter()
+        texts = [
+            "",
+            "A summary",
+            "The color",
+            "color www.example.com",
+            "x-color",
+            "`color` and flavor",
+            "\n\n",
+            "Color\nat the center",
+        ]
+        expected = [converter.convert(text) for text in texts]
+        assert converter.convert_many(texts) == expected
+        assert list(converter.iter_convert_many(texts, batch_size=3)) == expected
+        assert converter.convert_many(texts, ignore={"color"})[2] == "The color"
+        assert convert_many(texts) == expected
+
+    def test_shared_between_threads(self):
+        """Test that one converter gives consistent results when used from many threads."""
+        converter = Converter()
+
+        def convert(i: int) -> str:
+            ignore = {"color"} if i % 2 else set()
+            return converter.convert("color and flavor", ignore=ignore)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(convert, range(200)))
+
+        for i, result in enumerate(results):
+            assert result == ("color and flavour" if i % 2 else "colour and flavour")
+
 
 class TestConvertStream:
     def test_stream_conversion(self):
@@ -243,6 +402,142 @@ class TestConvertFile:
             with open(dst_path) as f:
                 assert f.read() == "This text has colour."
 
+    def test_streaming_large_file(self):
+        """Test that large files are converted in chunks with the same result as in memory."""
+        text = "The color is gray.\nSee https://example.com/color for color.\n`color` and 3-color\n" * 50 + "flavor"
+        expected = convert_american_to_british_spelling(text)
+
+        with (
+            tempfile.TemporaryDirectory() as temp_dir,
+            patch("uwotm8.convert._STREAMING_THRESHOLD", 0),
+            patch("uwotm8.convert._STREAM_CHUNK_SIZE", 7),
+        ):
+            src_path = os.path.join(temp_dir, "large.txt")
+            with open(src_path, "w") as f:
+                f.write(text)
+            os.chmod(src_path, 0o640)
+
+            assert convert_file(src_path, check=True) is True
+            with open(src_path) as f:
+                assert f.read() == text
+
+            assert convert_file(src_path) is True
+            with open(src_path) as f:
+                assert f.read() == expected
+            assert os.stat(src_path).st_mode & 0o777 == 0o640
+
+            # An unchanged file is left in place and no temporary files remain
+            inode = os.stat(src_path).st_ino
+            assert convert_file(src_path) is False
+            assert os.stat(src_path).st_ino == inode
+            assert os.listdir(temp_dir) == ["large.txt"]
+
+    def test_parallel_large_file(self):
+        """Test that a large file split across worker processes converts as it would whole."""
+        text = "The color is gray.\nSee https://example.com/color\ncolor and `\ncolor` and 3-\ncolor\n" * 40 + "flavor"
+        expected = convert_american_to_british_spelling(text)
+
+        with (
+            tempfile.TemporaryDirectory() as temp_dir,
+            patch("uwotm8.convert._STREAMING_THRESHOLD", 0),
+            patch("uwotm8.convert._STREAM_CHUNK_SIZE", 50),
+            patch("uwotm8.convert._PARALLEL_CHECK_SIZE", 50),
+        ):
+            src_path = os.path.join(temp_dir, "large.txt")
+            with open(src_path, "w") as f:
+                f.write(expected)
+            assert convert_file(src_path, check=True, jobs=2) is False
+            assert convert_file(src_path, jobs=2) is False
+
+            with open(src_path, "w") as f:
+                f.write(text)
+            assert convert_file(src_path, check=True, jobs=2) is True
+            assert convert_file(src_path, jobs=2) is True
+            with open(src_path) as f:
+                assert f.read() == expected
+
+    def test_large_file_serial_with_one_job(self):
+        """Test that jobs=1 converts a large file without starting a pool of worker processes."""
+        with (
+            tempfile.TemporaryDirectory() as temp_dir,
+            patch("uwotm8.convert._STREAMING_THRESHOLD", 0),
+            patch("uwotm8.convert._STREAM_CHUNK_SIZE", 50),
+            patch("os.cpu_count", return_value=4),
+            patch("concurrent.futures.ProcessPoolExecutor", side_effect=AssertionError("pool started")),
+        ):
+            src_path = os.path.join(temp_dir, "large.txt")
+            with open(src_path, "w") as f:
+                f.write("The color is gray.\n" * 40)
+            assert convert_file(src_path, check=True, jobs=1) is True
+            assert process_paths([src_path], check=True, jobs=1) == (1, 1)
+            assert process_paths([src_path], jobs=1) == (1, 1)
+            with open(src_path) as f:
+                assert f.read() == "The colour is gray.\n" * 40
+
+    def test_check_large_file_mapped(self):
+        """Test that checking a large file without decoding it agrees with converting it."""
+        texts = {
+            "clean.txt": "The colour is grey.\r\nSee https://example.com/color for color.\r\n`color` and 3-color\n",
+            "url.txt": "www.example.com\rcolor and café",
+            "hyphen.txt": "x-\u00a0color",
+            "dirty.txt": "The colour is grey.\r\n" * 20 + "naïve color",
+        }
+        with (
+            tempfile.TemporaryDirectory() as temp_dir,
+            patch("uwotm8.convert._STREAMING_THRESHOLD", 0),
+            patch("uwotm8.convert._CHECK_WINDOW", 5),
+        ):
+            for name, text in texts.items():
+                src_path = os.path.join(temp_dir, name)
+                with open(src_path, "w", newline="") as f:
+                    f.write(text)
+
+                assert convert_file(src_path, check=True) is (name == "dirty.txt")
+                assert convert_file(src_path) is (name == "dirty.txt")
+
+    def test_diff_file(self):
+        """Test that the diff covers only the changed lines, with context around them."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            src_path = os.path.join(temp_dir, "notes.md")
+            lines = [f"Line {number}" for number in range(1, 13)]
+            lines[1] = "The color and flavor"
+            lines[10] = "At the center"
+            with open(src_path, "w") as f:
+                f.write("\n".join(lines))
+
+            diff = diff_file(src_path, context=1)
+            assert diff == (
+                f"--- {src_path}\n+++ {src_path}\n"
+                "@@ -1,3 +1,3 @@\n Line 1\n-The color and flavor\n+The colour and flavour\n Line 3\n"
+                "@@ -10,3 +10,3 @@\n Line 10\n-At the center\n+At the centre\n Line 12\n"
+                "\\ No newline at end of file\n"
+            )
+            assert find_file_hits(src_path) == [
+                Hit(2, 5, "color", "colour"),
+                Hit(2, 15, "flavor", "flavour"),
+                Hit(11, 8, "center", "centre"),
+            ]
+            # Nothing is written
+            with open(src_path) as f:
+                assert f.read() == "\n".join(lines)
+
+            with open(src_path, "w") as f:
+                f.write("A summary\n")
+            assert diff_file(src_path) == ""
+
+    def test_find_file_hits_comments_only(self):
+        """Test that only comments and docstrings are searched in comments-only mode."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            src_path = os.path.join(temp_dir, "module.py")
+            with open(src_path, "w") as f:
+                f.write('def color(value):\n    """Set the color."""\n    return value  # a flavor\n')
+
+            assert find_file_hits(src_path, comments_only=True) == [
+                Hit(2, 16, "color", "colour"),
+                Hit(3, 23, "flavor", "flavour"),
+            ]
+            assert len(find_file_hits(src_path)) == 3
+
 
 class TestConvertPythonCommentsOnly:
     def test_comments_only_conversion(self):
@@ -377,6 +672,53 @@ def function():
         finally:
             os.unlink(temp_path)
 
+    def test_only_real_comments_and_docstrings(self):
+        """Test that hashes and triple quotes inside code are not treated as comments or docstrings."""
+        with tempfile.NamedTemporaryFile(mode="w+", suffix=".py", delete=False) as temp_file:
+            temp_path = temp_file.name
+            temp_file.write("""class Palette:
+    '''A palette of color.'''
+
+    hex_color = "#color"  # The default color
+    query = \"\"\"SELECT color FROM favorites\"\"\"
+    raw = b\"\"\"color\"\"\"
+
+    def paint(self):
+        "Paint in color."
+        return f\"\"\"{self.hex_color} color\"\"\"
+""")
+
+        try:
+            assert convert_python_comments_only(temp_path, check=True) is True
+            assert convert_python_comments_only(temp_path) is True
+            assert convert_python_comments_only(temp_path, check=True) is False
+
+            with open(temp_path) as f:
+                content = f.read()
+
+            assert "'''A palette of colour.'''" in content
+            assert 'hex_color = "#color"  # The default colour' in content
+            assert 'query = """SELECT color FROM favorites"""' in content
+            assert 'raw = b"""color"""' in content
+            assert '"Paint in colour."' in content
+            assert 'return f"""{self.hex_color} color"""' in content
+        finally:
+            os.unlink(temp_path)
+
+    def test_untokenizable_file_is_left_unchanged(self):
+        """Test that a file which is not valid Python is not modified."""
+        with tempfile.NamedTemporaryFile(mode="w+", suffix=".py", delete=False) as temp_file:
+            temp_path = temp_file.name
+            temp_file.write('# A comment with color\nx = """unterminated color\n')
+
+        try:
+            assert convert_python_comments_only(temp_path) is False
+            assert convert_python_comments_only(temp_path, check=True) is False
+            with pytest.raises(tokenize.TokenError):
+                convert_python_comments_only(temp_path, strict=True)
+        finally:
+            os.unlink(temp_path)
+
 
 class TestProcessPaths:
     def test_process_single_file(self):
@@ -517,6 +859,329 @@ variable = "String with color"
                 if os.path.exists(file3_path):
                     os.unlink(file3_path)
 
+    def test_parallel_jobs(self):
+        """Test that processing with multiple jobs gives the same result as serial processing."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for i in range(10):
+                with open(os.path.join(temp_dir, f"file{i}.txt"), "w") as f:
+                    f.write("This text has color." if i % 2 else "This text has colour.")
+
+            assert process_paths([temp_dir], check=True, jobs=3) == (10, 5)
+            assert process_paths([temp_dir], jobs=3) == (10, 5)
+
+            for i in range(10):
+                with open(os.path.join(temp_dir, f"file{i}.txt")) as f:
+                    assert f.read() == "This text has colour."
+
+    def test_fail_fast(self):
+        """Test that processing stops at the first file that would change."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for i in range(10):
+                with open(os.path.join(temp_dir, f"file{i}.txt"), "w") as f:
+                    f.write("This text has color." if i in (3, 7) else "This text has colour.")
+
+            assert process_paths([temp_dir], check=True, fail_fast=True) == (4, 1)
+            total, modified = process_paths([temp_dir], check=True, jobs=2, fail_fast=True)
+            # A file already being checked by the other worker is still counted
+            assert modified in (1, 2)
+            assert total >= 4
+            assert process_paths([temp_dir], check=True) == (10, 2)
+
+    def test_fail_fast_counts_started_files(self):
+        """Test that a parallel fail-fast run counts every file a worker rewrote before it stopped."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for i in range(40):
+                with open(os.path.join(temp_dir, f"file{i:02}.txt"), "w") as f:
+                    f.write("This text has color.")
+
+            total, modified = process_paths([temp_dir], jobs=4, fail_fast=True)
+            rewritten = 0
+            for i in range(40):
+                with open(os.path.join(temp_dir, f"file{i:02}.txt")) as f:
+                    rewritten += f.read() == "This text has colour."
+            assert total == modified == rewritten
+            assert rewritten < 40
+
+    def test_parallel_jobs_respect_ignore_list(self):
+        """Test that words added to the ignore list are honoured by worker processes."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for i in range(4):
+                with open(os.path.join(temp_dir, f"file{i}.txt"), "w") as f:
+                    f.write("This text has color.")
+
+            CONVERSION_IGNORE_LIST["color"] = "color"
+            try:
+                assert process_paths([temp_dir], check=True, jobs=2) == (4, 0)
+            finally:
+                del CONVERSION_IGNORE_LIST["color"]
+
+    def test_include_and_exclude(self):
+        """Test that include and exclude patterns select the files found in directories."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for relative in [
+                "keep.md",
+                "keep.rst",
+                "skip.txt",
+                "notes.min.md",
+                "vendor/lib.md",
+                "docs/generated/api.md",
+                "docs/guide.md",
+            ]:
+                path = os.path.join(temp_dir, relative)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w") as f:
+                    f.write("This text has color.")
+
+            total, modified = process_paths(
+                [temp_dir],
+                check=True,
+                include=[".md", "*.rst"],
+                exclude=["vendor", "*.min.md", os.path.join(temp_dir, "docs/generated/")],
+            )
+            assert (total, modified) == (3, 3)
+
+    def test_exclude_path_relative_to_root(self, monkeypatch):
+        """Test that slash exclude patterns match however the walked root is written."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for relative in ["docs/gen/api.md", "docs/guide.md", "readme.md"]:
+                path = os.path.join(temp_dir, relative)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w") as f:
+                    f.write("This text has color.")
+
+            assert os.path.isabs(temp_dir)
+            assert process_paths([temp_dir], check=True, exclude=["docs/gen"]) == (2, 2)
+            monkeypatch.chdir(temp_dir)
+            assert process_paths(["."], check=True, exclude=["docs/gen"]) == (2, 2)
+            assert process_paths(["docs"], check=True, exclude=["gen/"]) == (1, 1)
+
+    def test_default_exclude(self):
+        """Test that version control and dependency directories are not walked by default."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for relative in ["readme.md", ".git/notes.md", "node_modules/pkg/readme.md", ".venv/lib/readme.md"]:
+                path = os.path.join(temp_dir, relative)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w") as f:
+                    f.write("This text has color.")
+
+            assert process_paths([temp_dir], check=True) == (1, 1)
+            assert process_paths([temp_dir], check=True, exclude=[]) == (4, 4)
+
+    def test_respect_gitignore(self):
+        """Test that files ignored by git are skipped when requested."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            subprocess.run(["git", "init", "-q", temp_dir], check=True)  # noqa: S603, S607
+            with open(os.path.join(temp_dir, ".gitignore"), "w") as f:
+                f.write("build/\n*.log.md\n")
+            for relative in ["readme.md", "build/out.md", "debug.log.md", "docs/guide.md"]:
+                path = os.path.join(temp_dir, relative)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w") as f:
+                    f.write("This text has color.")
+
+            assert process_paths([temp_dir], check=True, respect_gitignore=True) == (2, 2)
+            assert process_paths([temp_dir], check=True) == (4, 4)
+
+    def test_changed_since_and_staged(self):
+        """Test that only files git reports as changed are processed."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+
+            def git(*args):
+                subprocess.run(  # noqa: S603
+                    ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],  # noqa: S607
+                    cwd=temp_dir,
+                    check=True,
+                    capture_output=True,
+                )
+
+            def write(relative, text="This text has color."):
+                path = os.path.join(temp_dir, relative)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w") as f:
+                    f.write(text)
+                return path
+
+            git("init", "-q")
+            for relative in ["committed.md", "modified.md", "staged.md", "docs/deleted.md", "notes.txt"]:
+                write(relative)
+            git("add", ".")
+            git("commit", "-q", "-m", "initial")
+
+            write("modified.md", "This text has color and flavor.")
+            staged = write("staged.md", "This text has color and flavor.")
+            write("untracked.md")
+            write("build/ignored.md")
+            with open(os.path.join(temp_dir, ".gitignore"), "w") as f:
+                f.write("build/\n")
+            git("add", "staged.md", ".gitignore")
+            os.remove(os.path.join(temp_dir, "docs", "deleted.md"))
+
+            # modified.md, staged.md and untracked.md; .gitignore isn't included and build/ is ignored
+            assert process_paths([temp_dir], check=True, changed_since="HEAD") == (3, 3)
+            assert process_paths([temp_dir], check=True, changed_since="HEAD", include=[".txt"]) == (0, 0)
+            assert process_paths([temp_dir], check=True, changed_since="HEAD", exclude=["untracked.md"]) == (2, 2)
+            assert process_paths([temp_dir], check=True, staged=True) == (1, 1)
+            assert process_paths([os.path.join(temp_dir, "docs")], check=True, changed_since="HEAD") == (0, 0)
+
+            # Files given explicitly are still only processed if they changed
+            committed = os.path.join(temp_dir, "committed.md")
+            assert process_paths([committed, staged], check=True, staged=True) == (1, 1)
+
+            with pytest.raises(GitError, match=r"bad revision|unknown revision"):
+                process_paths([temp_dir], check=True, changed_since="no-such-branch")
+            with pytest.raises(GitError, match="invalid revision"):
+                process_paths([temp_dir], check=True, changed_since="--output=x")
+
+        with tempfile.TemporaryDirectory() as temp_dir, pytest.raises(GitError):
+            process_paths([temp_dir], check=True, staged=True)
+
+    def test_shard(self, capsys, monkeypatch):
+        """Test that shards split the files between them by relative path, and that their summaries merge."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for index in range(30):
+                os.makedirs(os.path.join(temp_dir, f"dir_{index % 4}"), exist_ok=True)
+                with open(os.path.join(temp_dir, f"dir_{index % 4}", f"file_{index}.md"), "w") as f:
+                    f.write("This text has color.\n" if index % 3 == 0 else "This text is fine.\n")
+
+            counts = [process_paths([temp_dir], check=True, shard=(index, 3)) for index in range(1, 4)]
+            assert sum(total for total, _ in counts) == 30
+            assert sum(modified for _, modified in counts) == 10
+            assert all(total > 0 for total, _ in counts)
+            # Shards don't depend on where the tree is
+            monkeypatch.chdir(temp_dir)
+            assert process_paths(["."], check=True, shard=(2, 3)) == counts[1]
+            with pytest.raises(ValueError, match="shard index"):
+                process_paths([temp_dir], shard=(4, 3))
+
+            summaries = [os.path.join(temp_dir, f"shard_{index}.json") for index in range(1, 4)]
+            for index, summary in enumerate(summaries, 1):
+                args = ["--check", "--no-cache", "--shard", f"{index}/3", "--summary-json", summary, temp_dir]
+                assert main(args) == (1 if counts[index - 1][1] else 0)
+            capsys.readouterr()
+
+            assert main(["--merge-summaries", *summaries]) == 1
+            assert capsys.readouterr().out == "Would reformat 10 of 30 files\n"
+            assert main(["--merge-summaries", *summaries[:2]]) == 2
+            assert capsys.readouterr().out == "Error: missing shards 3 of 3\n"
+
+            # A shard whose summary was never uploaded, or was cut short
+            missing = os.path.join(temp_dir, "missing.json")
+            assert main(["--merge-summaries", *summaries[:2], missing]) == 2
+            assert capsys.readouterr().out.startswith(f"Error: cannot merge {missing}: [Errno 2]")
+            for malformed in ("", "{", "{}", "[]", '{"shard": "1/3", "check": true}'):
+                with open(summaries[2], "w") as f:
+                    f.write(malformed)
+                assert main(["--merge-summaries", *summaries]) == 2
+                assert capsys.readouterr().out.startswith(f"Error: cannot merge {summaries[2]}: ")
+
+    def test_skip_binary_and_large_files(self, capsys):
+        """Test that binary, non-UTF-8 and oversized files are skipped and reported without being converted."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            contents = {
+                "text.txt": b"This text has color.\n",
+                "binary.txt": b"color\0\xff\xfe",
+                "latin1.txt": b"The colo\xe9r\n",
+                "large.txt": b"color " * 2000,
+                # A character cut in two by the end of the sniffed bytes is still text
+                "boundary.txt": b"a" * 8191 + "é color\n".encode(),
+            }
+            for name, data in contents.items():
+                with open(os.path.join(temp_dir, name), "wb") as f:
+                    f.write(data)
+
+            skipped = []
+            for jobs in (1, 2):
+                skipped.clear()
+                result = process_paths(
+                    [temp_dir],
+                    check=True,
+                    jobs=jobs,
+                    max_file_size=10000,
+                    on_skip=lambda path, reason: skipped.append((path.name, reason)),
+                )
+                assert result == (2, 2)
+                assert sorted(skipped) == [
+                    ("binary.txt", "binary"),
+                    ("large.txt", "larger than 10000 bytes"),
+                    ("latin1.txt", "not UTF-8"),
+                ]
+
+            assert process_paths([temp_dir]) == (3, 3)
+            with open(os.path.join(temp_dir, "binary.txt"), "rb") as f:
+                assert f.read() == contents["binary.txt"]
+
+            assert main(["--check", "--no-cache", "--no-daemon", "--json", temp_dir]) == 0
+            err = capsys.readouterr().err
+            assert f"Skipped {os.path.join(temp_dir, 'latin1.txt')}: not UTF-8" in err
+            assert err.endswith("0 of 3 files would be reformatted\n")
+            assert main(["--check", "--no-cache", "--no-daemon", "--max-file-size", "10K", temp_dir]) == 0
+            assert "larger than 10240 bytes" in capsys.readouterr().err
+
+    def test_skip_invalid_utf8_after_sniff(self, capsys):
+        """Test that a file whose bytes stop being UTF-8 after the sniffed start is skipped, not an error."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            contents = {
+                "text.txt": b"This text has color.\n",
+                "late.txt": b"The color\n" * 1000 + b"The colo\xe9r\n",
+                "late.md": b"The color\n" * 1000 + b"The colo\xe9r\n",
+            }
+
+            skipped = []
+            for check, jobs, io_threads in ((True, 1, 0), (True, 2, 0), (True, 1, 2), (False, 1, 0), (False, 1, 2)):
+                for name, data in contents.items():
+                    with open(os.path.join(temp_dir, name), "wb") as f:
+                        f.write(data)
+                skipped.clear()
+                result = process_paths(
+                    [temp_dir],
+                    check=check,
+                    jobs=jobs,
+                    io_threads=io_threads,
+                    on_skip=lambda path, reason: skipped.append((path.name, reason)),
+                )
+                assert result == (1, 1)
+                assert sorted(skipped) == [("late.md", "not UTF-8"), ("late.txt", "not UTF-8")]
+                for name in ("late.txt", "late.md"):
+                    with open(os.path.join(temp_dir, name), "rb") as f:
+                        assert f.read() == contents[name]
+
+            assert main(["--check", "--no-cache", "--no-daemon", "--json", temp_dir]) == 0
+            assert f"Skipped {os.path.join(temp_dir, 'late.txt')}: not UTF-8" in capsys.readouterr().err
+
+    def test_io_threads(self):
+        """Test that reading ahead and writing back in threads gives the same results as doing it in turn."""
+        with tempfile.TemporaryDirectory() as temp_dir, tempfile.TemporaryDirectory() as cache_dir:
+            contents = {}
+            for index in range(20):
+                text = "This text has color.\r\n" if index % 3 == 0 else "This text is fine.\n"
+                contents[f"file_{index:02}.md"] = text.encode()
+            contents["binary.txt"] = b"color\0"
+
+            def write_files():
+                for name, data in contents.items():
+                    with open(os.path.join(temp_dir, name), "wb") as f:
+                        f.write(data)
+
+            outputs = []
+            for io_threads in (0, 3):
+                write_files()
+                assert process_paths([temp_dir], check=True, io_threads=io_threads) == (20, 7)
+                assert process_paths([temp_dir], check=True, fail_fast=True, io_threads=io_threads) == (1, 1)
+                with stats.collecting() as collected:
+                    assert process_paths([temp_dir], cache_dir=cache_dir, io_threads=io_threads) == (20, 7)
+                assert collected.counters["files_skipped"] == 1
+                assert collected.counters["bytes_read"] == sum(map(len, contents.values())) - len(b"color\0")
+                outputs.append({name: Path(temp_dir, name).read_bytes() for name in contents})
+
+                # Files found clean by the first run are cache hits in the second
+                with stats.collecting() as collected:
+                    assert process_paths([temp_dir], cache_dir=cache_dir, io_threads=io_threads) == (20, 0)
+                assert collected.counters["cache_hits"] == 13
+                shutil.rmtree(cache_dir)
+
+            assert outputs[0] == outputs[1]
+            assert outputs[1]["file_00.md"] == b"This text has colour.\n"
+
 
 class TestMainFunction:
     def test_stdin_processing(self):
@@ -533,6 +1198,75 @@ class TestMainFunction:
             assert exit_code == 0
             assert fake_output.getvalue() == expected_output
 
+    def test_stdin_binary_blocks(self):
+        """Test reading stdin in small binary blocks, with lines split across blocks."""
+        text = "The color of the center,\r\nand the flavor.\nvisit www.x.com\ncolor ümlaut\n"
+        input_stream = TextIOWrapper(BytesIO(text.encode("utf-8")), encoding="utf-8")
+        output_stream = TextIOWrapper(BytesIO(), encoding="utf-8")
+
+        with (
+            patch.object(sys, "stdin", input_stream),
+            patch.object(sys, "stdout", output_stream),
+            patch.object(sys, "argv", ["uwotm8", "--buffer-size", "3"]),
+        ):
+            exit_code = main()
+
+        assert exit_code == 0
+        # Converted as a whole, as a file would be, rather than line by line
+        expected = convert_american_to_british_spelling(text.replace("\r\n", "\n"))
+        assert expected.startswith("The colour of the centre,\nand the flavour.\n")
+        assert output_stream.buffer.getvalue().decode("utf-8") == expected.replace("\n", os.linesep)
+
+    def test_buffer_size_must_be_positive(self, capsys):
+        """Test that a --buffer-size that would read nothing from stdin is rejected."""
+        for value in ("0", "-1", "x"):
+            with patch.object(sys, "stdin", StringIO("A color\n")), pytest.raises(SystemExit) as error:
+                main(["--no-daemon", "--buffer-size", value])
+            assert error.value.code == 2
+            assert "expected a whole number of at least 1" in capsys.readouterr().err
+
+    def test_jobs_must_be_positive(self, capsys):
+        """Test that a -j that would start no worker processes is rejected."""
+        for value in ("0", "-4"):
+            with pytest.raises(SystemExit) as error:
+                main(["--no-daemon", "--check", "-j", value, "."])
+            assert error.value.code == 2
+            assert "expected a whole number of at least 1" in capsys.readouterr().err
+
+    def test_io_threads_must_not_be_negative(self, capsys):
+        """Test that a negative --io-threads is rejected, while 0 reads and writes files in turn."""
+        with pytest.raises(SystemExit) as error:
+            main(["--no-daemon", "--check", "--io-threads", "-3", "."])
+        assert error.value.code == 2
+        assert "expected a whole number of at least 0" in capsys.readouterr().err
+        with tempfile.TemporaryDirectory() as temp_dir:
+            assert main(["--no-daemon", "--check", "--no-cache", "--io-threads", "0", temp_dir]) == 0
+
+    def test_diff_and_json(self):
+        """Test that --diff and --json report changes without writing them."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            src_path = os.path.join(temp_dir, "notes.md")
+            with open(src_path, "w") as f:
+                f.write("A summary\nThe color\n")
+
+            for flag in ["--diff", "--json"]:
+                with (
+                    patch.object(sys, "argv", ["uwotm8", flag, "--check", "-j", "1", temp_dir]),
+                    patch.object(sys, "stdout", StringIO()) as fake_output,
+                    patch.object(sys, "stderr", StringIO()) as fake_error,
+                ):
+                    assert main() == 1
+                if flag == "--diff":
+                    assert "-The color\n+The colour\n" in fake_output.getvalue()
+                else:
+                    assert json.loads(fake_output.getvalue()) == [
+                        {"file": src_path, "line": 2, "column": 5, "american": "color", "british": "colour"}
+                    ]
+                assert fake_error.getvalue() == "1 of 1 files would be reformatted\n"
+
+            with open(src_path) as f:
+                assert f.read() == "A summary\nThe color\n"
+
     def test_single_file_with_output(self):
         """Test processing a single file with output option."""
         with tempfile.NamedTemporaryFile(mode="w+", suffix=".txt", delete=False) as src_file:
@@ -0,0 +1,119 @@
+import os
+import socket
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+
+from uwotm8.daemon import Client, DaemonError, run_in_daemon, serve
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix domain sockets")
+
+
+def start_daemon(socket_path):
+    """Serve from a thread, returning once the daemon is listening."""
+    thread = threading.Thread(target=serve, args=(socket_path,), daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not os.path.exists(socket_path):
+        assert time.monotonic() < deadline, "daemon did not start"
+        time.sleep(0.01)
+    return thread
+
+
+class TestDaemon:
+    def test_requests(self, capsys):
+        """Test converting text, checking files and running command lines through the daemon."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            socket_path = os.path.join(temp_dir, "uwotm8.sock")
+            path = os.path.join(temp_dir, "notes.md")
+            with open(path, "w") as f:
+                f.write("My favorite color.\n")
+            thread = start_daemon(socket_path)
+            client = Client(socket_path)
+
+            assert client.convert("My favorite color.") == "My favourite colour."
+            assert client.convert("My favorite color.", ignore=["Favorite"]) == "My favorite colour."
+            assert client.check_file(path) is True
+            assert client.process_paths([temp_dir], check=True) == (1, 1)
+            assert client.run(["--check", path]) == (1, "Would reformat 1 of 1 files\n", "")
+            assert client.run([], stdin="A color\n") == (0, "A colour\n", "")
+            exit_code, _, err = client.run(["--no-such-option"])
+            assert exit_code == 2
+            assert "unrecognized arguments" in err
+
+            # Commands that read standard input are left to stream it in this process
+            with patch("sys.stdin", StringIO("A gray color\n")) as stdin:
+                assert run_in_daemon(["--socket", socket_path]) is None
+                assert stdin.tell() == 0
+                assert run_in_daemon(["--socket", socket_path, path]) == 0
+            assert "Reformatted 1 of 1 files" in capsys.readouterr().out
+            with open(path) as f:
+                assert f.read() == "My favourite colour.\n"
+
+            # Standard output and error are written back in the order the command wrote them
+            with open(os.path.join(temp_dir, "binary.txt"), "wb") as f:
+                f.write(b"color\0")
+            written = []
+            stdout = patch("sys.stdout.write", side_effect=lambda text: written.append(("stdout", text)))
+            stderr = patch("sys.stderr.write", side_effect=lambda text: written.append(("stderr", text)))
+            with stdout, stderr:
+                assert run_in_daemon(["--socket", socket_path, "--check", temp_dir]) == 0
+            assert [stream for stream, _ in written] == ["stderr", "stdout"]
+            assert written[0][1].startswith("Skipped ")
+
+            client.shutdown()
+            thread.join(timeout=10)
+            assert not thread.is_alive()
+            assert not os.path.exists(socket_path)
+
+    def test_client_environment(self):
+        """Test that requests are handled with the client's cache and git environment variables."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            socket_path = os.path.join(temp_dir, "uwotm8.sock")
+            path = os.path.join(temp_dir, "notes.md")
+            with open(path, "w") as f:
+                f.write("My favourite colour.\n")
+            cache_home = os.path.join(temp_dir, "cache")
+            thread = start_daemon(socket_path)
+
+            # The daemon runs in this process here, so the client's environment is given explicitly
+            environment = {"HOME": os.environ.get("HOME"), "XDG_CACHE_HOME": cache_home, "GIT_DIR": "client.git"}
+            with patch("uwotm8.daemon._client_environment", return_value=environment):
+                assert Client(socket_path).run(["--check", path])[0] == 0
+            assert os.listdir(os.path.join(cache_home, "uwotm8"))
+            # The daemon's own environment is restored after each request
+            assert os.environ.get("XDG_CACHE_HOME") != cache_home
+            assert "GIT_DIR" not in os.environ
+
+            Client(socket_path).shutdown()
+            thread.join(timeout=10)
+
+    def test_local_commands(self):
+        """Test that command lines are run locally without a daemon, or when they ask to be."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            socket_path = os.path.join(temp_dir, "uwotm8.sock")
+            assert run_in_daemon(["--socket", socket_path, "--check", "."]) is None
+
+            thread = start_daemon(socket_path)
+            for option in ["--no-daemon", "--no-d", "--stop-daemon", "--daemon", "--version"]:
+                assert run_in_daemon([f"--socket={socket_path}", option]) is None
+            assert serve(socket_path) == 1
+
+            Client(socket_path).shutdown()
+            thread.join(timeout=10)
+
+    def test_other_code(self):
+        """Test that a daemon running other code than the client refuses requests and stops."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            socket_path = os.path.join(temp_dir, "uwotm8.sock")
+            thread = start_daemon(socket_path)
+            stale = patch("uwotm8.daemon._sources", return_value=[["elsewhere", 0, 0]])
+            with stale, pytest.raises(DaemonError, match="other code"):
+                Client(socket_path).convert("color")
+            thread.join(timeout=10)
+            assert not thread.is_alive()
+            assert run_in_daemon(["--socket", socket_path, "--check", "."]) is None
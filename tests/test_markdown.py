@@ -0,0 +1,127 @@
+import asyncio
+import os
+import tempfile
+
+from uwotm8.aio import aconvert_file
+from uwotm8.convert import convert_file, convert_markdown_file, diff_file, find_file_hits, main, process_paths
+from uwotm8.markdown import prose_spans
+
+DOCUMENT = """---
+title: The color guide
+---
+# Color
+
+Set the `color` property, or see [the color docs](https://example.com/color "color").
+Visit https://example.com/color for my favorite color.
+
+```python
+color = "color"
+```
+
+    indented color
+
+- A list item with color
+
+    A list paragraph with color
+
+<span class="color">The color</span> <!-- color -->
+
+[color-ref]: https://example.com/color
+"""
+
+CONVERTED = """---
+title: The color guide
+---
+# Colour
+
+Set the `color` property, or see [the colour docs](https://example.com/color "color").
+Visit https://example.com/color for my favourite colour.
+
+```python
+color = "color"
+```
+
+    indented color
+
+- A list item with colour
+
+    A list paragraph with colour
+
+<span class="color">The colour</span> <!-- color -->
+
+[colour-ref]: https://example.com/color
+"""
+
+
+def protected(text):
+    """Return the pieces of text that prose_spans() leaves out."""
+    pieces = []
+    position = 0
+    for start, end in prose_spans(text):
+        pieces.append(text[position:start])
+        position = end
+    pieces.append(text[position:])
+    return [piece for piece in pieces if piece]
+
+
+class TestMarkdown:
+    def test_prose_spans(self):
+        """Test which parts of a document are left out of the prose."""
+        assert protected("Plain prose.\n") == []
+        assert protected("a `` b ` c `` d") == ["`` b ` c ``"]
+        # Escaped and unclosed backticks, and backticks across paragraphs, don't open code spans
+        assert protected("x \\`color` y") == []
+        assert protected("`open\n\nclose`") == []
+        assert protected("See www.color.com/a or color://x now") == ["www.color.com/a", "color://x"]
+        assert protected("![image](a/b(c).png)") == ["](a/b(c).png)"]
+        assert protected("<a href='x'>text</a>, a < b > c") == ["<a href='x'>", "</a>"]
+        assert protected("[x]: <http://a> 'Title'\nrest") == [" <http://a> 'Title'"]
+        assert protected("~~~~\ncode\n~~~\nmore\n~~~~\nprose\n") == ["~~~~\ncode\n~~~\nmore\n~~~~\n"]
+        assert protected("```\nunclosed\n") == ["```\nunclosed\n"]
+        # Indented lines are only code after a blank line, and not in a list item
+        assert protected("\n    code\n\nprose\n") == ["    code\n\n"]
+        assert protected("text\n    lazy continuation\n") == []
+        assert protected("1. item\n\n    paragraph\n") == []
+
+    def test_convert_markdown_file(self):
+        """Test that only the prose of a Markdown file is converted."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "guide.md")
+            with open(path, "w") as f:
+                f.write(DOCUMENT)
+
+            assert convert_markdown_file(path, check=True) is True
+            assert find_file_hits(path, markdown=True)[0].line == 4
+            assert "+Set the `color` property, or see [the colour docs]" in diff_file(path, markdown=True)
+            assert convert_markdown_file(path) is True
+            with open(path) as f:
+                assert f.read() == CONVERTED
+            assert convert_markdown_file(path, check=True) is False
+
+    def test_process_paths(self):
+        """Test that Markdown files are segmented unless asked not to be, and other files never are."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            md_path = os.path.join(temp_dir, "guide.md")
+            txt_path = os.path.join(temp_dir, "guide.txt")
+            for path in (md_path, txt_path):
+                with open(path, "w") as f:
+                    f.write("Run `set color` here.\n")
+
+            assert process_paths([temp_dir], check=True) == (2, 1)
+            assert process_paths([temp_dir], check=True, markdown=False) == (2, 2)
+            assert main(["--check", "--no-cache", "--no-daemon", md_path]) == 0
+            assert main(["--check", "--no-cache", "--no-daemon", "--no-markdown", md_path]) == 1
+
+    def test_convert_file_unchanged(self):
+        """Test that convert_file() still converts Markdown as plain text, and aconvert_file() only when asked."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "guide.md")
+            with open(path, "w") as f:
+                f.write("My favorite color is in `set color`.\n")
+
+            assert asyncio.run(aconvert_file(path, markdown=True)) is True
+            with open(path) as f:
+                assert f.read() == "My favourite colour is in `set color`.\n"
+            assert convert_file(path) is True
+            with open(path) as f:
+                assert f.read() == "My favourite colour is in `set colour`.\n"
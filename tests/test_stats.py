@@ -0,0 +1,77 @@
+import json
+import os
+import tempfile
+import time
+
+from uwotm8 import stats
+from uwotm8.convert import Converter, main, process_paths
+
+
+class TestStats:
+    def test_not_collecting(self):
+        """Test that nothing is collected unless asked for."""
+        assert stats.current is None
+        with stats.phase("scan"):
+            stats.count("files")
+        Converter().convert("The color")
+        assert stats.current is None
+
+    def test_nested_phases(self):
+        """Test that time is only charged to the innermost phase."""
+        with stats.collecting() as collected, stats.phase("outer"):
+            time.sleep(0.02)
+            with stats.phase("inner"):
+                time.sleep(0.05)
+        assert stats.current is None
+        assert collected.seconds["outer"] >= 0.02
+        assert collected.seconds["inner"] >= 0.05
+        # Had the outer phase been charged for the inner one too, the phases would add up to more
+        assert collected.total >= collected.seconds["outer"] + collected.seconds["inner"]
+
+    def test_word_counts(self):
+        """Test that candidate words are counted by what happens to them."""
+        text = "The `color` of x-color at http://example.com/color,\na program in my favorite color."
+        with stats.collecting() as collected:
+            Converter().convert(text, ignore={"favorite"})
+        counters = collected.counters
+        assert counters["words_scanned"] == 16
+        assert counters["candidates"] == 5
+        assert counters["skipped_backtick"] == 1
+        assert counters["skipped_hyphen"] == 1
+        assert counters["skipped_url"] == 1
+        # "program" is on the default ignore list, "favorite" on the per-call one
+        assert counters["skipped_ignore"] == 2
+        assert counters["conversions"] == 1
+
+    def test_process_paths(self):
+        """Test that files are counted and timed, including in worker processes."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for index in range(4):
+                with open(os.path.join(temp_dir, f"file_{index}.md"), "w") as f:
+                    f.write("This text has color.\n" if index % 2 else "This text is fine.\n")
+
+            for jobs in (1, 2):
+                with stats.collecting() as collected:
+                    assert process_paths([temp_dir], check=True, jobs=jobs) == (4, 2)
+                assert collected.counters["files"] == 4
+                assert collected.counters["files_changed"] == 2
+                assert collected.counters["bytes_read"] == 2 * 21 + 2 * 19
+                assert {"walk", "read", "scan"} <= set(collected.seconds)
+
+    def test_cli(self, capsys):
+        """Test that the command line prints stats or writes them as JSON."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "notes.md")
+            with open(path, "w") as f:
+                f.write("This text has color.\n")
+            stats_path = os.path.join(temp_dir, "stats.json")
+
+            assert main(["--check", "--no-cache", "--stats", "--stats-json", stats_path, path]) == 1
+            err = capsys.readouterr().err
+            assert "total (wall clock)" in err
+            assert "conversions" in err
+            with open(stats_path) as f:
+                data = json.load(f)
+            assert data["counters"]["files"] == 1
+            assert data["counters"]["files_changed"] == 1
+            assert data["total_seconds"] > 0
@@ -0,0 +1,78 @@
+import os
+import tempfile
+from unittest.mock import patch
+
+from uwotm8.convert import Converter, main
+from uwotm8.tables import load_tables, source_fingerprint
+
+SETTINGS = {"ignore": ["program"]}
+
+
+class TestSpellingTables:
+    def test_tables_are_built_once(self):
+        """Test that saved tables are loaded instead of being built again."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            builds = []
+
+            def build():
+                builds.append(1)
+                return [{"color": "colour"}, "color"]
+
+            assert load_tables(temp_dir, SETTINGS, build) == [{"color": "colour"}, "color"]
+            assert load_tables(temp_dir, SETTINGS, build) == [{"color": "colour"}, "color"]
+            assert len(builds) == 1
+
+            # Other settings get their own tables
+            load_tables(temp_dir, {"ignore": []}, build)
+            assert len(builds) == 2
+
+    def test_unwritable_cache_dir(self):
+        """Test that tables are still built when they cannot be saved."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            blocker = os.path.join(temp_dir, "file")
+            with open(blocker, "w") as f:
+                f.write("")
+            assert load_tables(os.path.join(blocker, "cache"), SETTINGS, lambda: [1]) == [1]
+            assert load_tables(None, SETTINGS, lambda: [2]) == [2]
+
+    def test_source_fingerprint(self):
+        """Test that modules are identified by their files without being imported."""
+        fingerprint = source_fingerprint("uwotm8.tables", "uwotm8.no_such_module")
+        assert len(fingerprint) == 1
+        assert fingerprint[0][0].endswith("tables.py")
+
+    def test_converter_uses_saved_tables(self):
+        """Test that a converter loads its tables from the directory it is given, keyed by its ignore list."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            converter = Converter(ignore=["colour"], tables_dir=temp_dir)
+            assert converter.convert("The color and flavor") == "The colour and flavour"
+            assert Converter(ignore=["color"], tables_dir=temp_dir).convert("The color and flavor") == (
+                "The color and flavour"
+            )
+            assert len(os.listdir(temp_dir)) == 2
+
+            with patch("uwotm8.convert._build_trie_pattern", side_effect=AssertionError("tables should be loaded")):
+                assert Converter(ignore=["color"], tables_dir=temp_dir).convert("The color and flavor") == (
+                    "The color and flavour"
+                )
+
+            # Overlays made for a single use are not saved
+            converter.with_ignore(["flavor"])
+            assert len(os.listdir(temp_dir)) == 2
+
+    def test_tables_saved_only_by_the_command_line(self, tmp_path):
+        """Test that library converters save nothing, and the command line saves tables only where its cache is."""
+        cache_home = tmp_path / "cache"
+        src = tmp_path / "doc.txt"
+        src.write_text("The color")
+
+        Converter(ignore=["flavor"]).convert("The color")
+        assert not cache_home.exists()
+
+        assert main(["--check", "--no-daemon", "--no-cache", "--ignore", "flavor", str(src)]) == 1
+        assert not cache_home.exists()
+
+        cache_dir = tmp_path / "custom"
+        assert main(["--check", "--no-daemon", "--cache-dir", str(cache_dir), "--ignore", "flavor", str(src)]) == 1
+        assert len(list(cache_dir.glob("tables-*.json"))) == 1
+        assert not cache_home.exists()
@@ -1,7 +1,36 @@
-from importlib.metadata import version
+from typing import TYPE_CHECKING, Any
 
-from .convert import convert_american_to_british_spelling
+if TYPE_CHECKING:
+    from .aio import aconvert_file, aconvert_text, aprocess_paths
+    from .convert import Converter, convert_american_to_british_spelling, convert_many, iter_convert_many
 
-__all__ = ["convert_american_to_british_spelling"]
+__all__ = [
+    "Converter",
+    "aconvert_file",
+    "aconvert_text",
+    "aprocess_paths",
+    "convert_american_to_british_spelling",
+    "convert_many",
+    "iter_convert_many",
+]
 
-__version__ = version("uwotm8")
+# Everything is imported when first used, so that a command forwarded to the daemon never imports the
+# converter, and importing asyncio and reading package metadata wait until needed
+_AIO_NAMES = frozenset({"aconvert_file", "aconvert_text", "aprocess_paths"})
+_CONVERT_NAMES = frozenset({"Converter", "convert_american_to_british_spelling", "convert_many", "iter_convert_many"})
+
+
+def __getattr__(name: str) -> Any:
+    if name in _CONVERT_NAMES:
+        from . import convert
+
+        return getattr(convert, name)
+    if name in _AIO_NAMES:
+        from . import aio
+
+        return getattr(aio, name)
+    if name == "__version__":
+        from importlib.metadata import version
+
+        return version("uwotm8")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")  # noqa: TRY003
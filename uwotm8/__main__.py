@@ -2,8 +2,25 @@
 """CLI entry point for uwotm8."""
 
 import sys
+from typing import Optional
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Run a command line in the daemon if one is running, and in this process otherwise."""
+    if argv is None:
+        argv = sys.argv[1:]
+
+    # Forwarding happens before the converter is imported, as that import is what the daemon saves
+    from uwotm8.daemon import run_in_daemon
+
+    code = run_in_daemon(argv)
+    if code is not None:
+        return code
+
+    from uwotm8.convert import main as run
+
+    return run(argv)
 
-from uwotm8.convert import main
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -0,0 +1,229 @@
+"""Asynchronous counterparts of the conversion functions, for use from an asyncio event loop."""
+
+import asyncio
+import tokenize
+from collections.abc import Iterable
+from concurrent.futures import Executor
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Optional, TypeVar, Union
+
+from uwotm8.convert import (
+    _STREAMING_THRESHOLD,
+    DEFAULT_EXCLUDE,
+    DEFAULT_INCLUDE,
+    Converter,
+    _check_shard,
+    _collect_files,
+    _convert_spans,
+    _default_converter,
+    _GitChanges,
+    _PathFilter,
+    _read_file,
+    _skip_file,
+    _SkippedFile,
+    _sniff_file,
+    _span_finder,
+    _SpanFinder,
+    _spans_need_conversion,
+    _write_file,
+    convert_file,
+)
+from uwotm8.markdown import MARKDOWN_SUFFIXES
+
+T = TypeVar("T")
+
+# Files converted at once by aprocess_paths when no semaphore is given
+DEFAULT_CONCURRENCY = 16
+
+
+async def _run_in_executor(executor: Optional[Executor], func: Callable[..., T], *args: Any) -> T:
+    """Run a function in an executor, or in the event loop's default executor if None."""
+    return await asyncio.get_running_loop().run_in_executor(executor, partial(func, *args))
+
+
+async def aconvert_text(
+    text: str,
+    strict: bool = False,
+    converter: Optional[Converter] = None,
+    executor: Optional[Executor] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+) -> str:
+    """
+    Convert American English spelling to British English spelling without blocking the event loop.
+
+    Args:
+        text: The text to convert.
+        strict: Whether to raise an exception if a word cannot be converted.
+        converter: Converter to use. Defaults to one for the current CONVERSION_IGNORE_LIST.
+        executor: Executor to convert in. Defaults to the event loop's default executor.
+        semaphore: Semaphore to hold while converting, to bound how many conversions run at once.
+
+    Returns:
+        The text with American English spelling converted to British English spelling.
+    """
+    if converter is None:
+        converter = _default_converter()
+    if semaphore is None:
+        return await _run_in_executor(executor, converter.convert, text, strict)
+    async with semaphore:
+        return await _run_in_executor(executor, converter.convert, text, strict)
+
+
+async def aconvert_file(
+    src: Union[str, Path],
+    dst: Optional[Union[str, Path]] = None,
+    strict: bool = False,
+    check: bool = False,
+    comments_only: bool = False,
+    converter: Optional[Converter] = None,
+    executor: Optional[Executor] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    markdown: bool = False,
+) -> bool:
+    """
+    Convert American English spelling to British English spelling in a file without blocking the event loop.
+
+    The file is read and written in a thread, and converted in the given executor.
+
+    Args:
+        src: Source file path.
+        dst: Destination file path. If None, content is written back to source file.
+        strict: Whether to raise an exception if a word cannot be converted.
+        check: If True, only check if changes would be made without modifying files.
+        comments_only: If True, treat the file as Python and only convert its comments and docstrings.
+        converter: Converter to use. Defaults to one for the current CONVERSION_IGNORE_LIST.
+        executor: Executor to convert in. Defaults to the event loop's default executor.
+        semaphore: Semaphore to hold while processing the file, to bound how many files are open at once.
+        markdown: If True, treat the file as Markdown and only convert its prose.
+
+    Returns:
+        True if changes were made or would be made (if check=True), False otherwise.
+    """
+    if converter is None:
+        converter = _default_converter()
+    find_spans = _span_finder(comments_only, markdown)
+    if semaphore is None:
+        return await _aconvert_file(Path(src), dst, strict, check, find_spans, converter, executor)
+    async with semaphore:
+        return await _aconvert_file(Path(src), dst, strict, check, find_spans, converter, executor)
+
+
+async def _aconvert_file(
+    src_path: Path,
+    dst: Optional[Union[str, Path]],
+    strict: bool,
+    check: bool,
+    find_spans: Optional[_SpanFinder],
+    converter: Converter,
+    executor: Optional[Executor],
+) -> bool:
+    size = (await asyncio.to_thread(src_path.stat)).st_size
+
+    # Large files are streamed in bounded chunks, which interleaves reading and converting
+    if find_spans is None and size > _STREAMING_THRESHOLD:
+        return await _run_in_executor(executor, convert_file, src_path, dst, strict, check, None, converter)
+
+    content = await asyncio.to_thread(_read_file, src_path)
+
+    converted: Optional[str]
+    if find_spans is not None:
+        # Files that cannot be tokenized as Python are left unchanged, as by convert_python_comments_only
+        try:
+            if check:
+                return await _run_in_executor(executor, _spans_need_conversion, content, find_spans, converter, strict)
+            converted = await _run_in_executor(executor, _convert_spans, content, find_spans, converter, strict)
+        except (tokenize.TokenError, SyntaxError):
+            if strict:
+                raise
+            return False
+    elif check:
+        return await _run_in_executor(executor, converter.needs_conversion, content, strict)
+    else:
+        converted = await _run_in_executor(executor, converter.convert, content, strict)
+
+    if converted is None or converted == content:
+        return False
+
+    await asyncio.to_thread(_write_file, Path(src_path if dst is None else dst), converted)
+    return True
+
+
+async def aprocess_paths(
+    paths: list[Union[str, Path]],
+    check: bool = False,
+    strict: bool = False,
+    comments_only: bool = False,
+    converter: Optional[Converter] = None,
+    include: Iterable[str] = DEFAULT_INCLUDE,
+    exclude: Iterable[str] = DEFAULT_EXCLUDE,
+    respect_gitignore: bool = False,
+    executor: Optional[Executor] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    changed_since: Optional[str] = None,
+    staged: bool = False,
+    markdown: bool = True,
+    shard: Optional[tuple[int, int]] = None,
+    max_file_size: Optional[int] = None,
+    on_skip: Optional[Callable[[Path, str], None]] = None,
+) -> tuple[int, int]:
+    """
+    Process multiple files and directories without blocking the event loop.
+
+    Files that do not look like UTF-8 text, or are larger than max_file_size, are skipped as by process_paths().
+
+    Args:
+        paths: list of file and directory paths.
+        check: If True, only check if changes would be made without modifying files.
+        strict: Whether to raise an exception if a word cannot be converted.
+        comments_only: If True, only convert comments in Python files.
+        converter: Converter to use. Defaults to one for the current CONVERSION_IGNORE_LIST.
+        include: File extensions or name globs to process when walking directories.
+        exclude: Names or path globs of files and directories to skip when walking directories.
+        respect_gitignore: If True, skip files ignored by git in directories inside a git work tree.
+        executor: Executor to convert in. Defaults to the event loop's default executor.
+        semaphore: Semaphore held while processing each file. Share one between calls to bound the
+            files being processed across all of them; defaults to one allowing DEFAULT_CONCURRENCY files.
+        changed_since: If given, only process files that differ from this git revision, or are untracked.
+        staged: If True, only process files with changes staged in git.
+        markdown: If True, only convert the prose in Markdown (.md and .markdown) files.
+        shard: If given as (index, count), only process shard index of count, as process_paths() does.
+        max_file_size: If given, skip files larger than this many bytes without reading them.
+        on_skip: Called with the path of each file skipped and why, such as "binary" or "not UTF-8".
+
+    Returns:
+        tuple of (number of files processed, number of files changed).
+
+    Raises:
+        GitError: If changed_since or staged is given and git cannot list the changed files.
+        ValueError: If the shard index is not from 1 to the shard count.
+    """
+    if converter is None:
+        converter = _default_converter()
+    if shard is not None:
+        _check_shard(shard)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(DEFAULT_CONCURRENCY)
+    changes = _GitChanges(changed_since, staged) if changed_since is not None or staged else None
+    files = await asyncio.to_thread(
+        _collect_files, paths, _PathFilter(include, exclude), respect_gitignore, changes, shard
+    )
+
+    async def process(file_path: Path) -> Optional[bool]:
+        find_spans = _span_finder(
+            comments_only and file_path.suffix == ".py", markdown and file_path.suffix.lower() in MARKDOWN_SUFFIXES
+        )
+        # The sniff opens the file too, so it waits for the semaphore like the conversion does
+        async with semaphore:
+            try:
+                await asyncio.to_thread(_sniff_file, file_path, max_file_size)
+                return await _aconvert_file(file_path, None, strict, check, find_spans, converter, executor)
+            except _SkippedFile as error:
+                _skip_file(file_path, str(error), on_skip)
+            except UnicodeDecodeError:
+                # The sniff only decodes the start of the file
+                _skip_file(file_path, "not UTF-8", on_skip)
+            return None
+
+    results = [result for result in await asyncio.gather(*map(process, files)) if result is not None]
+    return len(results), sum(results)
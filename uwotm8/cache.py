@@ -0,0 +1,199 @@
+"""Persistent cache of files already known to need no conversion."""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from uwotm8 import stats
+
+# Files modified this recently may change again within the same mtime tick, so they are only
+# trusted by content digest (as git does for "racily clean" index entries)
+_RACY_WINDOW_NS = 2_000_000_000
+
+# Whether a failure to save a cache has been reported, so that it is only reported once per process
+_save_failure_reported = False
+
+
+def default_cache_dir() -> Path:
+    """Return the per-user cache directory, honouring XDG_CACHE_HOME."""
+    cache_home = os.environ.get("XDG_CACHE_HOME")
+    base = Path(cache_home) if cache_home else Path.home() / ".cache"
+    return base / "uwotm8"
+
+
+def default_socket_path() -> Path:
+    """Return the per-user daemon socket, in XDG_RUNTIME_DIR if it is set and the cache directory otherwise."""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    return Path(runtime_dir) / "uwotm8.sock" if runtime_dir else default_cache_dir() / "daemon.sock"
+
+
+def content_hash() -> "hashlib.blake2b":
+    """Return a hash object for computing content digests incrementally, e.g. while streaming a file."""
+    return hashlib.blake2b(digest_size=16)
+
+
+def _digest(content: str) -> str:
+    """Return a digest of file content."""
+    digest = content_hash()
+    digest.update(content.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ConversionCache:
+    """
+    Records files that were found clean so later runs can skip them.
+
+    Entries are keyed by absolute path and hold the file size, modification time and a digest of
+    the content. A file whose size and mtime still match is skipped without being read; one whose
+    stat changed but whose content still matches the digest is skipped without being converted.
+    Each combination of settings gets its own cache file, so changing the ignore list or mode, or
+    upgrading uwotm8 or breame, starts from an empty cache.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path], settings: dict[str, Any]) -> None:
+        fingerprint = hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+        self.path = Path(cache_dir) / f"{fingerprint}.json"
+        self.entries: dict[str, list] = self._load()
+        self.updates: dict[str, list] = {}
+        self._stats: dict[str, tuple[int, int]] = {}
+
+    def _load(self) -> dict[str, list]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    @staticmethod
+    def key(path: Union[str, Path]) -> str:
+        """Return the cache key for a file path."""
+        return os.path.abspath(path)
+
+    def is_clean(self, path: Union[str, Path], st: Optional[os.stat_result] = None) -> bool:
+        """
+        Check whether a file is unchanged since it was last recorded as clean.
+
+        Args:
+            path: The file to check.
+            st: The file's stat result, if already known. Otherwise the file is stat'ed.
+
+        Returns:
+            True if the file's size and modification time match a clean entry.
+        """
+        with stats.phase("cache"):
+            key = self.key(path)
+            if st is None:
+                st = os.stat(path)
+            self._stats[key] = (st.st_size, st.st_mtime_ns)
+            clean = self.matches(path, st)
+        if clean:
+            stats.count("cache_hits")
+        return clean
+
+    def matches(self, path: Union[str, Path], st: os.stat_result) -> bool:
+        """
+        Check whether a stat result matches the clean entry for a file, without recording anything.
+
+        Unlike is_clean, this is safe to call from threads other than the one using the cache.
+
+        Args:
+            path: The file the stat result is for.
+            st: The file's stat result.
+
+        Returns:
+            True if the size and modification time match a clean entry.
+        """
+        entry = self.entries.get(self.key(path))
+        return entry is not None and (entry[0], entry[1]) == (st.st_size, st.st_mtime_ns)
+
+    def is_clean_content(self, path: Union[str, Path], content: str) -> bool:
+        """
+        Check whether a file's content matches the content last recorded as clean.
+
+        A match refreshes the entry with the file's current size and modification time.
+
+        Args:
+            path: The file the content was read from, after calling is_clean.
+            content: The file's content.
+
+        Returns:
+            True if the content digest matches a clean entry.
+        """
+        entry = self.entries.get(self.key(path))
+        if entry is None:
+            return False
+        with stats.phase("cache"):
+            digest = _digest(content)
+        if entry[2] != digest:
+            return False
+        self._record(path, digest)
+        stats.count("cache_hits")
+        return True
+
+    def mark_clean(self, path: Union[str, Path], content: str) -> None:
+        """
+        Record a file as needing no conversion.
+
+        Args:
+            path: The file the content was read from, after calling is_clean.
+            content: The file's content.
+        """
+        with stats.phase("cache"):
+            self._record(path, _digest(content))
+
+    def mark_clean_digest(self, path: Union[str, Path], digest: str) -> None:
+        """
+        Record a file as needing no conversion, given a digest of its content from content_hash().
+
+        Args:
+            path: The file the content was read from, after calling is_clean.
+            digest: The hex digest of the file's content.
+        """
+        self._record(path, digest)
+
+    def _record(self, path: Union[str, Path], digest: str) -> None:
+        key = self.key(path)
+        size, mtime_ns = self._stats.pop(key)
+        if mtime_ns > time.time_ns() - _RACY_WINDOW_NS:
+            mtime_ns = -1
+        self.entries[key] = self.updates[key] = [size, mtime_ns, digest]
+
+    def take_update(self, path: Union[str, Path]) -> Optional[list]:
+        """Remove and return the entry recorded for a file since the cache was loaded, if any."""
+        return self.updates.pop(self.key(path), None)
+
+    def add_update(self, path: Union[str, Path], entry: list) -> None:
+        """Add an entry recorded by another process working from a copy of this cache."""
+        self.entries[self.key(path)] = self.updates[self.key(path)] = entry
+
+    def save(self) -> None:
+        """
+        Write the cache to disk if any entries were recorded.
+
+        Saving is best effort: if the cache directory cannot be written, a warning is printed the first
+        time, and the entries recorded are kept in case a later save succeeds.
+        """
+        if not self.updates:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile("w", dir=self.path.parent, delete=False, encoding="utf-8") as f:
+                json.dump(self.entries, f)
+            try:
+                os.replace(f.name, self.path)
+            except OSError:
+                os.unlink(f.name)
+                raise
+        except OSError as error:
+            global _save_failure_reported
+            if not _save_failure_reported:
+                _save_failure_reported = True
+                print(f"Warning: could not save the cache in {self.path.parent}: {error}", file=sys.stderr)
+            return
+        self.updates.clear()
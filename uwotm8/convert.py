@@ -1,13 +1,35 @@
-import argparse
+import codecs
+import fnmatch
+import io
+import json
+import mmap
 import os
 import re
+import shutil
+import string
+import subprocess
 import sys
-from collections.abc import Generator, Iterable
-from importlib.metadata import version
+import tempfile
+import tokenize
+import zlib
+from bisect import bisect_right
+from collections import deque
+from collections.abc import Callable, Collection, Generator, Iterable, Iterator
+from functools import cached_property, lru_cache, partial
+from itertools import groupby, islice
 from pathlib import Path
-from typing import Any, Optional, Union
+from typing import TYPE_CHECKING, Any, BinaryIO, NamedTuple, Optional, TextIO, Union
 
-from breame.spelling import american_spelling_exists, get_british_spelling
+from uwotm8 import stats
+from uwotm8.cache import ConversionCache, content_hash, default_cache_dir
+from uwotm8.markdown import MARKDOWN_SUFFIXES
+from uwotm8.markdown import prose_spans as _markdown_spans
+from uwotm8.tables import TABLE_FORMAT, load_tables, source_fingerprint
+
+# Only needed by main() and the pool helpers, so imported there to keep startup fast
+if TYPE_CHECKING:
+    import argparse
+    from concurrent.futures import Future
 
 # Add this constant near the top of the file, after imports but before function definitions
 CONVERSION_IGNORE_LIST = {
@@ -29,117 +51,912 @@ CONVERSION_IGNORE_LIST = {
     "draft": "draught",  # Different meanings in different contexts
 }
 
+# Files larger than this (in bytes) are converted in chunks rather than read into memory at once,
+# and split across worker processes
+_STREAMING_THRESHOLD = 64 * 1024 * 1024
+_STREAM_CHUNK_SIZE = 1024 * 1024
+# Bytes of a large file checked by each worker task
+_PARALLEL_CHECK_SIZE = 16 * 1024 * 1024
+# Bytes read from the start of a file to tell whether it is text before converting it
+_SNIFF_SIZE = 8 * 1024
+# Files read ahead of conversion, and waiting to be written after it, per I/O thread
+_IO_QUEUE_DEPTH = 2
+
+# Files to process when walking directories, and names that are never worth descending into
+DEFAULT_INCLUDE = (".py", ".txt", ".md")
+DEFAULT_EXCLUDE = (
+    ".git",
+    ".hg",
+    ".svn",
+    ".venv",
+    "venv",
+    ".tox",
+    ".nox",
+    "node_modules",
+    "__pycache__",
+    ".mypy_cache",
+    ".pytest_cache",
+    ".ruff_cache",
+)
+
+# Number of texts scanned together by Converter.iter_convert_many
+_BATCH_SIZE = 1024
+
+_ASCII_LETTERS = frozenset(string.ascii_letters)
+# Maps UTF-8 bytes to lowercase ASCII letters or, for anything that cannot be part of a word, a space
+_WORD_BYTES = bytes(ord(chr(byte).lower()) if chr(byte) in _ASCII_LETTERS else ord(" ") for byte in range(256))
+_URL_MARKER_PATTERN = re.compile(r"://|www\.")
+_URL_MARKER_BYTES_PATTERN = re.compile(rb"://|www\.")
+# A line, with the newline ending it if there is one
+_LINE_PATTERN = re.compile(r"[^\n]*\n|[^\n]+")
+_ASCII_LETTER_BYTES = frozenset(string.ascii_letters.encode("ascii"))
+
+# Characters of text checked at a time by Converter.needs_conversion
+_CHECK_WINDOW = 64 * 1024
+
+# Characters of text searched word by word before the engine's pattern is compiled, which takes longer
+# than searching a short file this way, so that a process started for a few small files never compiles it
+_COMPILE_AFTER = 1024 * 1024
+_ASCII_WORD_PATTERN = re.compile(r"(?<![a-zA-Z])[a-zA-Z]+")
+
+# Finds the (start, end, ignore) spans of a file's content to convert, each on its own
+_SpanFinder = Callable[[str], Iterable[tuple[int, int, Collection[str]]]]
+_NO_IGNORE: frozenset[str] = frozenset()
+
+
+class _SpellingEngine:
+    """
+    Compiled lookup tables for finding American spellings in a single regex pass.
 
-# Then modify the convert_american_to_british_spelling function to check the ignore_list
-def convert_american_to_british_spelling(  # noqa: C901
-    text: str, strict: bool = False
-) -> Any:
+    The pattern only matches whole ASCII-letter words that have a British spelling, so
+    text that needs no changes never leaves the regex engine. has_candidates() answers the
+    same question several times faster, without the regex, for text that is usually clean,
+    so the pattern is only compiled once some text has a candidate. Even then, finditer()
+    looks words up one at a time until enough text has been searched to pay for compiling it.
     """
-    Convert American English spelling to British English spelling.
+
+    def __init__(self, spellings: dict[str, str], body: str) -> None:
+        """
+        Args:
+            spellings: Lowercase ASCII-letter American spellings mapped to British spellings.
+            body: Regex alternation matching exactly the keys of spellings, from _spelling_tables().
+        """
+        self.spellings = spellings
+        self.body = body
+        self.candidates = frozenset(american.encode("ascii") for american in spellings)
+        self.searched = 0
+
+    @cached_property
+    def pattern(self) -> "re.Pattern[str]":
+        """The pattern matching whole words with a British spelling."""
+        with stats.phase("compile"):
+            return re.compile(rf"(?<![a-zA-Z]){self.body}(?![a-zA-Z])", re.IGNORECASE | re.ASCII)
+
+    def finditer(self, text: str, start: int, end: int) -> Iterator["re.Match[str]"]:
+        """
+        Find the whole words with a British spelling between start and end, as the pattern would.
+
+        Args:
+            text: The text to search.
+            start: Offset to start at, which must not fall inside a word.
+            end: Offset to stop at, which must not fall inside a word.
+
+        Returns:
+            An iterator over the match for each word, in order.
+        """
+        if "pattern" not in self.__dict__:
+            self.searched += end - start
+            if self.searched <= _COMPILE_AFTER:
+                spellings = self.spellings
+                words = _ASCII_WORD_PATTERN.finditer(text, start, end)
+                return (word for word in words if word.group().lower() in spellings)
+        return self.pattern.finditer(text, start, end)
+
+    @cached_property
+    def bytes_pattern(self) -> "re.Pattern[bytes]":
+        """The pattern for UTF-8 encoded text, in which every byte of a non-ASCII character is a non-letter."""
+        return re.compile(self.pattern.pattern.encode("ascii"), re.IGNORECASE)
+
+    def has_candidates(self, text: str) -> bool:
+        """
+        Check whether a text contains any word the pattern would match.
+
+        Every byte that is not an ASCII letter, including each byte of a non-ASCII character,
+        becomes a space, so splitting gives exactly the whole words the pattern looks for.
+
+        Args:
+            text: The text to check.
+
+        Returns:
+            True if at least one word in the text has a British spelling.
+        """
+        words = text.encode("utf-8", "surrogatepass").translate(_WORD_BYTES).split()
+        return not self.candidates.isdisjoint(words)
+
+
+def _spelling_tables(ignore: frozenset[str]) -> tuple[dict[str, str], str]:
+    """
+    Build the lookup tables for a converter from breame's spellings.
 
     Args:
-        text: The text to convert.
-        strict: Whether to raise an exception if a word cannot be converted.
+        ignore: Lowercase words to leave out of the tables.
 
     Returns:
-        The text with American English spelling converted to British English spelling.
+        Tuple of (spellings, body), where spellings maps each lowercase ASCII-letter American spelling
+        outside ignore to its British spelling, and body is a regex alternation matching its keys.
     """
-    if not text.strip():
-        return text
-    try:
+    from breame.data.spelling_constants import AMERICAN_ENGLISH_SPELLINGS
+
+    spellings = {
+        american: british
+        for american, british in AMERICAN_ENGLISH_SPELLINGS.items()
+        if american.isascii() and american.isalpha() and american not in ignore
+    }
+    return spellings, _build_trie_pattern(spellings) if spellings else "(?!)"
+
+
+def _load_spelling_engine(ignore: frozenset[str], tables_dir: Optional[Path]) -> _SpellingEngine:
+    """
+    Load the lookup tables for an ignore list from tables_dir, building and saving them on first use.
+
+    Saved tables are replaced whenever breame's spellings or this module change. If tables_dir is
+    None, the tables are built and not saved.
+    """
+    settings = {
+        "format": TABLE_FORMAT,
+        "sources": source_fingerprint("breame.data.spelling_constants", __name__),
+        "ignore": sorted(ignore),
+    }
+    spellings, body = load_tables(tables_dir, settings, partial(_spelling_tables, ignore))
+    return _SpellingEngine(spellings, body)
+
+
+def _build_trie_pattern(words: Iterable[str]) -> str:
+    """
+    Build a regex alternation for the given words, factored into a trie on shared prefixes.
+
+    Args:
+        words: Lowercase words to match.
+
+    Returns:
+        A regex pattern string matching any of the words.
+    """
+    trie: dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node: dict[str, dict]) -> str:
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            body = f"(?:{body})?"
+        return body
+
+    return emit(trie)
+
+
+class _UrlLineIndex:
+    """
+    Spans of the lines in a text that contain a URL marker ("://" or "www.").
+
+    Built in a single pass so that checking whether a word sits on a URL line is a
+    binary search rather than a scan of the surrounding line.
+    """
+
+    def __init__(self, text: str, start: int = 0, end: Optional[int] = None) -> None:
+        """
+        Args:
+            text: The text to index.
+            start: Offset from which lines are indexed; earlier lines are left out unless this falls within them.
+            end: Offset up to which lines are indexed. Defaults to the end of the text.
+        """
+        self.starts: list[int] = []
+        self.ends: list[int] = []
+        line_end = -1 if end is None else text.find("\n", end)
+        for match in _URL_MARKER_PATTERN.finditer(
+            text, text.rfind("\n", 0, start) + 1, len(text) if line_end == -1 else line_end
+        ):
+            position = match.start()
+            # Further markers on a line that is already recorded add nothing
+            if self.ends and position <= self.ends[-1]:
+                continue
+            line_end = text.find("\n", position)
+            self.starts.append(text.rfind("\n", 0, position) + 1)
+            self.ends.append(len(text) if line_end == -1 else line_end)
+
+    def overlaps(self, start: int, end: int) -> bool:
+        """
+        Check whether any line touched by the span from start to end contains a URL marker.
+
+        Args:
+            start: Offset of the start of the span.
+            end: Offset of the end of the span.
+
+        Returns:
+            True if a URL line overlaps the span.
+        """
+        index = bisect_right(self.starts, end) - 1
+        return index >= 0 and self.ends[index] >= start
+
+
+def _leading_gap(text: str, start: int) -> str:
+    """
+    Return the run of non-letter characters immediately before a word.
+
+    Args:
+        text: The text containing the word.
+        start: Offset of the first character of the word.
+
+    Returns:
+        The characters between the previous word (or start of text) and the word.
+    """
+    gap_start = start
+    while gap_start > 0 and text[gap_start - 1] not in _ASCII_LETTERS:
+        gap_start -= 1
+    return text[gap_start:start]
+
+
+class _EncodedWordRules:
+    """
+    The backtick, hyphen and URL rules for words in UTF-8 encoded text.
+
+    Only the run of characters before each word is decoded, to apply the hyphen rule; the other
+    rules work on the raw bytes. "\\r\\n" and "\\r" end lines as well as "\\n", matching text read
+    with universal newlines. The line holding the last word is remembered, so a long line with
+    many words is only searched for a URL marker once.
+    """
+
+    def __init__(self, data: Union[bytes, mmap.mmap], collector: Optional[stats.Stats] = None) -> None:
+        """
+        Args:
+            data: The encoded text.
+            collector: Stats to count candidate words and the rules that skip them in, if any.
+        """
+        self.data = data
+        self.counters = collector.counters if collector is not None else None
+        self.line_start = self.line_end = -1
+        self.line_has_url = False
+
+    def skip(self, start: int, end: int) -> bool:
+        """
+        Check whether a word should be left unchanged.
+
+        Args:
+            start: Offset of the first byte of the word.
+            end: Offset just past the last byte of the word.
+
+        Returns:
+            True if the word should be left unchanged.
+        """
+        reason = self._skip_reason(start, end)
+        if self.counters is not None:
+            self.counters["candidates"] += 1
+            if reason is not None:
+                self.counters[f"skipped_{reason}"] += 1
+        return reason is not None
+
+    def _skip_reason(self, start: int, end: int) -> Optional[str]:
+        """Return the rule that leaves a word unchanged, if any: "backtick", "hyphen" or "url"."""
+        data = self.data
+        gap_start = start
+        while gap_start > 0 and data[gap_start - 1] not in _ASCII_LETTER_BYTES:
+            gap_start -= 1
+        pre = data[gap_start:start]
+        if b"`" in pre:
+            return "backtick"
+        # Decoded so that non-ASCII whitespace is stripped as in the text rule
+        if b"-" in pre and pre.decode("utf-8", "replace").rstrip().endswith("-"):
+            return "hyphen"
+
+        if not self.line_start <= start < end <= self.line_end:
+            self.line_start = self._line_start(start)
+            self.line_end = self._line_end(end)
+            self.line_has_url = _URL_MARKER_BYTES_PATTERN.search(data, self.line_start, self.line_end) is not None
+        if self.line_has_url or gap_start >= self.line_start:
+            return "url" if self.line_has_url else None
+        # The gap runs back over earlier lines, which count as part of the word's context
+        if _URL_MARKER_BYTES_PATTERN.search(data, self._line_start(gap_start), self.line_start) is not None:
+            return "url"
+        return None
+
+    def _line_start(self, position: int) -> int:
+        newline = self.data.rfind(b"\n", 0, position)
+        return max(newline, self.data.rfind(b"\r", newline + 1, position)) + 1
+
+    def _line_end(self, position: int) -> int:
+        newline = self.data.find(b"\n", position)
+        if newline == -1:
+            newline = len(self.data)
+        carriage_return = self.data.find(b"\r", position, newline)
+        return newline if carriage_return == -1 else carriage_return
+
+
+def _preserve_capitalization(original: str, replacement: str) -> str:
+    """Preserve the capitalization from the original word in the replacement."""
+    if original.isupper():
+        return replacement.upper()
+    elif original.istitle():
+        return replacement.title()
+    return replacement
+
+
+def _line_spans(chunks: Iterable[str]) -> Generator[tuple[str, int, int], None, None]:
+    """
+    Regroup text arriving in arbitrary pieces into spans of complete lines, as described in Converter.convert_chunks().
+
+    Args:
+        chunks: Pieces of text, split at any position.
+
+    Yields:
+        Tuples of (text, start, end), where text[start:end] is the next span and the rest of text is context.
+    """
+    carry = ""
+    # Offset in carry up to which text has already been yielded; what comes before it is
+    # only kept as context for the words that follow. Nothing after it is a newline.
+    done = 0
+    # Chunks without a newline, which follow carry; they are only joined once a line ends, so
+    # a long line is not copied again for every chunk
+    pending: list[str] = []
+    for chunk in chunks:
+        newline = chunk.rfind("\n")
+        if newline == -1:
+            pending.append(chunk)
+            continue
+        buffer = "".join([carry, *pending, chunk])
+        pending.clear()
+        end = len(buffer) - len(chunk) + newline + 1
+        yield buffer, done, end
+        # Keep from the start of the line where the gap before the next word begins
+        context_start = buffer.rfind("\n", 0, end - len(_leading_gap(buffer, end))) + 1
+        carry = buffer[context_start:]
+        done = end - context_start
+    carry = "".join([carry, *pending])
+    if done < len(carry):
+        yield carry, done, len(carry)
+
+
+class Hit(NamedTuple):
+    """A word that would be converted, at a line and column counted from 1."""
+
+    line: int
+    column: int
+    american: str
+    british: str
+
+
+def _locate_hits(
+    text: str, replacements: Iterable[tuple[int, int, str]]
+) -> Generator[tuple[int, int, Hit], None, None]:
+    """
+    Find the line and column of each replacement, counting newlines only between one and the next.
+
+    Args:
+        text: The text the replacements are in.
+        replacements: Tuples of (start, end, british) for each word to replace, in order.
+
+    Yields:
+        Tuples of (start, end, hit) for each replacement.
+    """
+    line = 1
+    line_start = 0
+    position = 0
+    for start, end, british in replacements:
+        newlines = text.count("\n", position, start)
+        if newlines:
+            line += newlines
+            line_start = text.rfind("\n", position, start) + 1
+        position = start
+        yield start, end, Hit(line, start - line_start + 1, text[start:end], british)
+
+
+class Converter:
+    """
+    Converts American English spelling to British English spelling.
+
+    A converter compiles its spelling tables and ignore list once and never modifies them, so
+    a single instance can be shared between threads. Words to ignore for a single call are
+    passed to convert() as an overlay instead of being added to the converter.
+    """
+
+    def __init__(self, ignore: Optional[Iterable[str]] = None, tables_dir: Optional[Union[str, Path]] = None) -> None:
+        """
+        Args:
+            ignore: Words that should never be converted. Defaults to the words in CONVERSION_IGNORE_LIST.
+            tables_dir: Directory to save the spelling tables built for the ignore list in, so that later
+                processes load them instead. If None, the tables are built and not saved.
+        """
+        if ignore is None:
+            ignore = CONVERSION_IGNORE_LIST
+        self.ignore = frozenset(word.lower() for word in ignore)
+        self._tables_dir = None if tables_dir is None else Path(tables_dir)
+        # Ignored words are left out of the compiled tables so they never reach the callback
+        self._engine = _load_spelling_engine(self.ignore, self._tables_dir)
+
+    def with_ignore(self, words: Iterable[str]) -> "Converter":
+        """
+        Create a converter that also ignores the given words.
+
+        Args:
+            words: Additional words that should never be converted.
+
+        Returns:
+            A new converter, whose tables are not saved; this one is unchanged.
+        """
+        return Converter(self.ignore.union(word.lower() for word in words))
+
+    def __reduce__(self) -> tuple[Any, tuple[frozenset[str], Optional[Path]]]:
+        # Unpickling, e.g. in a worker process, reuses that process's compiled converter for the same ignore list
+        return _converter_for, (self.ignore, self._tables_dir)
+
+    @cached_property
+    def _ignored_words(self) -> frozenset[bytes]:
+        """The ignore list as the words has_candidates() splits text into."""
+        return frozenset(word.encode("ascii") for word in self.ignore if word.isascii() and word.isalpha())
+
+    def _count_text(self, collector: stats.Stats, text: str) -> None:
+        """Count the words in a text for the stats being collected."""
+        self._count_words(collector, text.encode("utf-8", "surrogatepass").translate(_WORD_BYTES).split())
+
+    def _count_words(self, collector: stats.Stats, words: list[bytes]) -> None:
+        """
+        Count words scanned for the stats being collected.
+
+        Words on the ignore list are left out of the engine's pattern, so they are never matched and are
+        counted here instead, as skipped.
+        """
+        collector.counters["words_scanned"] += len(words)
+        ignored = self._ignored_words
+        collector.counters["skipped_ignore"] += sum(word in ignored for word in words)
+
+    def convert(self, text: str, strict: bool = False, ignore: Collection[str] = frozenset()) -> str:
+        """
+        Convert American English spelling to British English spelling.
+
+        Args:
+            text: The text to convert.
+            strict: Whether to raise an exception if a word cannot be converted.
+            ignore: Extra lowercase words to leave unchanged for this call only.
+
+        Returns:
+            The text with American English spelling converted to British English spelling.
+            If no word could need converting, this is the text object itself.
+        """
+        collector = stats.current
+        if collector is not None:
+            self._count_text(collector, text)
+        if not self._engine.has_candidates(text):
+            return text
+        try:
+            return self._convert_span(text, 0, len(text), ignore)
+        except Exception:
+            if strict:
+                raise
+            return text
+
+    def convert_chunks(
+        self, chunks: Iterable[str], strict: bool = False, ignore: Collection[str] = frozenset()
+    ) -> Generator[str, None, None]:
+        """
+        Convert text that arrives in arbitrary pieces, such as blocks read from a large file.
+
+        Output is produced a line at a time: the URL rule looks at the whole line around a
+        word, and the backtick and hyphen rules at the characters since the previous word,
+        so the tail of each chunk is carried over until the line it belongs to is complete.
+        Joining the output gives the same result as converting the joined input, while only
+        holding a chunk plus the lines it continues in memory.
+
+        Args:
+            chunks: Pieces of text, split at any position.
+            strict: Whether to raise an exception if a word cannot be converted.
+            ignore: Extra lowercase words to leave unchanged for this call only.
+
+        Yields:
+            Converted text, in order.
+        """
+        for _, converted in self._convert_chunk_spans(chunks, strict, ignore):
+            yield converted
+
+    def _convert_chunk_spans(
+        self, chunks: Iterable[str], strict: bool, ignore: Collection[str]
+    ) -> Generator[tuple[str, str], None, None]:
+        """Convert text arriving in pieces, yielding each span of complete lines before and after conversion."""
+        for text, start, end in _line_spans(chunks):
+            yield text[start:end], self._convert_line_span(text, start, end, strict, ignore)
+
+    def _convert_line_span(self, text: str, start: int, end: int, strict: bool, ignore: Collection[str]) -> str:
+        """Convert a span of complete lines from _line_spans(), using the rest of the text as context."""
+        span = text[start:end]
+        collector = stats.current
+        if collector is not None:
+            self._count_text(collector, span)
+        if self._engine.has_candidates(span):
+            return self._convert_span_or_keep(text, start, end, strict, ignore)
+        return span
+
+    def _convert_span_or_keep(self, text: str, start: int, end: int, strict: bool, ignore: Collection[str]) -> str:
+        """Convert part of a text, returning it unchanged on error unless strict."""
+        try:
+            return self._convert_span(text, start, end, ignore)
+        except Exception:
+            if strict:
+                raise
+            return text[start:end]
+
+    def _convert_span(self, text: str, start: int, end: int, ignore: Collection[str]) -> str:
+        """
+        Convert the words between two offsets, using the rest of the text as context.
+
+        Args:
+            text: The text containing the span.
+            start: Offset of the start of the span.
+            end: Offset of the end of the span, which must not fall inside a word.
+            ignore: Extra lowercase words to leave unchanged.
+
+        Returns:
+            The converted span.
+        """
+        spellings = self._engine.spellings
+        pieces = []
+        position = start
+        for match in self._words_to_convert(text, start, end, ignore):
+            word = match.group()
+            pieces.append(text[position : match.start()])
+            pieces.append(_preserve_capitalization(word, spellings[word.lower()]))
+            position = match.end()
+
+        if not pieces:
+            return text[start:end]
+        pieces.append(text[position:end])
+        return "".join(pieces)
+
+    def _words_to_convert(  # noqa: C901
+        self, text: str, start: int, end: int, ignore: Collection[str]
+    ) -> Generator["re.Match[str]", None, None]:
+        """
+        Find the words between two offsets that would be converted, using the rest of the text as context.
+
+        Args:
+            text: The text containing the span.
+            start: Offset of the start of the span.
+            end: Offset of the end of the span, which must not fall inside a word.
+            ignore: Extra lowercase words to leave unchanged.
+
+        Yields:
+            A match for each word to convert, in order.
+        """
+        # Built on the first match that reaches the URL check, so clean text never pays for it
+        url_lines: Optional[_UrlLineIndex] = None
+        # Counting only costs a check per candidate word when no stats are being collected
+        collector = stats.current
+        counters = collector.counters if collector is not None else None
+
+        # The engine pattern only matches whole words with a known British spelling,
+        # so this loop never sees words that need no conversion
+        for match in self._engine.finditer(text, start, end):
+            if counters is not None:
+                counters["candidates"] += 1
+            match_start = match.start()
+            pre = _leading_gap(text, match_start)
 
-        def should_skip_word(word: str, pre: str, post: str, match_start: int, match_end: int) -> bool:
-            """Check if the word should be skipped for conversion."""
             # Skip if within code blocks
-            if "`" in pre or "`" in post:
-                return True
+            if "`" in pre:
+                if counters is not None:
+                    counters["skipped_backtick"] += 1
+                continue
 
-            # Skip if word is in the ignore_list
-            if word.lower() in CONVERSION_IGNORE_LIST:
-                return True
+            # Skip if word is in the per-call ignore list
+            if ignore and match.group().lower() in ignore:
+                if counters is not None:
+                    counters["skipped_ignore"] += 1
+                continue
 
             # Check for hyphenated terms (e.g., "3-color", "x-coordinate")
             # If the word is part of a hyphenated term, we should skip it
             if "-" in pre and pre.rstrip().endswith("-"):
-                return True
+                if counters is not None:
+                    counters["skipped_hyphen"] += 1
+                continue
+
+            # Skip if word appears to be in a URL/URI, i.e. on a line containing one
+            # Later words all start after this one's gap, so lines before it are never needed
+            if url_lines is None:
+                url_lines = _UrlLineIndex(text, match_start - len(pre), end)
+            if url_lines.overlaps(match_start - len(pre), match.end()):
+                if counters is not None:
+                    counters["skipped_url"] += 1
+                continue
+
+            if counters is not None:
+                counters["conversions"] += 1
+            yield match
+
+    def _replacements(
+        self, text: str, strict: bool = False, ignore: Collection[str] = frozenset()
+    ) -> list[tuple[int, int, str]]:
+        """
+        List the words convert() would change.
+
+        Returns:
+            Tuples of (start, end, british) for each word, in order. On error this is empty unless strict,
+            as convert() then returns the text unchanged.
+        """
+        collector = stats.current
+        if collector is not None:
+            self._count_text(collector, text)
+        if not self._engine.has_candidates(text):
+            return []
+        spellings = self._engine.spellings
+        try:
+            return [
+                (match.start(), match.end(), _preserve_capitalization(match.group(), spellings[match.group().lower()]))
+                for match in self._words_to_convert(text, 0, len(text), ignore)
+            ]
+        except Exception:
+            if strict:
+                raise
+            return []
+
+    def find_hits(self, text: str, strict: bool = False, ignore: Collection[str] = frozenset()) -> list[Hit]:
+        """
+        Find the words convert() would change, and where they are.
+
+        Args:
+            text: The text to search.
+            strict: Whether to raise an exception if a word cannot be converted.
+            ignore: Extra lowercase words to leave unchanged for this call only.
+
+        Returns:
+            A hit for each word, in order. Lines are separated by "\n", and columns count characters.
+        """
+        return [hit for _, _, hit in _locate_hits(text, self._replacements(text, strict, ignore))]
+
+    def needs_conversion(self, text: str, strict: bool = False, ignore: Collection[str] = frozenset()) -> bool:
+        """
+        Check whether convert() would change a text, stopping at the first word it would convert.
+
+        Args:
+            text: The text to check.
+            strict: Whether to raise an exception if a word cannot be converted.
+            ignore: Extra lowercase words to leave unchanged for this call only.
+
+        Returns:
+            True if convert() would return different text.
+        """
+        return self._span_needs_conversion(text, 0, len(text), strict, ignore)
+
+    def chunks_need_conversion(
+        self, chunks: Iterable[str], strict: bool = False, ignore: Collection[str] = frozenset()
+    ) -> bool:
+        """
+        Check whether convert_chunks() would change text that arrives in pieces, stopping at the first change.
+
+        Args:
+            chunks: Pieces of text, split at any position.
+            strict: Whether to raise an exception if a word cannot be converted.
+            ignore: Extra lowercase words to leave unchanged for this call only.
+
+        Returns:
+            True if the converted text would differ from the joined chunks.
+        """
+        return any(
+            self._span_needs_conversion(text, start, end, strict, ignore) for text, start, end in _line_spans(chunks)
+        )
 
-            # Check for URL/URI context
-            line_start = text.rfind("\n", 0, match_start)
-            if line_start == -1:
-                line_start = 0
-            else:
-                line_start += 1
+    def _buffer_needs_conversion(
+        self, data: Union[bytes, mmap.mmap], strict: bool = False, start: int = 0, end: Optional[int] = None
+    ) -> bool:
+        """
+        Check whether converting UTF-8 encoded text would change it, without decoding the text.
+
+        Candidate words are found with the bytes pattern, one window at a time as in
+        needs_conversion(), and checked against the rules in _EncodedWordRules.
+
+        Args:
+            data: The encoded text, such as a memory-mapped file.
+            strict: Whether to raise an exception if a word cannot be converted.
+            start: Offset to check from, which must not fall inside a word. The text before it is context.
+            end: Offset to check up to, which must not fall inside a word. Defaults to the end of data.
+
+        Returns:
+            True if converting the decoded text would change words between start and end.
+        """
+        pattern = self._engine.bytes_pattern
+        collector = stats.current
+        rules = _EncodedWordRules(data, collector)
+        size = len(data) if end is None else end
+        try:
+            while start < size:
+                window_end = min(start + _CHECK_WINDOW, size)
+                while window_end < size and data[window_end] in _ASCII_LETTER_BYTES:
+                    window_end += 1
+                words = data[start:window_end].translate(_WORD_BYTES).split()
+                if collector is not None:
+                    self._count_words(collector, words)
+                if not self._engine.candidates.isdisjoint(words):
+                    for match in pattern.finditer(data, start, window_end):
+                        if not rules.skip(match.start(), match.end()):
+                            if collector is not None:
+                                collector.counters["conversions"] += 1
+                            return True
+                start = window_end
+        except Exception:
+            if strict:
+                raise
+        return False
 
-            line_end = text.find("\n", match_end)
-            if line_end == -1:
-                line_end = len(text)
+    def _span_needs_conversion(self, text: str, start: int, end: int, strict: bool, ignore: Collection[str]) -> bool:
+        """Check whether converting part of a text would change it, treating errors as no change unless strict."""
+        collector = stats.current
+        if collector is not None:
+            self._count_text(collector, text[start:end])
+        try:
+            # Windows ending between words let a change near the start be found without filtering the rest
+            while start < end:
+                window_end = min(start + _CHECK_WINDOW, end)
+                while window_end < end and text[window_end] in _ASCII_LETTERS:
+                    window_end += 1
+                if (
+                    self._engine.has_candidates(text[start:window_end])
+                    and next(self._words_to_convert(text, start, window_end, ignore), None) is not None
+                ):
+                    return True
+                start = window_end
+        except Exception:
+            if strict:
+                raise
+        return False
 
-            line_context = text[line_start:line_end]
+    def convert_many(
+        self, texts: Iterable[str], strict: bool = False, ignore: Collection[str] = frozenset()
+    ) -> list[str]:
+        """
+        Convert many separate texts, such as records from a dataset.
+
+        Each text is converted independently, exactly as convert() would, but texts are scanned
+        in batches so the per-text cost for the many texts that need no changes is close to zero.
+
+        Args:
+            texts: The texts to convert.
+            strict: Whether to raise an exception if a word cannot be converted.
+            ignore: Extra lowercase words to leave unchanged.
+
+        Returns:
+            The converted texts, in the same order.
+        """
+        return list(self.iter_convert_many(texts, strict=strict, ignore=ignore))
+
+    def iter_convert_many(
+        self,
+        texts: Iterable[str],
+        strict: bool = False,
+        ignore: Collection[str] = frozenset(),
+        batch_size: int = _BATCH_SIZE,
+    ) -> Generator[str, None, None]:
+        """
+        Convert many separate texts lazily, batch by batch.
+
+        Args:
+            texts: The texts to convert.
+            strict: Whether to raise an exception if a word cannot be converted.
+            ignore: Extra lowercase words to leave unchanged.
+            batch_size: Number of texts to scan at once. Output for a batch is produced once it is full.
+
+        Yields:
+            The converted texts, in the same order.
+        """
+        iterator = iter(texts)
+        while batch := list(islice(iterator, batch_size)):
+            yield from self._convert_batch(batch, strict, ignore)
+
+    def _convert_batch(self, batch: list[str], strict: bool, ignore: Collection[str]) -> list[str]:
+        """Convert a batch of texts, only running the full conversion on texts with a candidate word."""
+        has_candidates = self._engine.has_candidates
+        # NUL is not a letter, so the joined batch has a candidate word exactly when one of its texts does
+        joined = "\0".join(batch)
+        collector = stats.current
+        if collector is not None:
+            self._count_text(collector, joined)
+        if not has_candidates(joined):
+            return batch
+
+        results = batch.copy()
+        for index, text in enumerate(batch):
+            if not has_candidates(text):
+                continue
+            try:
+                results[index] = self._convert_span(text, 0, len(text), ignore)
+            except Exception:
+                if strict:
+                    raise
+        return results
+
+
+@lru_cache(maxsize=8)
+def _converter_for(ignore: frozenset[str], tables_dir: Optional[Path] = None) -> Converter:
+    """Build a converter for an ignore list, reusing it while the ignore list and tables_dir are unchanged."""
+    return Converter(ignore, tables_dir)
+
+
+def _default_converter() -> Converter:
+    """Return a converter for the current contents of CONVERSION_IGNORE_LIST."""
+    return _converter_for(frozenset(CONVERSION_IGNORE_LIST))
+
+
+def convert_american_to_british_spelling(text: str, strict: bool = False) -> Any:
+    """
+    Convert American English spelling to British English spelling.
 
-            # Skip if word appears to be in a URL/URI
-            return "://" in line_context or "www." in line_context
+    Args:
+        text: The text to convert.
+        strict: Whether to raise an exception if a word cannot be converted.
 
-        def preserve_capitalization(original: str, replacement: str) -> str:
-            """Preserve the capitalization from the original word in the replacement."""
-            if original.isupper():
-                return replacement.upper()
-            elif original.istitle():
-                return replacement.title()
-            return replacement
+    Returns:
+        The text with American English spelling converted to British English spelling.
+    """
+    return _default_converter().convert(text, strict=strict)
 
-        def replace_word(match: re.Match) -> Any:
-            """
-            Replace a word with its British English spelling.
 
-            Args:
-                match: The match object.
+def convert_many(texts: Iterable[str], strict: bool = False, converter: Optional[Converter] = None) -> list[str]:
+    """
+    Convert American English spelling to British English spelling in many separate texts.
 
-            Returns:
-                The word with its spelling converted to British English.
-            """
-            # The first group contains any leading punctuation/spaces
-            # The second group contains the word
-            # The third group contains any trailing punctuation/spaces
-            pre, word, post = match.groups()
+    Args:
+        texts: The texts to convert, such as records from a dataset.
+        strict: Whether to raise an exception if a word cannot be converted.
+        converter: Converter to use. Defaults to one for the current CONVERSION_IGNORE_LIST.
 
-            if should_skip_word(word, pre, post, match.start(), match.end()):
-                return match.group(0)
+    Returns:
+        The converted texts, in the same order.
+    """
+    if converter is None:
+        converter = _default_converter()
+    return converter.convert_many(texts, strict=strict)
 
-            if american_spelling_exists(word.lower()):
-                try:
-                    british = get_british_spelling(word.lower())
-                    british = preserve_capitalization(word, british)
-                    return pre + british + post
-                except Exception:
-                    if strict:
-                        raise
-            return match.group(0)
-
-        # Match any word surrounded by non-letter characters
-        # Group 1: Leading non-letters (including empty)
-        # Group 2: The word itself (only letters)
-        # Group 3: Trailing non-letters (including empty)
-        pattern = r"([^a-zA-Z]*?)([a-zA-Z]+)([^a-zA-Z]*?)"
-        return re.sub(pattern, replace_word, text)
-    except Exception:
-        if strict:
-            raise
-        return text
 
+def iter_convert_many(
+    texts: Iterable[str], strict: bool = False, converter: Optional[Converter] = None
+) -> Generator[str, None, None]:
+    """
+    Convert American English spelling to British English spelling in many separate texts, lazily.
+
+    Texts are read and converted in batches, so output lags input by up to one batch.
 
-def convert_stream(stream: Iterable[str], strict: bool = False) -> Generator[str, None, None]:
+    Args:
+        texts: The texts to convert, such as records from a dataset.
+        strict: Whether to raise an exception if a word cannot be converted.
+        converter: Converter to use. Defaults to one for the current CONVERSION_IGNORE_LIST.
+
+    Yields:
+        The converted texts, in the same order.
+    """
+    if converter is None:
+        converter = _default_converter()
+    yield from converter.iter_convert_many(texts, strict=strict)
+
+
+def convert_stream(
+    stream: Iterable[str], strict: bool = False, converter: Optional[Converter] = None
+) -> Generator[str, None, None]:
     """
     Convert American English spelling to British English spelling in a streaming manner.
 
     Args:
         stream: An iterable of strings (like lines from a file).
         strict: Whether to raise an exception if a word cannot be converted.
+        converter: Converter to use. Defaults to one for the current CONVERSION_IGNORE_LIST.
 
     Yields:
         Converted lines of text.
     """
+    if converter is None:
+        converter = _default_converter()
     for line in stream:
-        yield convert_american_to_british_spelling(line, strict=strict)
+        yield converter.convert(line, strict=strict)
 
 
 def convert_file(
@@ -147,15 +964,25 @@ def convert_file(
     dst: Optional[Union[str, Path]] = None,
     strict: bool = False,
     check: bool = False,
+    cache: Optional[ConversionCache] = None,
+    converter: Optional[Converter] = None,
+    jobs: Optional[int] = None,
 ) -> bool:
     """
     Convert American English spelling to British English spelling in a file.
 
+    Files larger than 64 MB are converted a chunk of lines at a time, across worker processes, and
+    reassembled in order, with the same result as converting them whole.
+
     Args:
         src: Source file path.
         dst: Destination file path. If None, content is written back to source file.
         strict: Whether to raise an exception if a word cannot be converted.
         check: If True, only check if changes would be made without modifying files.
+        cache: Cache of files known to need no changes. Clean files are skipped and newly clean files recorded.
+        converter: Converter to use. Defaults to one for the current CONVERSION_IGNORE_LIST.
+        jobs: Number of worker processes to split a file larger than 64 MB across. Defaults to the
+            number of CPUs; 1 converts every file in this process.
 
     Returns:
         True if changes were made or would be made (if check=True), False otherwise.
@@ -163,34 +990,503 @@ def convert_file(
     src_path = Path(src)
     if not src_path.exists():
         raise FileNotFoundError()
+    if converter is None:
+        converter = _default_converter()
+
+    if cache is not None and cache.is_clean(src_path):
+        return False
+
+    size = src_path.stat().st_size
+    if size > _STREAMING_THRESHOLD:
+        if jobs is None:
+            jobs = os.cpu_count() or 1
+        if check:
+            return _check_file_mapped(src_path, strict, cache, converter, jobs)
+        return _convert_file_streaming(src_path, Path(src if dst is None else dst), strict, cache, converter, jobs)
+
+    content = _read_text(src_path)
+    modified, converted = _convert_content(src_path, content, strict, check, cache, converter, None)
+    if converted is not None:
+        _write_text(Path(src if dst is None else dst), converted)
+    return modified
+
 
-    with open(src_path, encoding="utf-8") as f:
+def _convert_content(
+    path: Path,
+    content: str,
+    strict: bool,
+    check: bool,
+    cache: Optional[ConversionCache],
+    converter: Converter,
+    find_spans: Optional[_SpanFinder],
+) -> tuple[bool, Optional[str]]:
+    """
+    Check or convert the content read from a file, recording the file in the cache if it needs no changes.
+
+    Args:
+        path: The file the content was read from, after calling cache.is_clean.
+        content: The file's content.
+        strict: Whether to raise an exception if a word cannot be converted.
+        check: If True, only check whether the content would change, stopping at the first word that would.
+        cache: Cache of files known to need no changes, if any.
+        converter: Converter to use.
+        find_spans: How to find the spans to convert, or None to convert all of the content.
+
+    Returns:
+        Tuple of (modified, converted): whether the content was or would be changed, and the content to
+        write back, which is None if checking or if nothing changed.
+    """
+    if cache is not None and cache.is_clean_content(path, content):
+        return False, None
+
+    converted = None
+    if find_spans is None:
+        with stats.phase("scan"):
+            if check:
+                modified = converter.needs_conversion(content, strict=strict)
+            else:
+                converted = converter.convert(content, strict=strict)
+                modified = converted != content
+    else:
+        try:
+            with stats.phase("scan"):
+                if check:
+                    modified = _spans_need_conversion(content, find_spans, converter, strict)
+                else:
+                    converted = _convert_spans(content, find_spans, converter, strict)
+                    modified = converted is not None
+        except (tokenize.TokenError, SyntaxError):
+            if strict:
+                raise
+            return False, None
+
+    if not modified:
+        if cache is not None:
+            cache.mark_clean(path, content)
+        return False, None
+    return True, converted
+
+
+def _read_text(path: Path) -> str:
+    """Read a UTF-8 text file, with universal newlines."""
+    with stats.phase("read"), open(path, encoding="utf-8") as f:
         content = f.read()
+        if stats.current is not None:
+            stats.count("bytes_read", os.fstat(f.fileno()).st_size)
+    return content
 
-    converted = convert_american_to_british_spelling(content, strict=strict)
 
-    # Check if changes were made
-    if content == converted:
-        return False
+def _read_file(path: Path) -> str:
+    """Read a UTF-8 text file as _read_text() does, without collecting stats, so that any thread can."""
+    with open(path, encoding="utf-8") as f:
+        return f.read()
 
-    # If check mode, return True to indicate changes would be made
-    if check:
-        return True
 
-    # Write changes
-    if dst is None:
-        dst = src
-    dst_path = Path(dst)
+def _write_text(path: Path, content: str) -> None:
+    """Write a UTF-8 text file, creating its directory if it doesn't exist."""
+    with stats.phase("write"):
+        _write_file(path, content)
+
+
+def _write_file(path: Path, content: str) -> None:
+    """Write a UTF-8 text file as _write_text() does, without collecting stats, so that any thread can."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def _file_replacements(
+    src_path: Path, strict: bool, find_spans: Optional[_SpanFinder], converter: Converter
+) -> tuple[str, list[tuple[int, int, str]]]:
+    """
+    Read a file and list the words that converting it would change.
+
+    Args:
+        src_path: The file to read.
+        strict: Whether to raise an exception if a word cannot be converted, or if the file cannot be tokenized.
+        find_spans: Finds the spans to look in, each on its own, or None to look in the whole file.
+        converter: Converter to use.
+
+    Returns:
+        The file's content, and tuples of (start, end, british) for each word that would change, in order.
+    """
+    content = _read_text(src_path)
+    with stats.phase("scan"):
+        return content, _content_replacements(content, strict, find_spans, converter)
+
+
+def _content_replacements(
+    content: str, strict: bool, find_spans: Optional[_SpanFinder], converter: Converter
+) -> list[tuple[int, int, str]]:
+    """List the words that converting a file's content would change, as _file_replacements() does."""
+    if find_spans is None:
+        return converter._replacements(content, strict)
+
+    # Each span is converted on its own, so its words are found the same way
+    replacements: list[tuple[int, int, str]] = []
+    try:
+        for start, end, ignore in find_spans(content):
+            replacements.extend(
+                (start + word_start, start + word_end, british)
+                for word_start, word_end, british in converter._replacements(content[start:end], strict, ignore)
+            )
+    except (tokenize.TokenError, SyntaxError):
+        if strict:
+            raise
+        return []
+    return replacements
+
+
+def find_file_hits(
+    src: Union[str, Path],
+    strict: bool = False,
+    comments_only: bool = False,
+    converter: Optional[Converter] = None,
+    markdown: bool = False,
+) -> list[Hit]:
+    """
+    Find the words that converting a file would change, and where they are, without modifying it.
+
+    Args:
+        src: Source file path.
+        strict: Whether to raise an exception if a word cannot be converted, or if the file cannot be tokenized.
+        comments_only: If True, treat the file as Python and only look in its comments and docstrings.
+        converter: Converter to use. Defaults to one for the current CONVERSION_IGNORE_LIST.
+        markdown: If True, treat the file as Markdown and only look in its prose.
 
-    # Create directory if it doesn't exist
-    dst_path.parent.mkdir(parents=True, exist_ok=True)
+    Returns:
+        A hit for each word, in order.
+    """
+    if converter is None:
+        converter = _default_converter()
+    content, replacements = _file_replacements(Path(src), strict, _span_finder(comments_only, markdown), converter)
+    return [hit for _, _, hit in _locate_hits(content, replacements)]
+
+
+def diff_file(
+    src: Union[str, Path],
+    strict: bool = False,
+    comments_only: bool = False,
+    converter: Optional[Converter] = None,
+    context: int = 3,
+    markdown: bool = False,
+) -> str:
+    """
+    Describe the changes converting a file would make as a unified diff, without modifying it.
+
+    The diff is built from the words that would change, so unchanged parts of the file are never compared.
 
-    with open(dst_path, "w", encoding="utf-8") as f:
-        f.write(converted)
+    Args:
+        src: Source file path.
+        strict: Whether to raise an exception if a word cannot be converted, or if the file cannot be tokenized.
+        comments_only: If True, treat the file as Python and only convert its comments and docstrings.
+        converter: Converter to use. Defaults to one for the current CONVERSION_IGNORE_LIST.
+        context: Number of unchanged lines to show around each change.
+        markdown: If True, treat the file as Markdown and only convert its prose.
 
+    Returns:
+        The diff, or an empty string if nothing would change.
+    """
+    if converter is None:
+        converter = _default_converter()
+    content, replacements = _file_replacements(Path(src), strict, _span_finder(comments_only, markdown), converter)
+    return _unified_diff(content, list(_locate_hits(content, replacements)), str(src), context)
+
+
+def _unified_diff(content: str, located: list[tuple[int, int, Hit]], label: str, context: int) -> str:
+    """
+    Format located replacements as a unified diff of the lines they change.
+
+    Args:
+        content: The original text.
+        located: Tuples of (start, end, hit) for each replacement, in order.
+        label: Name of the file in the diff's header.
+        context: Number of unchanged lines to show around each change.
+
+    Returns:
+        The diff, or an empty string if there are no replacements.
+    """
+    changed = _changed_lines(content, located)
+    if not changed:
+        return ""
+
+    # Changes separated by no more than twice the context share a hunk
+    hunks: list[list[int]] = []
+    for number in changed:
+        if hunks and number - hunks[-1][-1] - 1 <= 2 * context:
+            hunks[-1].append(number)
+        else:
+            hunks.append([number])
+
+    output = [f"--- {label}\n", f"+++ {label}\n"]
+    for hunk in hunks:
+        output.extend(_format_hunk(content, changed, hunk[0], hunk[-1], context))
+    return "".join(output)
+
+
+def _changed_lines(content: str, located: list[tuple[int, int, Hit]]) -> dict[int, tuple[int, str]]:
+    """
+    Apply located replacements to the lines they are on.
+
+    Returns:
+        For each changed line number, in order, a tuple of (offset of the line's start, converted line).
+    """
+    changed: dict[int, tuple[int, str]] = {}
+    for number, group in groupby(located, key=lambda item: item[2].line):
+        items = list(group)
+        line_start = position = items[0][0] - items[0][2].column + 1
+        pieces = []
+        for start, end, hit in items:
+            pieces.append(content[position:start])
+            pieces.append(hit.british)
+            position = end
+        pieces.append(content[position : _next_line(content, position)])
+        changed[number] = (line_start, "".join(pieces))
+    return changed
+
+
+def _format_hunk(content: str, changed: dict[int, tuple[int, str]], first: int, last: int, context: int) -> list[str]:
+    """
+    Format the hunk of a unified diff covering changed lines from first to last, with context around them.
+
+    Replacing words never adds or removes lines, so the old and new sides of the hunk have the same range.
+    """
+    begin = changed[first][0]
+    start_line = first
+    for _ in range(context):
+        if begin == 0:
+            break
+        begin = content.rfind("\n", 0, begin - 1) + 1
+        start_line -= 1
+    end = _next_line(content, changed[last][0])
+    for _ in range(context):
+        if end >= len(content):
+            break
+        end = _next_line(content, end)
+
+    lines = _LINE_PATTERN.findall(content, begin, end)
+    line_range = str(start_line) if len(lines) == 1 else f"{start_line},{len(lines)}"
+    output = [f"@@ -{line_range} +{line_range} @@\n"]
+    # Runs of changed lines are shown as all their old lines followed by all their new ones
+    removed: list[str] = []
+    added: list[str] = []
+    for number, line in enumerate(lines, start_line):
+        if number in changed:
+            removed.append(_diff_line("-", line))
+            added.append(_diff_line("+", changed[number][1]))
+            continue
+        output.extend(removed)
+        output.extend(added)
+        removed.clear()
+        added.clear()
+        output.append(_diff_line(" ", line))
+    output.extend(removed)
+    output.extend(added)
+    return output
+
+
+def _diff_line(prefix: str, line: str) -> str:
+    """Format a line of a unified diff, marking a last line with no newline."""
+    if line.endswith("\n"):
+        return prefix + line
+    return f"{prefix}{line}\n\\ No newline at end of file\n"
+
+
+def _next_line(content: str, position: int) -> int:
+    """Return the offset just after the newline ending the line at position, or the end of the content."""
+    end = content.find("\n", position)
+    return len(content) if end < 0 else end + 1
+
+
+def _check_file_mapped(
+    src_path: Path, strict: bool, cache: Optional[ConversionCache], converter: Converter, jobs: int = 1
+) -> bool:
+    """
+    Check whether a large file needs converting by scanning it memory-mapped, without decoding it.
+
+    The file is never read into process memory: its pages are mapped from the page cache as they
+    are scanned, and the check stops at the first word that would change. Unlike the text path,
+    invalid UTF-8 outside the words examined is not reported.
+
+    Args:
+        src_path: Source file path.
+        strict: Whether to raise an exception if a word cannot be converted.
+        cache: Cache of files known to need no changes, updated if the file is clean.
+        converter: Converter to use.
+        jobs: Number of worker processes to scan ranges of lines in, each mapping the file itself.
+
+    Returns:
+        True if changes would be made, False otherwise.
+    """
+    with open(src_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        stats.count("bytes_read", len(data))
+        # Pages are read as they are scanned, so reading counts as scanning
+        with stats.phase("scan"):
+            if jobs > 1:
+                changed = _check_ranges_in_pool(
+                    src_path, _line_ranges(data, _PARALLEL_CHECK_SIZE), jobs, strict, converter
+                )
+            else:
+                changed = converter._buffer_needs_conversion(data, strict=strict)
+        if not changed and cache is not None:
+            # The digest of the raw bytes only differs from that of the decoded text for files with
+            # "\r" line endings, which then miss the cache when their stat changes
+            digest = content_hash()
+            digest.update(data)
+            cache.mark_clean_digest(src_path, digest.hexdigest())
+    return changed
+
+
+def _convert_file_streaming(
+    src_path: Path,
+    dst_path: Path,
+    strict: bool,
+    cache: Optional[ConversionCache],
+    converter: Converter,
+    jobs: int = 1,
+) -> bool:
+    """
+    Convert a large file in bounded chunks so memory use does not grow with the file size.
+
+    Converted text is written to a temporary file next to the destination, which replaces it
+    only if something changed.
+
+    Args:
+        src_path: Source file path.
+        dst_path: Destination file path, which may be the source.
+        strict: Whether to raise an exception if a word cannot be converted.
+        cache: Cache of files known to need no changes, updated if the file is clean.
+        converter: Converter to use.
+        jobs: Number of worker processes to convert chunks in.
+
+    Returns:
+        True if changes were made, False otherwise.
+    """
+    digest = content_hash()
+
+    def read_chunks(f: TextIO) -> Generator[str, None, None]:
+        while True:
+            with stats.phase("read"):
+                chunk = f.read(_STREAM_CHUNK_SIZE)
+            if not chunk:
+                return
+            data = chunk.encode("utf-8")
+            digest.update(data)
+            stats.count("bytes_read", len(data))
+            yield chunk
+
+    changed = False
+    with open(src_path, encoding="utf-8") as src:
+        if jobs > 1:
+            spans = _convert_line_spans_in_pool(_line_spans(read_chunks(src)), jobs, strict, converter)
+        else:
+            spans = converter._convert_chunk_spans(read_chunks(src), strict, ())
+
+        dst_path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=dst_path.parent, prefix=f".{dst_path.name}.", suffix=".tmp", delete=False
+        ) as tmp:
+            try:
+                with stats.phase("scan"):
+                    for original, converted in spans:
+                        changed = changed or original != converted
+                        with stats.phase("write"):
+                            tmp.write(converted)
+            except BaseException:
+                tmp.close()
+                os.unlink(tmp.name)
+                raise
+
+    if not changed:
+        os.unlink(tmp.name)
+        if cache is not None:
+            cache.mark_clean_digest(src_path, digest.hexdigest())
+        return False
+
+    shutil.copymode(src_path, tmp.name)
+    os.replace(tmp.name, dst_path)
     return True
 
 
+def _line_ranges(data: Union[bytes, mmap.mmap], size: int) -> list[tuple[int, int]]:
+    """Split encoded text into ranges of whole lines of at least size bytes, except for the last."""
+    ranges = []
+    start = 0
+    while start < len(data):
+        end = data.find(b"\n", min(start + size, len(data))) + 1 or len(data)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def _check_ranges_in_pool(
+    src_path: Path, ranges: list[tuple[int, int]], jobs: int, strict: bool, converter: Converter
+) -> bool:
+    """Check ranges of a file across worker processes, stopping at the first range that would change."""
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    initargs = (converter, None, stats.current is not None)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=initargs) as executor:
+        futures = [executor.submit(_check_range_in_worker, src_path, start, end, strict) for start, end in ranges]
+        for future in as_completed(futures):
+            changed, worker_stats = future.result()
+            _merge_worker_stats(worker_stats)
+            if changed:
+                executor.shutdown(cancel_futures=True)
+                return True
+    return False
+
+
+def _check_range_in_worker(src_path: Path, start: int, end: int, strict: bool) -> tuple[bool, Optional[dict[str, Any]]]:
+    """Check a range of a file in a worker process, mapping the whole file so the rules see its context."""
+    converter = _worker_converter if _worker_converter is not None else _default_converter()
+    with open(src_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        changed = converter._buffer_needs_conversion(data, strict, start, end)
+    return changed, _take_worker_stats()
+
+
+def _convert_line_spans_in_pool(
+    spans: Iterable[tuple[str, int, int]], jobs: int, strict: bool, converter: Converter
+) -> Generator[tuple[str, str], None, None]:
+    """
+    Convert spans of complete lines from _line_spans() across worker processes, as Converter._convert_chunk_spans() does.
+
+    Each span is sent with the lines it continues, which are all the context the rules look at, so
+    converting spans separately gives the same result as converting the whole text.
+
+    Yields:
+        Each span before and after conversion, in order.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    initargs = (converter, None, stats.current is not None)
+    pending: deque[tuple[str, Future]] = deque()
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=initargs) as executor:
+        for text, start, end in spans:
+            pending.append((text[start:end], executor.submit(_convert_line_span_in_worker, text, start, end, strict)))
+            # A couple of spans per worker keep them all busy, while bounding the text held in memory
+            if len(pending) >= 2 * jobs:
+                yield _finish_line_span(*pending.popleft())
+        while pending:
+            yield _finish_line_span(*pending.popleft())
+
+
+def _finish_line_span(original: str, future: "Future") -> tuple[str, str]:
+    """Wait for a span converted in a worker process, returning it before and after conversion."""
+    converted, worker_stats = future.result()
+    _merge_worker_stats(worker_stats)
+    return original, original if converted is None else converted
+
+
+def _convert_line_span_in_worker(
+    text: str, start: int, end: int, strict: bool
+) -> tuple[Optional[str], Optional[dict[str, Any]]]:
+    """Convert a span of lines in a worker process, returning None rather than sending back an unchanged span."""
+    converter = _worker_converter if _worker_converter is not None else _default_converter()
+    converted = converter._convert_line_span(text, start, end, strict, ())
+    return None if converted == text[start:end] else converted, _take_worker_stats()
+
+
 def _extract_parameter_names_from_docstring(content: str) -> list[str]:
     """
     Extract parameter names from a docstring's Args section.
@@ -228,163 +1524,1040 @@ def _extract_parameter_names_from_docstring(content: str) -> list[str]:
 
 def _create_parameter_ignore_list(parameter_names: list[str]) -> dict[str, str]:
     """
-    Create an ignore_list dictionary from parameter names.
+    Create an ignore_list dictionary from parameter names.
+
+    Args:
+        parameter_names: List of parameter names
+
+    Returns:
+        Dictionary of words to ignore
+    """
+    from breame.spelling import american_spelling_exists
+
+    temp_ignore_list = {}
+    for param in parameter_names:
+        # For each parameter, check if it contains words that would be converted
+        param_words = re.findall(r"[a-zA-Z]+", param)
+        for word in param_words:
+            if american_spelling_exists(word.lower()):
+                temp_ignore_list[word.lower()] = word.lower()
+
+    return temp_ignore_list
+
+
+def _find_comments_and_docstrings(content: str) -> list[tuple[int, int, bool]]:
+    """
+    Find the comments and docstrings in Python source in a single tokenize pass.
+
+    A docstring is a string literal that makes up a whole statement, which covers module,
+    class and function docstrings as well as attribute docstrings. Bytes and f-strings are
+    never treated as docstrings.
+
+    Args:
+        content: Python source code.
+
+    Returns:
+        (start, end, is_docstring) offsets of each comment and docstring, in order.
+
+    Raises:
+        tokenize.TokenError: If the source cannot be tokenized.
+        SyntaxError: If the source has inconsistent indentation.
+    """
+    # Offset of the start of each line tokenize has read so far
+    line_offsets = [0]
+    lines = io.StringIO(content)
+
+    def readline() -> str:
+        line = lines.readline()
+        line_offsets.append(line_offsets[-1] + len(line))
+        return line
+
+    def offset(position: tuple[int, int]) -> int:
+        row, column = position
+        return line_offsets[row - 1] + column
+
+    spans = []
+    statement_start = True
+    # A string that started a statement, kept until we know whether it is the whole statement
+    candidate: Optional[tuple[int, int, bool]] = None
+    for token in tokenize.generate_tokens(readline):
+        if token.type == tokenize.COMMENT:
+            spans.append((offset(token.start), offset(token.end), False))
+            continue
+        if token.type == tokenize.NL:
+            continue
+        if candidate is not None and token.type in (tokenize.NEWLINE, tokenize.ENDMARKER):
+            spans.append(candidate)
+        candidate = None
+        if statement_start and token.type == tokenize.STRING and not _string_prefix(token.string).lower().strip("ru"):
+            candidate = (offset(token.start), offset(token.end), True)
+        statement_start = token.type in (tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT)
+
+    # A trailing comment on a docstring's line is found before the docstring is confirmed
+    spans.sort()
+    return spans
+
+
+def _string_prefix(literal: str) -> str:
+    """Return the prefix letters (r, b, f, u) of a string literal."""
+    return literal[: len(literal) - len(literal.lstrip("rRbBfFuU"))]
+
+
+def _prose_spans(content: str) -> Generator[tuple[int, int, Collection[str]], None, None]:
+    """
+    Find the text of the comments and docstrings in Python source, without their markers or quotes.
+
+    The source is tokenized in full before anything is yielded, so invalid source always fails
+    before any conversion starts.
+
+    Args:
+        content: Python source code.
+
+    Yields:
+        Tuples of (start, end, ignore) for each comment or docstring, where ignore holds words
+        from the parameter names of a docstring's Args section, which stay unchanged.
+    """
+    for start, end, is_docstring in _find_comments_and_docstrings(content):
+        if not is_docstring:
+            yield start + 1, end, frozenset()
+            continue
+        literal = content[start:end]
+        opening_length = len(_string_prefix(literal))
+        quote = literal[opening_length : opening_length + 3]
+        if quote not in ('"""', "'''"):
+            quote = quote[0]
+        opening_length += len(quote)
+        docstring = literal[opening_length : -len(quote)]
+
+        # Words from parameter names are ignored throughout this docstring only
+        parameter_names = _extract_parameter_names_from_docstring(docstring)
+        yield start + opening_length, end - len(quote), _create_parameter_ignore_list(parameter_names).keys()
+
+
+def _markdown_prose_spans(content: str) -> Generator[tuple[int, int, Collection[str]], None, None]:
+    """Find the prose in a Markdown document, leaving out code, URLs, link destinations and HTML."""
+    for start, end in _markdown_spans(content):
+        yield start, end, _NO_IGNORE
+
+
+def _span_finder(comments_only: bool, is_markdown: bool) -> Optional[_SpanFinder]:
+    """Return the function that finds the spans to convert, or None to convert the whole content."""
+    if comments_only:
+        return _prose_spans
+    if is_markdown:
+        return _markdown_prose_spans
+    return None
+
+
+def _convert_spans(content: str, find_spans: _SpanFinder, converter: Converter, strict: bool) -> Optional[str]:
+    """
+    Convert each span of content on its own, splicing them between the untouched text around them.
+
+    Args:
+        content: The text to convert.
+        find_spans: Finds the spans to convert, as _prose_spans() does.
+        converter: Converter to use.
+        strict: Whether to raise an exception if a word cannot be converted.
+
+    Returns:
+        The converted content, or None if nothing changed.
+    """
+    pieces = []
+    position = 0
+    for start, end, ignore in find_spans(content):
+        original = content[start:end]
+        converted = converter.convert(original, strict=strict, ignore=ignore)
+        if converted != original:
+            pieces.append(content[position:start])
+            pieces.append(converted)
+            position = end
+
+    if not pieces:
+        return None
+    pieces.append(content[position:])
+    return "".join(pieces)
+
+
+def _spans_need_conversion(content: str, find_spans: _SpanFinder, converter: Converter, strict: bool) -> bool:
+    """Check whether any span of content would change, stopping at the first that would."""
+    return any(
+        converter.needs_conversion(content[start:end], strict=strict, ignore=ignore)
+        for start, end, ignore in find_spans(content)
+    )
+
+
+def _convert_file_spans(
+    src: Union[str, Path],
+    dst: Optional[Union[str, Path]],
+    strict: bool,
+    check: bool,
+    cache: Optional[ConversionCache],
+    converter: Optional[Converter],
+    find_spans: _SpanFinder,
+) -> bool:
+    """Convert only the spans of a file that find_spans finds, as convert_python_comments_only() does."""
+    src_path = Path(src)
+    if not src_path.exists():
+        raise FileNotFoundError()
+    if converter is None:
+        converter = _default_converter()
+
+    if cache is not None and cache.is_clean(src_path):
+        return False
+
+    content = _read_text(src_path)
+    modified, converted = _convert_content(src_path, content, strict, check, cache, converter, find_spans)
+    if converted is not None:
+        _write_text(Path(src if dst is None else dst), converted)
+    return modified
+
+
+def convert_python_comments_only(
+    src: Union[str, Path],
+    dst: Optional[Union[str, Path]] = None,
+    strict: bool = False,
+    check: bool = False,
+    cache: Optional[ConversionCache] = None,
+    converter: Optional[Converter] = None,
+) -> bool:
+    """
+    Convert American English spelling to British English spelling only in Python comments and docstrings.
+
+    Files that cannot be tokenized as Python are left unchanged.
+
+    Args:
+        src: Source file path.
+        dst: Destination file path. If None, content is written back to source file.
+        strict: Whether to raise an exception if a word cannot be converted, or if the file cannot be tokenized.
+        check: If True, only check if changes would be made without modifying files.
+        cache: Cache of files known to need no changes. Clean files are skipped and newly clean files recorded.
+        converter: Converter to use. Defaults to one for the current CONVERSION_IGNORE_LIST.
+
+    Returns:
+        True if changes were made or would be made (if check=True), False otherwise.
+    """
+    return _convert_file_spans(src, dst, strict, check, cache, converter, _prose_spans)
+
+
+def convert_markdown_file(
+    src: Union[str, Path],
+    dst: Optional[Union[str, Path]] = None,
+    strict: bool = False,
+    check: bool = False,
+    cache: Optional[ConversionCache] = None,
+    converter: Optional[Converter] = None,
+) -> bool:
+    """
+    Convert American English spelling to British English spelling only in the prose of a Markdown file.
+
+    Front matter, code blocks, inline code, URLs, link destinations and HTML are left unchanged, and are
+    skipped without being scanned for words. Each run of prose between them is converted on its own.
+
+    Args:
+        src: Source file path.
+        dst: Destination file path. If None, content is written back to source file.
+        strict: Whether to raise an exception if a word cannot be converted.
+        check: If True, only check if changes would be made without modifying files.
+        cache: Cache of files known to need no changes. Clean files are skipped and newly clean files recorded.
+        converter: Converter to use. Defaults to one for the current CONVERSION_IGNORE_LIST.
+
+    Returns:
+        True if changes were made or would be made (if check=True), False otherwise.
+    """
+    return _convert_file_spans(src, dst, strict, check, cache, converter, _markdown_prose_spans)
+
+
+def _file_span_finder(path: Path, comments_only: bool, markdown: bool) -> Optional[_SpanFinder]:
+    """Return how to find the spans to convert in a file, going by its extension, or None to convert all of it."""
+    return _span_finder(path.suffix == ".py" and comments_only, markdown and path.suffix.lower() in MARKDOWN_SUFFIXES)
+
+
+class _SkippedFile(Exception):
+    """Raised for a file that is skipped rather than converted, with the reason as its message."""
+
+
+def _sniff_file(path: Path, max_file_size: Optional[int] = None) -> None:
+    """
+    Check that a file looks like UTF-8 text, reading no more than its first few KB.
+
+    Args:
+        path: The file to check.
+        max_file_size: If given, the largest file in bytes to convert.
+
+    Raises:
+        _SkippedFile: If the file is larger than max_file_size, or its start has a NUL byte or is not UTF-8.
+    """
+    with stats.phase("read"), open(path, "rb") as f:
+        _sniff(f, os.fstat(f.fileno()).st_size, max_file_size)
+
+
+def _sniff(f: BinaryIO, size: int, max_file_size: Optional[int]) -> bytes:
+    """Check the start of a file open for reading, as _sniff_file() does, returning the bytes read."""
+    if max_file_size is not None and size > max_file_size:
+        raise _SkippedFile(f"larger than {max_file_size} bytes")  # noqa: TRY003
+    head = f.read(_SNIFF_SIZE)
+    if b"\0" in head:
+        raise _SkippedFile("binary")
+    try:
+        # A character cut off at the end of what was read is not an error unless the file ends there
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=len(head) >= size)
+    except UnicodeDecodeError:
+        raise _SkippedFile("not UTF-8") from None  # noqa: TRY003
+    return head
+
+
+def _process_file(
+    path: Path,
+    strict: bool,
+    check: bool,
+    comments_only: bool,
+    cache: Optional[ConversionCache] = None,
+    converter: Optional[Converter] = None,
+    markdown: bool = True,
+    jobs: Optional[int] = None,
+    max_file_size: Optional[int] = None,
+) -> bool:
+    """
+    Process a single file for conversion.
+
+    Args:
+        path: File path to process
+        strict: Whether to raise errors on conversion failures
+        check: Whether to check only without modifying
+        comments_only: Whether to convert only comments in Python files
+        cache: Cache of files known to need no changes
+        converter: Converter to use
+        markdown: Whether to convert only the prose in Markdown files
+        jobs: Number of worker processes to split a large file across, as in convert_file()
+        max_file_size: If given, the largest file in bytes to convert
+
+    Returns:
+        True if the file was modified or would be modified
+
+    Raises:
+        _SkippedFile: If the file is too large, or is not UTF-8 text.
+    """
+    # Only files once read as text are recorded as clean, so those need no sniffing
+    if cache is not None and cache.is_clean(path):
+        modified = False
+    else:
+        _sniff_file(path, max_file_size)
+        find_spans = _file_span_finder(path, comments_only, markdown)
+        try:
+            modified = _convert_path(path, strict, check, cache, converter, find_spans, jobs)
+        except UnicodeDecodeError:
+            # The sniff only decodes the start of the file
+            raise _SkippedFile("not UTF-8") from None  # noqa: TRY003
+    stats.count("files")
+    if modified:
+        stats.count("files_changed")
+    return modified
+
+
+def _convert_path(
+    path: Path,
+    strict: bool,
+    check: bool,
+    cache: Optional[ConversionCache],
+    converter: Optional[Converter],
+    find_spans: Optional[_SpanFinder],
+    jobs: Optional[int],
+) -> bool:
+    """Convert or check a file in place, whole or only the spans find_spans finds."""
+    if find_spans is None:
+        return convert_file(path, strict=strict, check=check, cache=cache, converter=converter, jobs=jobs)
+    return _convert_file_spans(path, None, strict, check, cache, converter, find_spans)
+
+
+class _PathFilter:
+    """
+    Decides which files and directories to visit when walking a directory.
+
+    Include patterns are matched against file names; a bare extension such as ".md" is
+    shorthand for "*.md". Exclude patterns without a slash (e.g. "node_modules", "*.min.md")
+    are matched against the name of every file and directory, and patterns with a slash
+    (e.g. "docs/generated/") against the path relative to the walk's root, and the path as it
+    is built from the root, so that both "docs/generated" and "myproject/docs/generated" work
+    however the root was written.
+    """
+
+    def __init__(self, include: Iterable[str], exclude: Iterable[str]) -> None:
+        include_globs = [f"*{pattern}" if _is_extension(pattern) else pattern for pattern in include]
+        exclude_names = []
+        exclude_paths = []
+        for pattern in exclude:
+            pattern = pattern.rstrip("/\\")
+            if not pattern:
+                continue
+            if "/" in pattern or os.sep in pattern:
+                exclude_paths.append(os.path.normpath(pattern))
+            else:
+                exclude_names.append(pattern)
+        self._include = _compile_globs(include_globs)
+        self._exclude_name = _compile_globs(exclude_names)
+        self._exclude_path = _compile_globs(exclude_paths)
+        self._has_exclude_paths = bool(exclude_paths)
+
+    def includes(self, name: str) -> bool:
+        """Check whether a file with this name should be processed."""
+        return self._include.match(name) is not None
+
+    def excludes(self, name: str, path: str, root: str) -> bool:
+        """Check whether a file or directory found while walking root should be skipped."""
+        if self._exclude_name.match(name):
+            return True
+        if not self._has_exclude_paths:
+            return False
+        path = os.path.normpath(path)
+        return bool(self._exclude_path.match(path) or self._exclude_path.match(os.path.relpath(path, root)))
+
+
+def _is_extension(pattern: str) -> bool:
+    """Check whether an include pattern is a bare file extension such as ".py"."""
+    return pattern.startswith(".") and not any(char in pattern for char in "*?[/")
+
+
+def _compile_globs(patterns: list[str]) -> re.Pattern[str]:
+    """Compile glob patterns into a single regex, which never matches if there are no patterns."""
+    if not patterns:
+        return re.compile("(?!)")
+    return re.compile("|".join(fnmatch.translate(pattern) for pattern in patterns))
+
+
+def _walk_directory(root: str, path_filter: _PathFilter) -> Generator[Path, None, None]:
+    """
+    Yield the files to process under a directory, without descending into excluded directories.
+
+    Entries are visited in name order so that runs over the same tree see files in the same order.
+
+    Args:
+        root: The directory to walk.
+        path_filter: Which files and directories to visit.
+
+    Yields:
+        Paths of the included files.
+    """
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            continue
+
+        subdirectories = []
+        for entry in entries:
+            if path_filter.excludes(entry.name, entry.path, root):
+                continue
+            if entry.is_dir():
+                # Like os.walk, don't follow symlinks to directories
+                if not entry.is_symlink():
+                    subdirectories.append(entry.path)
+            elif path_filter.includes(entry.name):
+                yield Path(entry.path)
+        pending.extend(reversed(subdirectories))
+
+
+def _git_files(root: str, path_filter: _PathFilter) -> Optional[list[Path]]:
+    """
+    List the files to process under a directory that are not ignored by git.
 
     Args:
-        parameter_names: List of parameter names
+        root: The directory to list.
+        path_filter: Which files and directories to include.
 
     Returns:
-        Dictionary of words to ignore
+        Paths of the included files, or None if the directory is not in a git work tree.
     """
-    temp_ignore_list = {}
-    for param in parameter_names:
-        # For each parameter, check if it contains words that would be converted
-        param_words = re.findall(r"[a-zA-Z]+", param)
-        for word in param_words:
-            if american_spelling_exists(word.lower()):
-                temp_ignore_list[word.lower()] = word.lower()
+    try:
+        names = _git_names(root, ["ls-files", "-z", "--cached", "--others", "--exclude-standard"])
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return _filter_git_names(root, names, path_filter)
 
-    return temp_ignore_list
 
+def _git_names(root: str, args: list[str]) -> list[str]:
+    """Run a git command in a directory and return the NUL-separated paths it prints."""
+    result = subprocess.run(["git", *args], cwd=root, capture_output=True, check=True)  # noqa: S603, S607
+    return [os.fsdecode(name) for name in result.stdout.split(b"\0") if name]
 
-def _convert_with_ignore_list(content: str, temp_ignore_list: dict[str, str], strict: bool = False) -> str:
+
+def _filter_git_names(root: str, names: Iterable[str], path_filter: _PathFilter) -> list[Path]:
     """
-    Convert content with a temporary ignore list.
+    Pick the files to process from paths listed by git.
 
     Args:
-        content: Text to convert
-        temp_ignore_list: Dictionary of words to temporarily ignore
-        strict: Whether to raise exceptions on conversion errors
+        root: The directory the paths are relative to.
+        names: Paths listed by git, relative to root.
+        path_filter: Which files and directories to include.
 
     Returns:
-        Converted content
+        Paths of the included files that exist, in name order.
     """
-    # Temporarily add our parameter-derived words to the ignore_list
-    original_ignore_list = CONVERSION_IGNORE_LIST.copy()
-    for word, keep_as in temp_ignore_list.items():
-        if word not in CONVERSION_IGNORE_LIST:
-            CONVERSION_IGNORE_LIST[word] = keep_as
+    files = []
+    # Whether each directory (by path relative to root) is excluded
+    excluded_directories: dict[str, bool] = {"": False}
+    for relative in sorted(names):
+        parent, name = os.path.split(relative)
+        if _is_excluded_directory(root, parent, path_filter, excluded_directories):
+            continue
+        path = os.path.join(root, relative)
+        # Tracked files can be missing from the work tree; submodules are listed as directories
+        if not path_filter.excludes(name, path, root) and path_filter.includes(name) and os.path.isfile(path):
+            files.append(Path(path))
+    return files
+
+
+def _is_excluded_directory(root: str, relative: str, path_filter: _PathFilter, known: dict[str, bool]) -> bool:
+    """Check whether a directory below root, or any directory above it, is excluded."""
+    if relative not in known:
+        parent, name = os.path.split(relative)
+        known[relative] = _is_excluded_directory(root, parent, path_filter, known) or path_filter.excludes(
+            name, os.path.join(root, relative), root
+        )
+    return known[relative]
 
-    # Convert the content with our expanded ignore_list
-    converted_content = convert_american_to_british_spelling(content, strict=strict)
 
-    # Restore the original ignore_list
-    CONVERSION_IGNORE_LIST.clear()
-    CONVERSION_IGNORE_LIST.update(original_ignore_list)
+class GitError(Exception):
+    """Raised when git cannot list the files changed in a directory."""
 
-    return str(converted_content)
+    def __init__(self, directory: str, reason: str) -> None:
+        super().__init__(f"Could not list changed files in {directory}: {reason}")
+        self.directory = directory
+        self.reason = reason
 
 
-def convert_python_comments_only(
-    src: Union[str, Path],
-    dst: Optional[Union[str, Path]] = None,
-    strict: bool = False,
-    check: bool = False,
-) -> bool:
+class _GitChanges:
+    """
+    The files git reports as changed, listed at most once per directory.
+
+    With changed_since alone, files that differ between the work tree and that revision are changed,
+    as are untracked files that are not ignored. With staged, files whose staged content differs
+    from HEAD (or from changed_since, if given) are changed. Deleted files are never listed.
     """
-    Convert American English spelling to British English spelling only in Python comments and docstrings.
+
+    def __init__(self, changed_since: Optional[str] = None, staged: bool = False) -> None:
+        self.changed_since = changed_since
+        self.staged = staged
+        self._listings: dict[str, set[str]] = {}
+
+    def names(self, directory: str) -> set[str]:
+        """
+        List the changed files below a directory.
+
+        Args:
+            directory: The directory to list, which must be inside a git work tree.
+
+        Returns:
+            Paths of the changed files, relative to directory.
+
+        Raises:
+            GitError: If git cannot be run, the directory is not in a work tree or the revision is unknown.
+        """
+        key = os.path.abspath(directory)
+        if key not in self._listings:
+            # Never let the revision be read as an option
+            if self.changed_since is not None and (not self.changed_since or self.changed_since.startswith("-")):
+                raise GitError(directory, f"invalid revision {self.changed_since!r}")
+            diff = ["diff", "--name-only", "-z", "--relative", "--diff-filter=d"]
+            if self.staged:
+                diff.append("--cached")
+            if self.changed_since is not None:
+                diff.append(self.changed_since)
+            try:
+                names = set(_git_names(directory, [*diff, "--"]))
+                if self.changed_since is not None and not self.staged:
+                    names.update(_git_names(directory, ["ls-files", "-z", "--others", "--exclude-standard"]))
+            except OSError as error:
+                raise GitError(directory, str(error)) from error
+            except subprocess.CalledProcessError as error:
+                raise GitError(directory, error.stderr.decode(errors="replace").strip()) from error
+            self._listings[key] = names
+        return self._listings[key]
+
+
+def _in_shard(relative_path: str, shard: tuple[int, int]) -> bool:
+    """Check whether a file belongs to shard (index, count), by the CRC-32 of its relative path with forward slashes."""
+    index, count = shard
+    return zlib.crc32(relative_path.encode("utf-8")) % count == index - 1
+
+
+def _check_shard(shard: tuple[int, int]) -> None:
+    """Raise ValueError unless shard is an (index, count) pair with 1 <= index <= count."""
+    index, count = shard
+    if not 1 <= index <= count:
+        raise ValueError(f"shard index must be from 1 to {count}, not {index}")  # noqa: TRY003
+
+
+def _collect_files(
+    paths: list[Union[str, Path]],
+    path_filter: _PathFilter,
+    respect_gitignore: bool = False,
+    changes: Optional[_GitChanges] = None,
+    shard: Optional[tuple[int, int]] = None,
+) -> list[Path]:
+    """
+    Expand files and directories into the list of files to process.
+
+    Files given explicitly are always processed, unless changes is given and they have not changed;
+    the filter only applies to files found in directories.
 
     Args:
-        src: Source file path.
-        dst: Destination file path. If None, content is written back to source file.
-        strict: Whether to raise an exception if a word cannot be converted.
-        check: If True, only check if changes would be made without modifying files.
+        paths: list of file and directory paths.
+        path_filter: Which files and directories to visit when walking directories.
+        respect_gitignore: Whether to skip files ignored by git, for directories inside a git work tree.
+        changes: If given, only process files git reports as changed, listing directories with git
+            instead of walking them.
+        shard: If given as (index, count), only keep the files in shard index of count, counting from 1.
+            Files found in a directory are assigned by their path relative to it, and files given
+            explicitly by their path as given, so every machine assigns the same files to a shard.
 
     Returns:
-        True if changes were made or would be made (if check=True), False otherwise.
+        The files to process, in walk order.
     """
-    src_path = Path(src)
-    if not src_path.exists():
-        raise FileNotFoundError()
+    files: list[Path] = []
+    for path_str in paths:
+        path = Path(path_str)
 
-    # Read the file content
-    with open(src_path, encoding="utf-8") as f:
-        content = f.read()
+        if path.is_file():
+            if (changes is None or path.name in changes.names(str(path.parent))) and (
+                shard is None or _in_shard(path.as_posix(), shard)
+            ):
+                files.append(path)
+            continue
+        if changes is not None and path.is_dir():
+            found: Iterable[Path] = _filter_git_names(str(path), changes.names(str(path)), path_filter)
+        elif path.is_dir():
+            git_files = _git_files(str(path), path_filter) if respect_gitignore else None
+            found = _walk_directory(str(path), path_filter) if git_files is None else git_files
+        else:
+            continue
+        if shard is not None:
+            found = (file for file in found if _in_shard(file.relative_to(path).as_posix(), shard))
+        files.extend(found)
+
+    return files
 
-    # Use a simpler approach with regular expressions for comments
-    modified_content = content
-    modified = False
 
-    # Handle single-line comments (# comments)
-    comment_pattern = r"(#[^\n]*)"
+def _cache_settings(converter: Converter, strict: bool, comments_only: bool, markdown: bool) -> dict[str, Any]:
+    """Return everything besides file content that affects whether a file is clean."""
+    return {
+        # Changes when uwotm8 or breame is upgraded, without the cost of reading package metadata
+        "sources": source_fingerprint("breame.data.spelling_constants", __name__, "uwotm8.markdown"),
+        "ignore": sorted(converter.ignore),
+        "strict": strict,
+        "comments_only": comments_only,
+        "markdown": markdown,
+    }
 
-    def replace_comment(match: re.Match[str]) -> str:
-        nonlocal modified
-        comment = match.group(1)
-        prefix = "#"
-        comment_text = comment[len(prefix) :]
-        converted_text = convert_american_to_british_spelling(comment_text, strict=strict)
 
-        if converted_text != comment_text:
-            modified = True
-            return prefix + str(converted_text)
-        return comment
+# Each worker process's copy of the parent's converter and cache, set by _init_worker
+_worker_converter: Optional[Converter] = None
+_worker_cache: Optional[ConversionCache] = None
 
-    modified_content = re.sub(comment_pattern, replace_comment, modified_content)
 
-    # Handle docstrings with special handling for parameter names in docstring Args
-    # First, we'll use regex to find triple-quoted strings
-    docstring_pattern = r'("""[\s\S]*?"""|"""[\s\S]*?""")'
+def _init_worker(converter: Converter, cache: Optional[ConversionCache], collect_stats: bool = False) -> None:
+    """
+    Prepare a worker process to convert files.
 
-    def replace_docstring(match: re.Match[str]) -> str:
-        nonlocal modified
-        docstring = match.group(1)
-        quote_style = '"""' if docstring.startswith('"""') else "'''"
+    Args:
+        converter: The parent process's converter. Forked workers inherit its compiled tables.
+        cache: The parent process's cache, if caching is enabled.
+        collect_stats: Whether the parent is collecting stats, which the worker then collects for it.
+    """
+    global _worker_converter, _worker_cache
+    _worker_converter = converter
+    _worker_cache = cache
+    # Forked workers inherit the parent's stats, which must not be sent back to it
+    stats.install(stats.Stats() if collect_stats else None)
 
-        # Extract the content between the triple quotes
-        content = docstring[3:-3]
 
-        # Get parameter names from docstring
-        parameter_names = _extract_parameter_names_from_docstring(content)
+def _take_worker_stats() -> Optional[dict[str, Any]]:
+    """Return the stats a worker process collected since it last sent them, if it collects any."""
+    return stats.current.take() if stats.current is not None else None
 
-        # Create ignore_list from parameter names
-        temp_ignore_list = _create_parameter_ignore_list(parameter_names)
 
-        # Convert with the temporary ignore_list
-        converted_content = _convert_with_ignore_list(content, temp_ignore_list, strict)
+def _merge_worker_stats(data: Optional[dict[str, Any]]) -> None:
+    """Add stats sent by a worker process to those being collected."""
+    if data is not None and stats.current is not None:
+        stats.current.merge(data)
 
-        if converted_content != content:
-            modified = True
-            return quote_style + converted_content + quote_style
-        return docstring
 
-    modified_content = re.sub(docstring_pattern, replace_docstring, modified_content)
+def _process_file_in_worker(
+    path: Path,
+    strict: bool,
+    check: bool,
+    comments_only: bool,
+    markdown: bool = True,
+    max_file_size: Optional[int] = None,
+) -> tuple[bool, Optional[list], Optional[dict[str, Any]], Optional[str]]:
+    """
+    Process a file in a worker process.
 
-    # If no changes were made or we're just checking, return early
-    if not modified or check:
-        return modified
+    Returns:
+        Tuple of (modified, entry, stats, skipped): whether the file was or would be modified, any cache
+        entry recorded for it, any stats collected, and why the file was skipped, if it was.
+    """
+    skipped = None
+    try:
+        # Workers already run in parallel, so they never start pools of their own
+        modified = _process_file(
+            path, strict, check, comments_only, _worker_cache, _worker_converter, markdown, 1, max_file_size
+        )
+    except _SkippedFile as error:
+        modified, skipped = False, str(error)
+    entry = _worker_cache.take_update(path) if _worker_cache is not None else None
+    return modified, entry, _take_worker_stats(), skipped
+
+
+def _report_file(
+    path: Path,
+    strict: bool,
+    comments_only: bool,
+    diff: bool,
+    converter: Optional[Converter] = None,
+    markdown: bool = True,
+    max_file_size: Optional[int] = None,
+) -> tuple[list[Hit], str]:
+    """
+    Find the words that would change in a file, without modifying it.
 
-    # Write the converted content back to the file
-    if dst is None:
-        dst = src
-    dst_path = Path(dst)
+    Args:
+        path: The file to read.
+        strict: Whether to raise errors on conversion failures
+        comments_only: Whether to convert only comments in Python files
+        diff: Whether to format the changes as a unified diff.
+        converter: Converter to use. Defaults to one for the current CONVERSION_IGNORE_LIST.
+        markdown: Whether to convert only the prose in Markdown files
+        max_file_size: If given, the largest file in bytes to read
 
-    # Create directory if it doesn't exist
-    dst_path.parent.mkdir(parents=True, exist_ok=True)
+    Returns:
+        Tuple of (hits, diff), where diff is empty unless asked for.
 
-    with open(dst_path, "w", encoding="utf-8") as f:
-        f.write(modified_content)
+    Raises:
+        _SkippedFile: If the file is too large, or is not UTF-8 text.
+    """
+    if converter is None:
+        converter = _default_converter()
+    _sniff_file(path, max_file_size)
+    find_spans = _file_span_finder(path, comments_only, markdown)
+    try:
+        content, replacements = _file_replacements(path, strict, find_spans, converter)
+    except UnicodeDecodeError:
+        raise _SkippedFile("not UTF-8") from None  # noqa: TRY003
+    stats.count("files")
+    if replacements:
+        stats.count("files_changed")
+    return _report_content(content, replacements, str(path), diff)
+
+
+def _report_content(
+    content: str, replacements: list[tuple[int, int, str]], label: str, diff: bool
+) -> tuple[list[Hit], str]:
+    """Locate replacements in text, and format them as a unified diff if asked."""
+    with stats.phase("report"):
+        located = list(_locate_hits(content, replacements))
+        return [hit for _, _, hit in located], _unified_diff(content, located, label, 3) if diff else ""
+
+
+def _report_files(
+    files: list[Path],
+    jobs: int,
+    strict: bool,
+    comments_only: bool,
+    diff: bool,
+    converter: Converter,
+    markdown: bool = True,
+    max_file_size: Optional[int] = None,
+) -> Iterator[tuple[list[Hit], str, Optional[str]]]:
+    """
+    Report on files with _report_file, in order, across a pool of worker processes if jobs > 1.
 
-    return modified
+    Yields:
+        Tuples of (hits, diff, skipped) for each file, where skipped is why the file was skipped, if it was.
+    """
+    if jobs <= 1:
+        for path in files:
+            try:
+                yield (*_report_file(path, strict, comments_only, diff, converter, markdown, max_file_size), None)
+            except _SkippedFile as error:
+                yield [], "", str(error)
+        return
+
+    report = partial(
+        _report_file_in_worker,
+        strict=strict,
+        comments_only=comments_only,
+        diff=diff,
+        markdown=markdown,
+        max_file_size=max_file_size,
+    )
+    from concurrent.futures import ProcessPoolExecutor
+
+    initargs = (converter, None, stats.current is not None)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=initargs) as executor:
+        for hits, diff_text, worker_stats, skipped in executor.map(
+            report, files, chunksize=max(1, len(files) // (jobs * 4))
+        ):
+            _merge_worker_stats(worker_stats)
+            yield hits, diff_text, skipped
+
+
+def _report_file_in_worker(
+    path: Path,
+    strict: bool,
+    comments_only: bool,
+    diff: bool,
+    markdown: bool = True,
+    max_file_size: Optional[int] = None,
+) -> tuple[list[Hit], str, Optional[dict[str, Any]], Optional[str]]:
+    """Report on a file in a worker process, returning any stats collected and why the file was skipped, if it was."""
+    try:
+        hits, diff_text = _report_file(path, strict, comments_only, diff, _worker_converter, markdown, max_file_size)
+    except _SkippedFile as error:
+        return [], "", _take_worker_stats(), str(error)
+    return hits, diff_text, _take_worker_stats(), None
+
+
+def _skip_file(path: Path, reason: str, on_skip: Optional[Callable[[Path, str], None]]) -> None:
+    """Count a file skipped as too large or not text, and pass it to on_skip if given."""
+    stats.count("files_skipped")
+    if on_skip is not None:
+        on_skip(path, reason)
+
+
+def _process_files_in_pool(
+    files: list[Path],
+    jobs: int,
+    strict: bool,
+    check: bool,
+    comments_only: bool,
+    cache: Optional[ConversionCache],
+    converter: Converter,
+    fail_fast: bool = False,
+    markdown: bool = True,
+    max_file_size: Optional[int] = None,
+    on_skip: Optional[Callable[[Path, str], None]] = None,
+) -> list[bool]:
+    """
+    Process files across a pool of worker processes.
+
+    Args:
+        files: Files to process.
+        jobs: Number of worker processes.
+        strict: Whether to raise errors on conversion failures
+        check: Whether to check only without modifying
+        comments_only: Whether to convert only comments in Python files
+        cache: Cache of files known to need no changes, updated with entries recorded by the workers.
+        converter: Converter to use in every worker.
+        fail_fast: Whether to stop at the first file that was or would be modified, cancelling files not yet started.
+        markdown: Whether to convert only the prose in Markdown files
+        max_file_size: If given, the largest file in bytes to convert
+        on_skip: Called with each file skipped as too large or not text, and why.
 
+    Returns:
+        Whether each file that was not skipped was modified or would be modified, in the same order as
+        files. With fail_fast, files not yet started when the first modified file is found are cancelled
+        and left out, but those already started are still waited for and counted.
+    """
+    process = partial(
+        _process_file_in_worker,
+        strict=strict,
+        check=check,
+        comments_only=comments_only,
+        markdown=markdown,
+        max_file_size=max_file_size,
+    )
+    results = []
+    from concurrent.futures import ProcessPoolExecutor
+
+    initargs = (converter, cache, stats.current is not None)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=initargs) as executor:
+        if fail_fast:
+            # One file per task lets a fail-fast run stop soon after the first modified file
+            outcomes: Iterable[Optional[tuple]] = _until_first_modified([executor.submit(process, f) for f in files])
+        else:
+            outcomes = executor.map(process, files, chunksize=max(1, len(files) // (jobs * 4)))
+        for file_path, outcome in zip(files, outcomes):
+            if outcome is None:
+                continue
+            modified, entry, worker_stats, skipped = outcome
+            _merge_worker_stats(worker_stats)
+            if cache is not None and entry is not None:
+                cache.add_update(file_path, entry)
+            if skipped is not None:
+                _skip_file(file_path, skipped, on_skip)
+                continue
+            results.append(modified)
+    return results
+
+
+def _until_first_modified(futures: list["Future"]) -> Iterator[Optional[tuple]]:
+    """
+    Yield the results of _process_file_in_worker tasks in order, cancelling the rest once a file is modified.
 
-def _process_file(path: Path, strict: bool, check: bool, comments_only: bool) -> bool:
+    Tasks already running when a modified file is found cannot be cancelled, and may have written their
+    files, so they are still waited for; each task that was cancelled yields None.
     """
-    Process a single file for conversion.
+    stopping = False
+    for index, future in enumerate(futures):
+        if future.cancelled():
+            yield None
+            continue
+        outcome = future.result()
+        yield outcome
+        if outcome[0] and not stopping:
+            stopping = True
+            for later in futures[index + 1 :]:
+                later.cancel()
+
+
+def _process_files_with_io_threads(
+    files: list[Path],
+    io_threads: int,
+    strict: bool,
+    check: bool,
+    comments_only: bool,
+    cache: Optional[ConversionCache],
+    converter: Converter,
+    fail_fast: bool = False,
+    markdown: bool = True,
+    max_file_size: Optional[int] = None,
+    on_skip: Optional[Callable[[Path, str], None]] = None,
+    jobs: Optional[int] = None,
+) -> list[bool]:
+    """
+    Process files in this process, reading them ahead and writing them back in a pool of threads.
+
+    While one file is converted, the threads stat and read the next ones and write earlier ones back,
+    so that I/O latency overlaps conversion instead of adding to it. At most _IO_QUEUE_DEPTH files per
+    thread wait to be converted, and as many to be written, which bounds the memory held. Files larger
+    than 64 MB are only sniffed ahead, and then streamed as by convert_file().
 
     Args:
-        path: File path to process
+        files: Files to process.
+        io_threads: Number of threads to read and write files in.
         strict: Whether to raise errors on conversion failures
         check: Whether to check only without modifying
         comments_only: Whether to convert only comments in Python files
+        cache: Cache of files known to need no changes
+        converter: Converter to use
+        fail_fast: Whether to stop at the first file that was or would be modified, skipping files not yet read.
+        markdown: Whether to convert only the prose in Markdown files
+        max_file_size: If given, the largest file in bytes to convert
+        on_skip: Called with each file skipped as too large or not text, and why.
+        jobs: Number of worker processes to split a large file across, as in convert_file()
 
     Returns:
-        True if the file was modified or would be modified
+        Whether each file that was not skipped was modified or would be modified, in the same order as
+        files. With fail_fast this stops at the first modified file.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    depth = io_threads * _IO_QUEUE_DEPTH
+    results = []
+    with ThreadPoolExecutor(max_workers=io_threads, thread_name_prefix="uwotm8-io") as executor:
+
+        def read_ahead(path: Path) -> "Future":
+            return executor.submit(_read_ahead, path, max_file_size, cache)
+
+        unread = iter(files)
+        reads = deque((path, read_ahead(path)) for path in islice(unread, depth))
+        writes: deque[Future] = deque()
+        try:
+            while reads:
+                path, read = reads.popleft()
+                for next_path in islice(unread, 1):
+                    reads.append((next_path, read_ahead(next_path)))
+                try:
+                    with stats.phase("read"):
+                        st, content = read.result()
+                    modified, converted = _process_read_ahead(
+                        path, st, content, strict, check, comments_only, cache, converter, markdown, jobs
+                    )
+                except _SkippedFile as error:
+                    _skip_file(path, str(error), on_skip)
+                    continue
+                if converted is not None:
+                    writes.append(executor.submit(_write_file, path, converted))
+                    if len(writes) > depth:
+                        with stats.phase("write"):
+                            writes.popleft().result()
+                results.append(modified)
+                if modified and fail_fast:
+                    break
+        finally:
+            # Files read ahead are no longer needed, but every write must still finish
+            for _, read in reads:
+                read.cancel()
+        with stats.phase("write"):
+            for write in writes:
+                write.result()
+    return results
+
+
+def _read_ahead(
+    path: Path, max_file_size: Optional[int], cache: Optional[ConversionCache]
+) -> tuple[os.stat_result, Optional[str]]:
+    """
+    Stat, sniff and read a UTF-8 text file, with universal newlines, in an I/O thread.
+
+    Returns:
+        Tuple of (stat, content), where content is None if the file was not read: if the cache has it as
+        clean, or it is large enough to be streamed instead.
+
+    Raises:
+        _SkippedFile: If the file is too large, or is not UTF-8 text.
     """
-    if path.suffix == ".py" and comments_only:
-        return convert_python_comments_only(path, strict=strict, check=check)
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        if cache is not None and cache.matches(path, st):
+            return st, None
+        head = _sniff(f, st.st_size, max_file_size)
+        if st.st_size > _STREAMING_THRESHOLD:
+            return st, None
+        try:
+            content = (head + f.read()).decode("utf-8")
+        except UnicodeDecodeError:
+            raise _SkippedFile("not UTF-8") from None  # noqa: TRY003
+    if "\r" in content:
+        content = content.replace("\r\n", "\n").replace("\r", "\n")
+    return st, content
+
+
+def _process_read_ahead(
+    path: Path,
+    st: os.stat_result,
+    content: Optional[str],
+    strict: bool,
+    check: bool,
+    comments_only: bool,
+    cache: Optional[ConversionCache],
+    converter: Converter,
+    markdown: bool,
+    jobs: Optional[int],
+) -> tuple[bool, Optional[str]]:
+    """Process a file read by _read_ahead(), returning whether it changed and any content to write back to it."""
+    converted = None
+    if cache is not None and cache.is_clean(path, st):
+        modified = False
+    elif content is None:
+        try:
+            modified = _convert_path(
+                path, strict, check, cache, converter, _file_span_finder(path, comments_only, markdown), jobs
+            )
+        except UnicodeDecodeError:
+            raise _SkippedFile("not UTF-8") from None  # noqa: TRY003
     else:
-        return convert_file(path, strict=strict, check=check)
+        stats.count("bytes_read", st.st_size)
+        modified, converted = _convert_content(
+            path, content, strict, check, cache, converter, _file_span_finder(path, comments_only, markdown)
+        )
+    stats.count("files")
+    if modified:
+        stats.count("files_changed")
+    return modified, converted
 
 
 def process_paths(
@@ -392,58 +2565,241 @@ def process_paths(
     check: bool = False,
     strict: bool = False,
     comments_only: bool = False,
+    jobs: int = 1,
+    cache_dir: Optional[Union[str, Path]] = None,
+    converter: Optional[Converter] = None,
+    include: Iterable[str] = DEFAULT_INCLUDE,
+    exclude: Iterable[str] = DEFAULT_EXCLUDE,
+    respect_gitignore: bool = False,
+    fail_fast: bool = False,
+    changed_since: Optional[str] = None,
+    staged: bool = False,
+    markdown: bool = True,
+    shard: Optional[tuple[int, int]] = None,
+    max_file_size: Optional[int] = None,
+    on_skip: Optional[Callable[[Path, str], None]] = None,
+    io_threads: int = 0,
 ) -> tuple[int, int]:
     """
     Process multiple files and directories.
 
+    Each file is checked before it is read in full: files with a NUL byte or invalid UTF-8 in their first
+    8 KB, or larger than max_file_size, are skipped and left out of the counts.
+
     Args:
         paths: list of file and directory paths.
         check: If True, only check if changes would be made without modifying files.
         strict: Whether to raise an exception if a word cannot be converted.
         comments_only: If True, only convert comments in Python files.
+        jobs: Number of worker processes to convert files with. 1 processes everything serially in this
+            process. A file larger than 64 MB processed on its own is split across this many processes.
+        cache_dir: Directory for the cache of files known to need no changes. If None, no cache is used.
+        converter: Converter to use. Defaults to one for the current CONVERSION_IGNORE_LIST.
+        include: File extensions or name globs to process when walking directories.
+        exclude: Names or path globs of files and directories to skip when walking directories.
+        respect_gitignore: If True, skip files ignored by git in directories inside a git work tree.
+        fail_fast: If True, stop at the first file that is or would be changed.
+        changed_since: If given, only process files that differ from this git revision, or are untracked.
+        staged: If True, only process files with changes staged in git.
+        markdown: If True, only convert the prose in Markdown (.md and .markdown) files, leaving code blocks,
+            inline code, URLs and HTML unchanged. If False, Markdown files are converted as plain text.
+        shard: If given as (index, count), only process shard index of count, counting from 1. Files are
+            assigned to shards by a hash of their path relative to the directory they were found in, so
+            separate runs over the same tree with each index process every file exactly once.
+        max_file_size: If given, skip files larger than this many bytes without reading them.
+        on_skip: Called with the path of each file skipped and why, such as "binary" or "not UTF-8".
+        io_threads: Number of threads to read files ahead of conversion and write them back after it in,
+            for slow or network filesystems, when files are processed in this process rather than across
+            worker processes. 0 reads and writes each file in turn.
 
     Returns:
         tuple of (number of files processed, number of files changed).
+
+    Raises:
+        GitError: If changed_since or staged is given and git cannot list the changed files.
+        ValueError: If the shard index is not from 1 to the shard count.
+    """
+    if converter is None:
+        converter = _default_converter()
+    if shard is not None:
+        _check_shard(shard)
+    changes = _GitChanges(changed_since, staged) if changed_since is not None or staged else None
+    with stats.phase("walk"):
+        files = _collect_files(paths, _PathFilter(include, exclude), respect_gitignore, changes, shard)
+    # A lone large file is split across the processes instead
+    file_jobs = jobs
+    jobs = min(jobs, len(files))
+    cache = None
+    if cache_dir is not None:
+        with stats.phase("cache"):
+            cache = ConversionCache(cache_dir, _cache_settings(converter, strict, comments_only, markdown))
+
+    if jobs > 1:
+        results = _process_files_in_pool(
+            files, jobs, strict, check, comments_only, cache, converter, fail_fast, markdown, max_file_size, on_skip
+        )
+    elif io_threads > 0:
+        results = _process_files_with_io_threads(
+            files,
+            io_threads,
+            strict,
+            check,
+            comments_only,
+            cache,
+            converter,
+            fail_fast,
+            markdown,
+            max_file_size,
+            on_skip,
+            file_jobs,
+        )
+    else:
+        results = []
+        for file_path in files:
+            try:
+                results.append(
+                    _process_file(
+                        file_path, strict, check, comments_only, cache, converter, markdown, file_jobs, max_file_size
+                    )
+                )
+            except _SkippedFile as error:
+                _skip_file(file_path, str(error), on_skip)
+                continue
+            if results[-1] and fail_fast:
+                break
+
+    if cache is not None:
+        with stats.phase("cache"):
+            cache.save()
+
+    return len(results), sum(results)
+
+
+def _convert_stdio(stdin: TextIO, stdout: TextIO, converter: Converter, strict: bool, buffer_size: int) -> None:
     """
-    modified_count = 0
-    total_count = 0
+    Convert standard input to standard output in large blocks.
 
-    for path_str in paths:
-        path = Path(path_str)
+    Blocks of up to buffer_size bytes are read from the binary stream under stdin as soon as they
+    are available, decoded and converted a whole number of lines at a time, and written and flushed
+    in one call each. The result is the same as converting the whole input at once.
+
+    Args:
+        stdin: Text stream to read from.
+        stdout: Text stream to write to.
+        converter: Converter to use.
+        strict: Whether to raise an exception if a word cannot be converted.
+        buffer_size: Maximum number of bytes to read at a time.
+    """
+    source = getattr(stdin, "buffer", None)
+    sink = getattr(stdout, "buffer", None)
+    if source is None or sink is None:
+        # Streams without a binary buffer, such as StringIO, are read as text
+        with stats.phase("scan"):
+            for converted in converter.convert_chunks(iter(lambda: stdin.read(buffer_size), ""), strict=strict):
+                stdout.write(converted)
+        return
+
+    # Decoded with universal newlines, as when reading stdin as text
+    decoder = io.IncrementalNewlineDecoder(
+        codecs.getincrementaldecoder(stdin.encoding)(stdin.errors or "strict"), translate=True
+    )
+    read = getattr(source, "read1", source.read)
+
+    def blocks() -> Generator[str, None, None]:
+        while True:
+            with stats.phase("read"):
+                block = read(buffer_size)
+            if not block:
+                break
+            stats.count("bytes_read", len(block))
+            yield decoder.decode(block)
+        yield decoder.decode(b"", final=True)
+
+    stdout.flush()
+    with stats.phase("scan"):
+        for converted in converter.convert_chunks(blocks(), strict=strict):
+            if os.linesep != "\n":
+                converted = converted.replace("\n", os.linesep)
+            with stats.phase("write"):
+                sink.write(converted.encode(stdout.encoding, stdout.errors or "strict"))
+                sink.flush()
+
+
+def _report_paths(args: "argparse.Namespace", converter: Converter) -> int:
+    """Print a unified diff or a JSON list of the words that would change, without modifying any files."""
+    if args.src:
+        changes = (
+            _GitChanges(args.changed_since, args.staged) if args.changed_since is not None or args.staged else None
+        )
+        path_filter = _PathFilter(args.include, [*DEFAULT_EXCLUDE, *args.exclude])
+        with stats.phase("walk"):
+            files = _collect_files(args.src, path_filter, args.respect_gitignore, changes, args.shard)
+        labels = [str(path) for path in files]
+        reports = _report_files(
+            files,
+            min(args.jobs, len(files)),
+            args.strict,
+            args.comments_only,
+            args.diff,
+            converter,
+            args.markdown,
+            args.max_file_size,
+        )
+    else:
+        with stats.phase("read"):
+            content = sys.stdin.read()
+        with stats.phase("scan"):
+            replacements = converter._replacements(content, args.strict)
+        labels = ["<stdin>"]
+        reports = iter([(*_report_content(content, replacements, "<stdin>", args.diff), None)])
+
+    records: list[dict[str, Any]] = []
+    modified = 0
+    total = 0
+    for label, (hits, diff, skipped) in zip(labels, reports):
+        if skipped is not None:
+            _skip_file(Path(label), skipped, _print_skipped)
+            continue
+        total += 1
+        modified += bool(hits)
+        if args.diff:
+            sys.stdout.write(diff)
+        else:
+            records.extend({"file": label, **hit._asdict()} for hit in hits)
+    if args.json:
+        print(json.dumps(records, indent=2, ensure_ascii=False))
+
+    # The summary goes to stderr to keep the diff or JSON on stdout intact
+    print(f"{modified} of {total} files would be reformatted", file=sys.stderr)
+    if args.summary_json is not None:
+        # Nothing is written back, so this is a check whether or not --check was given
+        _write_summary(args, True, total, modified)
+    return 1 if args.check and modified else 0
 
-        if path.is_file():
-            total_count += 1
-            if _process_file(path, strict, check, comments_only):
-                modified_count += 1
-        elif path.is_dir():
-            for root, _, files in os.walk(path):
-                for file in files:
-                    file_path = Path(root) / file
-                    if file.endswith((".py", ".txt", ".md")):
-                        total_count += 1
-                        if _process_file(file_path, strict, check, comments_only):
-                            modified_count += 1
 
-    return total_count, modified_count
+def _print_skipped(path: Path, reason: str) -> None:
+    """Report a file skipped as too large or not text, on stderr to keep any diff or JSON on stdout intact."""
+    print(f"Skipped {path}: {reason}", file=sys.stderr)
 
 
-def _handle_file_with_output(args: argparse.Namespace, src_file: Path) -> int:
+def _handle_file_with_output(args: "argparse.Namespace", src_file: Path, converter: Converter) -> int:
     """Handle the case where a single file is processed with output option."""
-    if src_file.suffix == ".py" and args.comments_only:
-        changes_made = convert_python_comments_only(
-            src_file,
-            args.output,
-            strict=args.strict,
-            check=args.check,
-        )
+    find_spans = _file_span_finder(src_file, args.comments_only, args.markdown)
+    if find_spans is not None:
+        changes_made = _convert_file_spans(src_file, args.output, args.strict, args.check, None, converter, find_spans)
     else:
         changes_made = convert_file(
             src_file,
             args.output,
             strict=args.strict,
             check=args.check,
+            converter=converter,
+            jobs=args.jobs,
         )
 
+    stats.count("files")
+    if changes_made:
+        stats.count("files_changed")
     if args.check:
         return 1 if changes_made else 0
     else:
@@ -454,8 +2810,10 @@ def _handle_file_with_output(args: argparse.Namespace, src_file: Path) -> int:
         return 0
 
 
-def main() -> int:  # noqa: C901
-    """Command-line interface."""
+def _build_parser() -> "argparse.ArgumentParser":
+    """Build the command-line parser."""
+    import argparse
+
     parser = argparse.ArgumentParser(
         prog="uwotm8",
         description="Convert American English spelling to British English spelling.",
@@ -474,6 +2832,26 @@ def main() -> int:  # noqa: C901
         "Return code 1 means some files would be reformatted.",
     )
 
+    parser.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help="Stop at the first file that would be reformatted (or, without --check, at the first file reformatted).",
+    )
+
+    output_format = parser.add_mutually_exclusive_group()
+    output_format.add_argument(
+        "--diff",
+        action="store_true",
+        help="Don't write the files back, print a unified diff of the lines that would change instead. "
+        "With --check, return code 1 means some files would be reformatted.",
+    )
+    output_format.add_argument(
+        "--json",
+        action="store_true",
+        help="Don't write the files back, print a JSON list of the words that would change instead, "
+        "each with its file, line, column, american and british spellings.",
+    )
+
     parser.add_argument(
         "--strict",
         action="store_true",
@@ -486,18 +2864,117 @@ def main() -> int:  # noqa: C901
         help="For Python files, only convert comments and docstrings, leaving code unchanged.",
     )
 
+    parser.add_argument(
+        "--no-markdown",
+        action="store_false",
+        dest="markdown",
+        help="Convert Markdown files as plain text. By default only their prose is converted, leaving front "
+        "matter, code blocks, inline code, URLs, link destinations and HTML unchanged.",
+    )
+
     parser.add_argument(
         "--include",
         nargs="+",
-        default=[".py", ".txt", ".md"],
-        help="File extensions to include when processing directories. Default: .py .txt .md",
+        default=list(DEFAULT_INCLUDE),
+        help="File extensions or name globs to include when processing directories. Default: .py .txt .md",
     )
 
     parser.add_argument(
         "--exclude",
         nargs="+",
         default=[],
-        help="Paths to exclude when processing directories.",
+        help="Names or paths (globs allowed) to exclude when processing directories, in addition to "
+        "version control, virtual environment and cache directories such as .git, .venv and node_modules.",
+    )
+
+    parser.add_argument(
+        "--respect-gitignore",
+        action="store_true",
+        help="Skip files ignored by git when processing directories inside a git work tree.",
+    )
+
+    parser.add_argument(
+        "--changed-since",
+        metavar="REF",
+        help="Only process files that differ from this git revision, or are untracked. "
+        "Directories are listed with git instead of being walked. If no paths are given, uses the current directory.",
+    )
+
+    parser.add_argument(
+        "--staged",
+        action="store_true",
+        help="Only process files with changes staged in git, for example in a pre-commit hook. "
+        "If no paths are given, uses the current directory.",
+    )
+
+    shard = parser.add_argument_group("sharding")
+    shard.add_argument(
+        "--shard",
+        type=_parse_shard,
+        metavar="INDEX/COUNT",
+        help="Only process shard INDEX of COUNT, counting from 1, to split a run across machines. Files are "
+        "assigned to shards by a hash of their path relative to the directory argument they were found in.",
+    )
+    shard.add_argument(
+        "--summary-json",
+        type=Path,
+        metavar="FILE",
+        help="When done, write the number of files processed and changed, and the shard, as JSON to FILE.",
+    )
+    shard.add_argument(
+        "--merge-summaries",
+        nargs="+",
+        type=Path,
+        metavar="FILE",
+        help="Combine files written by --summary-json, such as one per shard, and report on them as a "
+        "single run, checking that every shard is present. Nothing else is processed.",
+    )
+
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=_positive_int,
+        default=os.cpu_count() or 1,
+        help="Number of worker processes to use when processing multiple files, or to split a single file "
+        "larger than 64 MB across. Default: number of CPUs",
+    )
+
+    parser.add_argument(
+        "--io-threads",
+        type=_non_negative_int,
+        default=0,
+        metavar="N",
+        help="Number of threads to read files ahead of conversion and write them back in, to overlap I/O "
+        "latency on network or slow filesystems when files are processed in one process (with -j 1). "
+        "Default: 0, reading and writing each file in turn",
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=default_cache_dir(),
+        help="Directory for the cache of files known to need no changes. Default: ~/.cache/uwotm8",
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Don't read or write the cache of files known to need no changes.",
+    )
+
+    parser.add_argument(
+        "--max-file-size",
+        type=_parse_size,
+        metavar="SIZE",
+        help="Skip files larger than SIZE bytes, or with a K, M or G suffix, without reading them. Files that "
+        "start with a NUL byte or invalid UTF-8 are always skipped. Default: no limit",
+    )
+
+    parser.add_argument(
+        "--buffer-size",
+        type=_positive_int,
+        default=_STREAM_CHUNK_SIZE,
+        help="Maximum number of bytes to read from stdin at a time when converting a stream. Default: 1048576",
     )
 
     parser.add_argument(
@@ -508,8 +2985,8 @@ def main() -> int:  # noqa: C901
 
     parser.add_argument(
         "--version",
-        action="version",
-        version=version("uwotm8"),
+        action="store_true",
+        help="show program's version number and exit",
     )
 
     parser.add_argument(
@@ -517,8 +2994,231 @@ def main() -> int:  # noqa: C901
         help="A space-separated string of words to ignore, or a path to a text file containing words to ignore.",
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--stats",
+        "--profile",
+        action="store_true",
+        help="When done, print the time spent in each phase, and counts of files, bytes and words, to stderr.",
+    )
+    parser.add_argument(
+        "--stats-json",
+        type=Path,
+        metavar="FILE",
+        help="When done, write the time spent in each phase, and counts of files, bytes and words, as JSON to FILE.",
+    )
+
+    daemon = parser.add_argument_group("daemon")
+    daemon.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Run a daemon that keeps a converter loaded and serves later uwotm8 commands over a Unix socket.",
+    )
+    daemon.add_argument(
+        "--stop-daemon",
+        action="store_true",
+        help="Stop the running daemon.",
+    )
+    daemon.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="Don't use the daemon, even if one is running.",
+    )
+    daemon.add_argument(
+        "--socket",
+        type=Path,
+        help="Socket of the daemon. Default: $XDG_RUNTIME_DIR/uwotm8.sock, or daemon.sock in the cache directory",
+    )
+
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Command-line interface."""
+    args = _build_parser().parse_args(argv)
+
+    # Read lazily, as loading package metadata costs more than the rest of startup
+    if args.version:
+        from importlib.metadata import version
+
+        print(version("uwotm8"))
+        return 0
+
+    if args.daemon:
+        from uwotm8.daemon import serve
+
+        return serve(args.socket)
+    if args.stop_daemon:
+        return _stop_daemon(args.socket)
+
+    return _run(args)
+
+
+def _stop_daemon(socket_path: Optional[Path]) -> int:
+    """Stop the running daemon, returning 1 if there is none."""
+    from uwotm8.daemon import Client, DaemonError
 
+    try:
+        Client(socket_path).shutdown()
+    except (OSError, DaemonError):
+        print("No uwotm8 daemon is running")
+        return 1
+    return 0
+
+
+def _reads_stdin(args: "argparse.Namespace") -> bool:
+    """Return whether a command line converts or reports on standard input."""
+    return not args.src and args.changed_since is None and not args.staged and not args.merge_summaries
+
+
+def _run(args: "argparse.Namespace") -> int:
+    """Run a parsed command line, other than those handled by main() itself, collecting stats if asked."""
+    if not args.stats and args.stats_json is None:
+        return _execute(args)
+
+    with stats.collecting() as collected:
+        code = _execute(args)
+    if args.stats:
+        print(collected.format(), file=sys.stderr)
+    if args.stats_json is not None:
+        args.stats_json.write_text(json.dumps(collected.as_dict(), indent=2) + "\n", encoding="utf-8")
+    return code
+
+
+def _parse_shard(value: str) -> tuple[int, int]:
+    """Parse a --shard value of the form INDEX/COUNT."""
+    import argparse
+
+    index, _, count = value.partition("/")
+    try:
+        shard = int(index), int(count)
+        _check_shard(shard)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected INDEX/COUNT with 1 <= INDEX <= COUNT, not {value!r}") from None  # noqa: TRY003
+    return shard
+
+
+def _positive_int(value: str) -> int:
+    """Parse an option value that must be a whole number of at least 1."""
+    import argparse
+
+    if not value.isdigit() or int(value) < 1:
+        raise argparse.ArgumentTypeError(f"expected a whole number of at least 1, not {value!r}")  # noqa: TRY003
+    return int(value)
+
+
+def _non_negative_int(value: str) -> int:
+    """Parse an option value that must be a whole number of at least 0."""
+    import argparse
+
+    if not value.isdigit():
+        raise argparse.ArgumentTypeError(f"expected a whole number of at least 0, not {value!r}")  # noqa: TRY003
+    return int(value)
+
+
+def _parse_size(value: str) -> int:
+    """Parse a --max-file-size value: a number of bytes, optionally with a K, M or G suffix."""
+    import argparse
+
+    multiplier = {"K": 1024, "M": 1024**2, "G": 1024**3}.get(value[-1:].upper(), 1)
+    digits = value[:-1] if multiplier > 1 else value
+    if not digits.isdigit():
+        raise argparse.ArgumentTypeError(f"expected a number of bytes, such as 1048576 or 1M, not {value!r}")  # noqa: TRY003
+    return int(digits) * multiplier
+
+
+def _write_summary(args: "argparse.Namespace", check: bool, total: int, modified: int) -> None:
+    """Write the outcome of a run to --summary-json, for --merge-summaries to combine with those of other shards."""
+    summary = {
+        "shard": None if args.shard is None else {"index": args.shard[0], "count": args.shard[1]},
+        "check": check,
+        "fail_fast": args.fail_fast,
+        "files": total,
+        "changed": modified,
+    }
+    args.summary_json.write_text(json.dumps(summary, indent=2) + "\n", encoding="utf-8")
+
+
+def _read_summary(path: Path) -> dict[str, Any]:
+    """
+    Read a file written with --summary-json.
+
+    Raises:
+        OSError: If the file cannot be read.
+        ValueError: If the file is not JSON, or not a summary.
+    """
+    summary = json.loads(path.read_text(encoding="utf-8"))
+    try:
+        shard = summary["shard"]
+        valid = (
+            (shard is None or (isinstance(shard["index"], int) and isinstance(shard["count"], int)))
+            and isinstance(summary["check"], bool)
+            and isinstance(summary["fail_fast"], bool)
+            and isinstance(summary["files"], int)
+            and isinstance(summary["changed"], int)
+        )
+    except (KeyError, TypeError):
+        valid = False
+    if not valid:
+        raise ValueError("not a summary written with --summary-json")  # noqa: TRY003
+    return summary  # type: ignore[no-any-return]
+
+
+def _merge_summaries(paths: list[Path]) -> int:
+    """Report on the runs described by files written with --summary-json, as if they were one run."""
+    summaries = []
+    for path in paths:
+        try:
+            summaries.append(_read_summary(path))
+        except (OSError, ValueError) as error:
+            print(f"Error: cannot merge {path}: {error}")
+            return 2
+    shards = [summary["shard"] for summary in summaries if summary["shard"] is not None]
+    if shards:
+        counts = {shard["count"] for shard in shards}
+        if len(counts) > 1 or len(shards) < len(summaries):
+            print("Error: the summaries are not all from shards of the same run")
+            return 2
+        count = counts.pop()
+        indexes = sorted(shard["index"] for shard in shards)
+        missing = sorted(set(range(1, count + 1)) - set(indexes))
+        if missing or len(indexes) != len(set(indexes)):
+            problem = f"missing shards {', '.join(map(str, missing))}" if missing else "shards given more than once"
+            print(f"Error: {problem} of {count}")
+            return 2
+    if len({summary["check"] for summary in summaries}) > 1:
+        print("Error: the summaries mix checking and converting runs")
+        return 2
+
+    total = sum(summary["files"] for summary in summaries)
+    modified = sum(summary["changed"] for summary in summaries)
+    fail_fast = any(summary["fail_fast"] for summary in summaries)
+    return _report_outcome(summaries[0]["check"] if summaries else False, total, modified, fail_fast)
+
+
+def _report_outcome(check: bool, total: int, modified: int, fail_fast: bool) -> int:
+    """Print how many files were or would be changed, returning the exit code."""
+    stopped = " (stopped at the first)" if fail_fast else ""
+    if check:
+        if modified > 0:
+            print(f"Would reformat {modified} of {total} files{stopped}")
+            return 1
+        else:
+            print(f"All {total} files would be left unchanged")
+            return 0
+    else:
+        if modified > 0:
+            print(f"🇬🇧 Reformatted {modified} of {total} files{stopped}")
+        else:
+            print(f"All {total} files left unchanged")
+        return 0
+
+
+def _execute(args: "argparse.Namespace") -> int:  # noqa: C901
+    """Run a parsed command line."""
+    if args.merge_summaries:
+        return _merge_summaries(args.merge_summaries)
+
+    ignore = frozenset(CONVERSION_IGNORE_LIST)
     if args.ignore:
         ignore_path = Path(args.ignore)
         if ignore_path.is_file():
@@ -526,40 +3226,66 @@ def main() -> int:  # noqa: C901
                 ignore_words = [line.strip() for line in f if line.strip()]
         else:
             ignore_words = args.ignore.split()
+        ignore = ignore.union(word.lower() for word in ignore_words)
+
+    # Shared with earlier commands in the same daemon. Only the command line's own ignore list has its
+    # tables saved, and only where the cache is.
+    with stats.phase("load"):
+        converter = _converter_for(ignore, None if args.no_cache else Path(args.cache_dir))
+
+    changed_only = args.changed_since is not None or args.staged
+    if changed_only and not args.src:
+        args.src = ["."]
 
-        for word in ignore_words:
-            CONVERSION_IGNORE_LIST[word.lower()] = word.lower()
+    if args.diff or args.json:
+        try:
+            return _report_paths(args, converter)
+        except GitError as error:
+            print(f"Error: {error}")
+            return 2
 
     # Process stdin if no paths provided
     if not args.src:
-        for line in convert_stream(sys.stdin, strict=args.strict):
-            sys.stdout.write(line)
+        _convert_stdio(sys.stdin, sys.stdout, converter, args.strict, args.buffer_size)
         return 0
 
     # Process single file with output option
     if len(args.src) == 1 and args.output and Path(args.src[0]).is_file():
-        return _handle_file_with_output(args, Path(args.src[0]))
+        return _handle_file_with_output(args, Path(args.src[0]), converter)
 
     # Process multiple paths
     if args.output:
         print("Error: --output option can only be used with a single file input")
         return 2
 
-    total, modified = process_paths(args.src, check=args.check, strict=args.strict, comments_only=args.comments_only)
+    try:
+        total, modified = process_paths(
+            args.src,
+            check=args.check,
+            strict=args.strict,
+            comments_only=args.comments_only,
+            jobs=args.jobs,
+            cache_dir=None if args.no_cache else args.cache_dir,
+            converter=converter,
+            include=args.include,
+            exclude=[*DEFAULT_EXCLUDE, *args.exclude],
+            respect_gitignore=args.respect_gitignore,
+            fail_fast=args.fail_fast,
+            changed_since=args.changed_since,
+            staged=args.staged,
+            markdown=args.markdown,
+            shard=args.shard,
+            max_file_size=args.max_file_size,
+            on_skip=_print_skipped,
+            io_threads=args.io_threads,
+        )
+    except GitError as error:
+        print(f"Error: {error}")
+        return 2
 
-    if args.check:
-        if modified > 0:
-            print(f"Would reformat {modified} of {total} files")
-            return 1
-        else:
-            print(f"All {total} files would be left unchanged")
-            return 0
-    else:
-        if modified > 0:
-            print(f"🇬🇧 Reformatted {modified} of {total} files")
-        else:
-            print(f"All {total} files left unchanged")
-        return 0
+    if args.summary_json is not None:
+        _write_summary(args, args.check, total, modified)
+    return _report_outcome(args.check, total, modified, args.fail_fast)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,401 @@
+"""
+A resident converter that serves requests over a local Unix socket, and the client that talks to it.
+
+Starting uwotm8 costs far more than converting a typical file, so editors and hooks that call it once per
+file spend most of their time starting up. `uwotm8 --daemon` pays that cost once and then serves requests,
+and the `uwotm8` command forwards its arguments to the daemon whenever one is running.
+
+Each request is a single line of JSON, answered by a single line of JSON. Requests are handled one at a
+time, in the client's working directory and with the client's git and cache environment variables. The
+`uwotm8` command imports only the client, so forwarding a command costs little more than starting Python.
+"""
+
+import contextlib
+import io
+import json
+import os
+import socket
+import sys
+from collections.abc import Iterable, Iterator
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional, Union
+
+from uwotm8.cache import default_cache_dir, default_socket_path
+from uwotm8.tables import source_fingerprint
+
+if TYPE_CHECKING:
+    import socketserver
+
+# Options of process_paths that can be passed through a request
+_PROCESS_PATHS_OPTIONS = frozenset({
+    "check",
+    "strict",
+    "comments_only",
+    "jobs",
+    "cache_dir",
+    "include",
+    "exclude",
+    "respect_gitignore",
+    "fail_fast",
+    "changed_since",
+    "staged",
+    "markdown",
+    "shard",
+    "max_file_size",
+    "io_threads",
+})
+
+# Options only the uwotm8 command itself handles, so command lines with them are never forwarded
+_LOCAL_OPTIONS = ("--daemon", "--stop-daemon", "--no-daemon", "--version")
+
+# Environment variables each request is handled with, taken from the client: those that choose the cache
+# directory, and every GIT_* variable, such as GIT_INDEX_FILE in a pre-commit hook
+_FORWARDED_ENVIRONMENT = ("HOME", "XDG_CACHE_HOME")
+_FORWARDED_PREFIX = "GIT_"
+
+
+class DaemonError(Exception):
+    """Raised when the daemon cannot handle a request."""
+
+
+def _client_environment() -> dict[str, Optional[str]]:
+    """Return the environment variables a request is handled with, None for those that are unset."""
+    environment = {name: os.environ.get(name) for name in _FORWARDED_ENVIRONMENT}
+    environment.update((name, value) for name, value in os.environ.items() if name.startswith(_FORWARDED_PREFIX))
+    return environment
+
+
+@contextlib.contextmanager
+def _environment(environment: dict[str, Optional[str]]) -> Iterator[None]:
+    """Apply a client's environment variables for the duration of a request, then restore the daemon's."""
+    names = {name for name in os.environ if name.startswith(_FORWARDED_PREFIX)}.union(environment)
+    saved = {name: os.environ.get(name) for name in names}
+    try:
+        _set_environment({name: environment.get(name) for name in names})
+        yield
+    finally:
+        _set_environment(saved)
+
+
+def _set_environment(values: dict[str, Optional[str]]) -> None:
+    """Set environment variables, unsetting those whose value is None."""
+    for name, value in values.items():
+        if value is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = value
+
+
+def _sources() -> list[list]:
+    """Identify the installed code, so a client never uses a daemon running other code."""
+    return source_fingerprint("breame.data.spelling_constants", "uwotm8.convert", "uwotm8.markdown", __name__)
+
+
+class Client:
+    """
+    Sends requests to a running daemon.
+
+    Each request opens its own connection. Connection errors, such as FileNotFoundError or
+    ConnectionRefusedError when no daemon is running, are raised as they are.
+    """
+
+    def __init__(self, socket_path: Optional[Union[str, Path]] = None) -> None:
+        """
+        Args:
+            socket_path: The daemon's socket. Defaults to default_socket_path().
+        """
+        self.socket_path = Path(socket_path) if socket_path is not None else default_socket_path()
+
+    def request(self, op: str, **params: Any) -> Any:
+        """
+        Send a request and wait for its result.
+
+        Args:
+            op: The operation to perform.
+            params: The operation's parameters.
+
+        Returns:
+            The result of the operation.
+
+        Raises:
+            DaemonError: If the daemon could not perform the operation, or runs other code than this client.
+        """
+        request = {"op": op, "cwd": os.getcwd(), "env": _client_environment(), "sources": _sources(), **params}
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(str(self.socket_path))
+            with sock.makefile("rwb") as stream:
+                stream.write(json.dumps(request).encode("utf-8") + b"\n")
+                stream.flush()
+                line = stream.readline()
+        if not line:
+            raise DaemonError("daemon closed the connection")  # noqa: TRY003
+        response = json.loads(line)
+        if not response["ok"]:
+            raise DaemonError(response["error"])
+        return response["result"]
+
+    def convert(self, text: str, strict: bool = False, ignore: Iterable[str] = ()) -> str:
+        """Convert text, as Converter.convert() does."""
+        return self.request("convert", text=text, strict=strict, ignore=list(ignore))  # type: ignore[no-any-return]
+
+    def check_file(self, path: Union[str, Path], strict: bool = False, comments_only: bool = False) -> bool:
+        """Check whether a file would change, as the uwotm8 command would with --check."""
+        return self.request("check_file", path=str(path), strict=strict, comments_only=comments_only)  # type: ignore[no-any-return]
+
+    def process_paths(self, paths: list[Union[str, Path]], **options: Any) -> tuple[int, int]:
+        """Process files and directories, as process_paths() does, with the same keyword options."""
+        total, modified = self.request("process_paths", paths=[str(path) for path in paths], options=options)
+        return total, modified
+
+    def run(self, argv: list[str], stdin: Optional[str] = None) -> tuple[int, str, str]:
+        """
+        Run a command line.
+
+        Args:
+            argv: Command-line arguments, without the program name.
+            stdin: Standard input for commands that read it. If None, this process's standard input
+                is read, but only if the command reads it.
+
+        Returns:
+            Tuple of (exit code, standard output, standard error).
+        """
+        result = self.request("run", argv=argv, stdin=stdin)
+        if result.get("stdin"):
+            text = sys.stdin.read()
+            try:
+                result = self.request("run", argv=argv, stdin=text)
+            except BaseException:
+                # Leave the input for the command to be run in this process instead
+                sys.stdin = io.StringIO(text)
+                raise
+        output = result["output"]
+        stdout = "".join(text for stream, text in output if stream == "stdout")
+        stderr = "".join(text for stream, text in output if stream == "stderr")
+        return result["exit"], stdout, stderr
+
+    def shutdown(self) -> None:
+        """Stop the daemon."""
+        self.request("shutdown")
+
+
+def _socket_option(options: list[str]) -> Optional[str]:
+    """Return the value of a --socket option."""
+    for index, option in enumerate(options):
+        if option == "--socket" and index + 1 < len(options):
+            return options[index + 1]
+        if option.startswith("--socket="):
+            return option.partition("=")[2]
+    return None
+
+
+def run_in_daemon(argv: list[str]) -> Optional[int]:
+    """
+    Run a command line in the daemon, if one is running the same code as this process.
+
+    Args:
+        argv: Command-line arguments, without the program name.
+
+    Returns:
+        The exit code, or None if the command must be run in this process instead.
+    """
+    options = argv[: argv.index("--")] if "--" in argv else argv
+    for option in options:
+        name = option.partition("=")[0]
+        # The parser accepts abbreviations, so anything that might abbreviate these is run here
+        if len(name) > 2 and (
+            any(local.startswith(name) for local in _LOCAL_OPTIONS)
+            or (name != "--socket" and "--socket".startswith(name))
+        ):
+            return None
+
+    client = Client(_socket_option(options))
+    if not hasattr(socket, "AF_UNIX") or not client.socket_path.exists():
+        return None
+    try:
+        result = client.request("run", argv=argv, stdin=None)
+    except (OSError, DaemonError):
+        return None
+    # Standard input is streamed in blocks by the command run here, rather than sent in one piece
+    if result.get("stdin"):
+        return None
+    for stream, text in result["output"]:
+        target = sys.stdout if stream == "stdout" else sys.stderr
+        target.write(text)
+        target.flush()
+    return result["exit"]  # type: ignore[no-any-return]
+
+
+class _Handler:
+    """Answers the requests on one connection, as a socketserver request handler."""
+
+    def __init__(
+        self, sources: list[list], request: socket.socket, client_address: Any, server: "socketserver.BaseServer"
+    ) -> None:
+        self.sources = sources
+        self.server = server
+        with request.makefile("rwb") as stream:
+            for line in stream:
+                try:
+                    response = {"ok": True, "result": self._dispatch(json.loads(line))}
+                except Exception as error:
+                    response = {"ok": False, "error": f"{type(error).__name__}: {error}"}
+                stream.write(json.dumps(response).encode("utf-8") + b"\n")
+                stream.flush()
+
+    def _dispatch(self, request: dict[str, Any]) -> Any:
+        if request.get("sources") != self.sources:
+            # Installing another version changes the code under a running daemon, so it makes way
+            self._shutdown()
+            raise DaemonError("daemon is running other code and is stopping")  # noqa: TRY003
+
+        os.chdir(request["cwd"])
+        with _environment(request["env"]):
+            return self._perform(request)
+
+    def _perform(self, request: dict[str, Any]) -> Any:
+        from uwotm8.convert import _default_converter, _process_file, process_paths
+
+        op = request["op"]
+        if op == "ping":
+            return True
+        if op == "convert":
+            converter = _default_converter()
+            ignore = frozenset(word.lower() for word in request["ignore"])
+            return converter.convert(request["text"], strict=request["strict"], ignore=ignore)
+        if op == "check_file":
+            return _process_file(Path(request["path"]), request["strict"], True, request["comments_only"])
+        if op == "process_paths":
+            options = request["options"]
+            unknown = set(options) - _PROCESS_PATHS_OPTIONS
+            if unknown:
+                raise DaemonError(f"unsupported options: {', '.join(sorted(unknown))}")  # noqa: TRY003
+            return process_paths(request["paths"], **options)
+        if op == "run":
+            return _run_command(request["argv"], request["stdin"])
+        if op == "shutdown":
+            self._shutdown()
+            return None
+        raise DaemonError(f"unknown operation: {op}")  # noqa: TRY003
+
+    def _shutdown(self) -> None:
+        import threading
+
+        # shutdown() waits for serve_forever() to return, so it cannot be called from this thread
+        threading.Thread(target=self.server.shutdown).start()
+
+
+class _CapturedOutput(io.TextIOBase):
+    """A standard stream whose output is captured along with the other's, in the order it was written."""
+
+    def __init__(self, stream: str, chunks: list[tuple[str, list[str]]]) -> None:
+        """
+        Args:
+            stream: The stream's name, "stdout" or "stderr".
+            chunks: Runs of text written to either stream, shared between the two.
+        """
+        self.stream = stream
+        self.chunks = chunks
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        if not self.chunks or self.chunks[-1][0] != self.stream:
+            self.chunks.append((self.stream, []))
+        self.chunks[-1][1].append(text)
+        return len(text)
+
+
+def _run_command(argv: list[str], stdin: Optional[str]) -> dict[str, Any]:
+    """
+    Run a command line with captured standard streams.
+
+    Returns:
+        The exit code and output, as a list of [stream, text] in the order written, or {"stdin": True}
+        if the command reads standard input and none was sent.
+    """
+    import traceback
+
+    from uwotm8.convert import _build_parser, _reads_stdin, _run
+
+    chunks: list[tuple[str, list[str]]] = []
+    stdout = _CapturedOutput("stdout", chunks)
+    stderr = _CapturedOutput("stderr", chunks)
+    saved_stdin = sys.stdin
+    try:
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                args = _build_parser().parse_args(argv)
+                if stdin is None and _reads_stdin(args):
+                    return {"stdin": True}
+                sys.stdin = io.StringIO(stdin or "")
+                code = _run(args)
+            except SystemExit as error:
+                code = error.code if isinstance(error.code, int) else 1
+            except Exception:
+                traceback.print_exc()
+                code = 1
+    finally:
+        sys.stdin = saved_stdin
+    return {"exit": code, "output": [[stream, "".join(texts)] for stream, texts in chunks]}
+
+
+def serve(socket_path: Optional[Union[str, Path]] = None) -> int:
+    """
+    Run the daemon until it is stopped by a signal or a shutdown request.
+
+    Args:
+        socket_path: The socket to listen on. Defaults to default_socket_path().
+
+    Returns:
+        The exit code: 0 once stopped, 1 if another daemon is already listening on the socket, or 2 if
+        this platform has no Unix domain sockets.
+    """
+    import signal
+    import socketserver
+    import threading
+
+    from uwotm8.convert import CONVERSION_IGNORE_LIST, _converter_for
+
+    if not hasattr(socket, "AF_UNIX"):
+        print("Error: the daemon needs Unix domain sockets, which this platform lacks", file=sys.stderr)
+        return 2
+
+    path = Path(socket_path) if socket_path is not None else default_socket_path()
+    try:
+        Client(path).request("ping")
+    except (OSError, DaemonError):
+        pass
+    else:
+        print(f"uwotm8 daemon already running on {path}", file=sys.stderr)
+        return 1
+
+    # Compile everything a first request would, so that it is as fast as the rest
+    _converter_for(frozenset(CONVERSION_IGNORE_LIST), default_cache_dir())._engine.pattern  # noqa: B018
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with contextlib.suppress(FileNotFoundError):
+        path.unlink()
+    # Only this user may connect
+    umask = os.umask(0o077)
+    try:
+        server = socketserver.UnixStreamServer(str(path), partial(_Handler, _sources()))  # type: ignore[arg-type]
+    finally:
+        os.umask(umask)
+    inode = path.stat().st_ino
+
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"uwotm8 daemon listening on {path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        # A newer daemon may already have replaced the socket
+        with contextlib.suppress(FileNotFoundError):
+            if path.stat().st_ino == inode:
+                path.unlink()
+    return 0
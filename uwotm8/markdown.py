@@ -0,0 +1,175 @@
+"""
+Splits Markdown into prose, to convert, and the code, links and markup around it, to leave alone.
+
+The document is scanned once. Block-level regions (front matter, fenced and indented code blocks) are
+found first, by jumping from one line that could open a block to the next, and skipped whole; inline
+regions (code spans, URLs, link destinations, HTML) are then found in the text between them, by jumping
+from one character that could start one to the next. Protected regions are never split into words, so
+code-heavy documents are converted several times faster than as plain text.
+
+This follows CommonMark closely enough for real documents rather than exactly: for example, an
+indented line after a blank line is only taken as code if the last line of text before it was neither
+a list item nor itself indented, so that the paragraphs of a list item are still converted.
+"""
+
+import re
+from collections.abc import Iterator
+from typing import Optional
+
+MARKDOWN_SUFFIXES = frozenset({".md", ".markdown"})
+
+# YAML or TOML front matter, which must close for the opening line to count as anything but a rule
+_FRONT_MATTER = re.compile(r"\A(---|\+\+\+)[ \t]*\n(?:.*?\n)?(?:\1|\.\.\.)[ \t]*(?:\n|\Z)", re.DOTALL)
+
+# A line that could open a block: a fence, at any indent so that fences in list items count, or an indented line
+_BLOCK_START = re.compile(r"^(?:[ \t]*(?P<fence>`{3,}(?=[^`\n]*$)|~{3,})|(?: {0,3}\t| {4})[ \t]*\S)", re.MULTILINE)
+
+# The indented lines, and blank lines between them, that make up an indented code block
+_INDENTED_LINES = re.compile(r"(?:(?: {0,3}\t| {4})[^\n]*(?:\n|\Z)|[ \t]*\n)*")
+
+_BLANK_LINE = re.compile(r"\n[ \t]*(?:\n|\Z)")
+_LIST_ITEM = re.compile(r"[ ]{0,3}(?:[-*+]|\d{1,9}[.)])(?:[ \t]|$)")
+
+# Where something to protect could start; each is then matched by the pattern for its kind, or
+# skipped. Finding a URL by its "://" rather than trying a scheme at every word keeps prose fast.
+_INLINE_MARKER = re.compile(r"(?<!\\)`+|<|\]\(|^[ ]{0,3}\[|://|\bwww\.", re.MULTILINE)
+
+_HTML = re.compile(
+    r"""
+    <!--.*?(?:-->|\Z)
+    | <(?P<raw>pre|code|kbd|samp|script|style)\b[^>]*>.*?</(?P=raw)[ \t\n]*>
+    | </?[A-Za-z][A-Za-z0-9-]*(?:[ \t\n]+[^<>]*?)?/?>
+    | <(?:[A-Za-z][A-Za-z0-9+.-]{1,31}:[^ \t\n<>]*|[^ \t\n<>@]+@[^ \t\n<>]+)>
+    """,
+    re.VERBOSE | re.DOTALL | re.IGNORECASE,
+)
+_LINK_DESTINATION = re.compile(
+    r"""\]\((?:<[^<>\n]*>|[^ \t\n()]*(?:\([^ \t\n()]*\)[^ \t\n()]*)*)(?:[ \t\n]+(?:"[^"]*"|'[^']*'|\([^()]*\)))?[ \t]*\)"""
+)
+# A link reference definition, of which only the destination and title are protected
+_DEFINITION = re.compile(
+    r"""[ ]{0,3}\[[^\]\n]+\]:([ \t]*[^ \t\n]+(?:[ \t]+(?:"[^"\n]*"|'[^'\n]*'|\([^)\n]*\)))?)[ \t]*(?:\n|\Z)"""
+)
+_URL_SCHEME = re.compile(r"[A-Za-z][A-Za-z0-9+.-]*\Z")
+_URL_REST = re.compile(r"[^ \t\n<>()\[\]]*")
+
+
+def prose_spans(text: str) -> Iterator[tuple[int, int]]:
+    """
+    Find the prose in a Markdown document.
+
+    Everything else is left out: front matter, fenced and indented code blocks, code spans, URLs,
+    link destinations and titles, HTML tags and comments, and the contents of pre, code, kbd, samp,
+    script and style elements. The text of links and the labels of reference links are prose.
+
+    Args:
+        text: The Markdown document.
+
+    Yields:
+        Tuples of (start, end) for each run of prose, in order.
+    """
+    position = 0
+    for start, end in _protected_blocks(text):
+        yield from _inline_prose_spans(text, position, start)
+        position = end
+    yield from _inline_prose_spans(text, position, len(text))
+
+
+def _protected_blocks(text: str) -> Iterator[tuple[int, int]]:
+    """Yield the spans of front matter, fenced code blocks and indented code blocks, in order."""
+    position = 0
+    front_matter = _FRONT_MATTER.match(text)
+    if front_matter:
+        position = front_matter.end()
+        yield 0, position
+
+    while match := _BLOCK_START.search(text, position):
+        line_start = match.start()
+        fence = match.group("fence")
+        if fence:
+            closing = re.compile(rf"^[ \t]*{re.escape(fence[0])}{{{len(fence)},}}[ \t]*$", re.MULTILINE)
+            close = closing.search(text, match.end())
+            # An unclosed fence runs to the end of the document
+            end = len(text) if close is None else _line_end(text, close.end())
+        elif _starts_indented_code(text, line_start):
+            end = _INDENTED_LINES.match(text, line_start).end()  # type: ignore[union-attr]
+        else:
+            position = _line_end(text, match.end())
+            continue
+        yield line_start, end
+        position = end
+
+
+def _line_end(text: str, position: int) -> int:
+    """Return the offset just past the end of the line containing position, including its newline."""
+    newline = text.find("\n", position)
+    return len(text) if newline == -1 else newline + 1
+
+
+def _starts_indented_code(text: str, line_start: int) -> bool:
+    """Check whether an indented line starts an indented code block rather than continuing a paragraph or list."""
+    if line_start == 0:
+        return True
+    # Indented code cannot interrupt a paragraph, so the line before must be blank
+    previous_start = text.rfind("\n", 0, line_start - 1) + 1
+    if text[previous_start : line_start - 1].strip():
+        return False
+
+    # Skip back over the blank lines to the last line of text
+    while previous_start > 0:
+        line_end = previous_start - 1
+        previous_start = text.rfind("\n", 0, line_end) + 1
+        line = text[previous_start:line_end]
+        if line.strip():
+            return not (line[0] in " \t" or _LIST_ITEM.match(line))
+    return True
+
+
+def _inline_prose_spans(text: str, start: int, end: int) -> Iterator[tuple[int, int]]:
+    """Yield the runs of prose between start and end, leaving out inline code, URLs, links and HTML."""
+    position = start
+    search_from = start
+    paragraph_end = start
+    while marker := _INLINE_MARKER.search(text, search_from, end):
+        found = marker.group()
+        if found[0] == "`":
+            # A code span closes at the next run of exactly as many backticks in the same paragraph,
+            # whose end is only searched for again once past it, to stay linear in long paragraphs
+            if marker.end() > paragraph_end:
+                blank_line = _BLANK_LINE.search(text, marker.end(), end)
+                paragraph_end = end if blank_line is None else blank_line.start()
+            closing = re.compile(rf"(?<!`){found}(?!`)").search(text, marker.end(), paragraph_end)
+            protected = None if closing is None else (marker.start(), closing.end())
+        else:
+            protected = _protected_at(text, marker, position, end)
+
+        if protected is None:
+            search_from = marker.end()
+            continue
+        if protected[0] > position:
+            yield position, protected[0]
+        position = search_from = protected[1]
+    if end > position:
+        yield position, end
+
+
+def _protected_at(text: str, marker: "re.Match[str]", position: int, end: int) -> Optional[tuple[int, int]]:
+    """Return the span of the HTML, link destination or URL a marker other than a backtick starts, if any."""
+    found = marker.group()
+    if found == "<":
+        match = _HTML.match(text, marker.start(), end)
+        return None if match is None else match.span()
+    if found == "](":
+        match = _LINK_DESTINATION.match(text, marker.start(), end)
+        return None if match is None else match.span()
+    if found[-1] == "[":
+        match = _DEFINITION.match(text, marker.start(), end)
+        return None if match is None else match.span(1)
+
+    # A URL starts at its scheme, if it has one, just before the "://"
+    url_start = marker.start()
+    if found == "://":
+        scheme = _URL_SCHEME.search(text, max(position, url_start - 32), url_start)
+        if scheme is not None:
+            url_start = scheme.start()
+    return url_start, _URL_REST.match(text, marker.end(), end).end()  # type: ignore[union-attr]
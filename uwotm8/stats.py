@@ -0,0 +1,149 @@
+"""
+Counters and timings for each phase of a run, such as walking directories, reading files and scanning text.
+
+Nothing is collected unless a caller asks for it with collecting(), so instrumented code only pays for
+checking whether `current` is None.
+"""
+
+import contextlib
+import time
+from collections import Counter
+from collections.abc import Iterator
+from typing import Any, Optional
+
+# The stats being collected, if any
+current: Optional["Stats"] = None
+
+_NOT_COLLECTING: contextlib.AbstractContextManager[None] = contextlib.nullcontext()
+
+# Counters in the order they are reported, with their descriptions
+COUNTERS = {
+    "files": "files processed",
+    "cache_hits": "files skipped as known clean",
+    "files_skipped": "files skipped as too large or not text",
+    "bytes_read": "bytes read",
+    "words_scanned": "words checked for a British spelling",
+    "candidates": "words with a British spelling",
+    "conversions": "words converted",
+    "skipped_backtick": "skipped inside backticks",
+    "skipped_hyphen": "skipped after a hyphen",
+    "skipped_url": "skipped on a line with a URL",
+    "skipped_ignore": "skipped by an ignore list",
+    "files_changed": "files changed",
+}
+
+
+class _Phase:
+    """Charges the time until it exits to a phase, pausing the phase it interrupts."""
+
+    __slots__ = ("name", "outer", "stats")
+
+    def __init__(self, stats: "Stats", name: str) -> None:
+        self.stats = stats
+        self.name = name
+        self.outer: Optional[str] = None
+
+    def __enter__(self) -> None:
+        self.outer = self.stats._switch(self.name)
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stats._switch(self.outer)
+
+
+class Stats:
+    """
+    Counters, and the time spent in each phase.
+
+    Phases nest: time is only charged to the innermost phase, so the phase times of a single process
+    add up to at most the total. Times collected in worker processes are merged in, and so can add up
+    to more.
+    """
+
+    def __init__(self) -> None:
+        self.counters: Counter[str] = Counter()
+        self.seconds: dict[str, float] = {}
+        self.total = 0.0
+        self._phase: Optional[str] = None
+        self._since = 0.0
+
+    def phase(self, name: str) -> contextlib.AbstractContextManager[None]:
+        """Time a phase of work until the returned context manager exits."""
+        return _Phase(self, name)
+
+    def _switch(self, name: Optional[str]) -> Optional[str]:
+        """Charge the time since the last switch to the running phase, then start another, returning the first."""
+        now = time.perf_counter()
+        previous = self._phase
+        if previous is not None:
+            self.seconds[previous] = self.seconds.get(previous, 0.0) + now - self._since
+        self._phase = name
+        self._since = now
+        return previous
+
+    def merge(self, data: dict[str, Any]) -> None:
+        """Add in stats taken from another process with take()."""
+        self.counters.update(data["counters"])
+        for name, seconds in data["seconds"].items():
+            self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def take(self) -> dict[str, Any]:
+        """Return the counters and phase times collected so far, and start again from zero."""
+        data = {"counters": dict(self.counters), "seconds": dict(self.seconds)}
+        self.counters.clear()
+        self.seconds.clear()
+        return data
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the stats as JSON-serialisable data."""
+        return {
+            "total_seconds": self.total,
+            "seconds": dict(self.seconds),
+            "counters": {
+                name: self.counters[name] for name in [*COUNTERS, *sorted(set(self.counters) - set(COUNTERS))]
+            },
+        }
+
+    def format(self) -> str:
+        """Format the stats as a table for people to read."""
+        lines = [f"{'Phase':<24} {'Seconds':>12}"]
+        for name, seconds in sorted(self.seconds.items(), key=lambda item: -item[1]):
+            lines.append(f"{name:<24} {seconds:>12.4f}")
+        lines.append(f"{'total (wall clock)':<24} {self.total:>12.4f}")
+        lines.append("")
+        lines.append(f"{'Counter':<24} {'Value':>12}")
+        for name, value in self.as_dict()["counters"].items():
+            description = f"  {COUNTERS[name]}" if name in COUNTERS else ""
+            lines.append(f"{name:<24} {value:>12}{description}")
+        return "\n".join(lines)
+
+
+def install(stats: Optional[Stats]) -> Optional[Stats]:
+    """Start collecting into stats, or stop collecting if it is None, returning the stats this replaces."""
+    global current
+    previous = current
+    current = stats
+    return previous
+
+
+@contextlib.contextmanager
+def collecting() -> Iterator[Stats]:
+    """Collect stats until the block exits, recording its duration as the total."""
+    stats = Stats()
+    previous = install(stats)
+    start = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats.total = time.perf_counter() - start
+        install(previous)
+
+
+def phase(name: str) -> contextlib.AbstractContextManager[None]:
+    """Time a phase of work if stats are being collected."""
+    return _NOT_COLLECTING if current is None else current.phase(name)
+
+
+def count(name: str, amount: int = 1) -> None:
+    """Add to a counter if stats are being collected."""
+    if current is not None:
+        current.counters[name] += amount
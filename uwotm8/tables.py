@@ -0,0 +1,77 @@
+"""Spelling tables saved to the cache directory, so later processes load them instead of building them again."""
+
+import hashlib
+import json
+import os
+import tempfile
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Any, Callable, Optional, TypeVar, Union
+
+T = TypeVar("T")
+
+# Bump whenever the contents of saved tables, or how they are built, change
+TABLE_FORMAT = 1
+
+
+def source_fingerprint(*modules: str) -> list[list]:
+    """
+    Identify the installed version of some modules by the size and modification time of their files.
+
+    The modules are located without being imported, although their parent packages are. Installing
+    another version of a package, or editing it in place, rewrites its files and so changes this.
+
+    Args:
+        modules: Dotted names of the modules.
+
+    Returns:
+        A JSON-serialisable list of [path, size, mtime_ns] for each module that was found.
+    """
+    fingerprint = []
+    for name in modules:
+        spec = find_spec(name)
+        if spec is None or spec.origin is None:
+            continue
+        try:
+            st = os.stat(spec.origin)
+        except OSError:
+            continue
+        fingerprint.append([spec.origin, st.st_size, st.st_mtime_ns])
+    return fingerprint
+
+
+def load_tables(cache_dir: Optional[Union[str, Path]], settings: dict[str, Any], build: Callable[[], T]) -> T:
+    """
+    Load the tables saved for some settings, or build and save them if there are none.
+
+    Tables are saved as JSON, one file per combination of settings, and loaded with a single read.
+    Saving is best effort: if the cache directory cannot be written, the tables are still returned.
+
+    Args:
+        cache_dir: Directory to save tables in. If None, tables are always built and never saved.
+        settings: Everything the tables depend on. Changing any of it builds new tables.
+        build: Builds the tables, which must be JSON-serialisable. Tuples are loaded back as lists.
+
+    Returns:
+        The tables.
+    """
+    if cache_dir is None:
+        return build()
+
+    fingerprint = hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    path = Path(cache_dir) / f"tables-{fingerprint}.json"
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)  # type: ignore[no-any-return]
+    except (OSError, ValueError):
+        pass
+
+    tables = build()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=path.parent, delete=False, encoding="utf-8") as out:
+            json.dump(tables, out)
+        os.replace(out.name, path)
+    except OSError:
+        pass
+    return tables